@@ -1,63 +1,76 @@
-#MODEL_CODES = ['gdps_ne36', 'gdps_n128', 'rdps_ne36', 'ldps', 'ecmf']
-PATH_DAIN = "../DAIN"
-PATH_DABA = "../DABA"
-PATH_DABA = "../DABA"
-PATH_OBS = "../DAIN/OBS"
-PATH_DAOU = "../DAOU"
-
-PATH_OBS_STN =  PATH_DAIN + "/OBS_STN/{YYYY}/stn_{YYYYMMDD}_{OBS}.csv" #############################추가한 거// 
-PATH_MODEL_STN = PATH_DAIN + "/MODEL_STN/stn_{YYYYMMDD}_{MODEL}_{OBS}.csv"
-
-PATH_TMP = PATH_DAIN + '/TMP'
-PATH_OBS_LATEST = PATH_OBS + '/latest_{OBS}.txt'
-PATH_OBS_DB = PATH_OBS + "/{YYYY}/{OBS}_{YYYYMM}.db"
-PATH_OBS_TXT = PATH_OBS + "/{YYYY}/rain_obsv_{OBS}.{YYYYMMDD}" 
-
-PATH_STN_LIST = PATH_DABA + "/stn_{MODEL}_{OBS}.dat" # 지점번호만 사용
-
-PATH_AWS_INFO_DB = PATH_DAIN + "/STN/aws_info.db"
-
-
-
-PATH_MODEL_EXTRACT_TXT = PATH_DAIN + "/MODEL/{MODEL}/{YYYY}/extract_{MODEL}_{OBS}.{YYYYMMDDHH}"
-
-PATH_MODEL_STNXY = PATH_DAIN + "/STNXY/{MODEL}/stnxy_{MODEL}_{OBS}.csv" ################################수정한거임
-# PATH_MODEL_STNXY_CHANGEONLY_TXT = PATH_DAIN + "/STN/CHANGE_ONLY/{MODEL}/stnxy_{MODEL}_{OBS}_{YYYYMMDD}.csv"
-
-
-PATH_CT_DAILY_CSV = PATH_DAOU + "/daily/{YYYY}/ct_day_{MODEL}_{OBS}_{YYYYMMDD}.csv"
-PATH_CT_DAILYSUM_CSV = PATH_DAOU + "/daily/{YYYY}/ct_daysum_{OBS}_{YYYYMMDD}.csv"
-# PATH_CT_DAILY_DB = PATH_DAOU + "/daily/{YYYY}/ct_day_{MODEL}_{OBS}_{YYYYMM}.db"
-# PATH_CT_DAILYSUM_DB = PATH_DAOU + "/daily/{YYYY}/ct_daysum_{OBS}_{YYYYMM}.db"
-
-PATH_PRETTY_FORMAT_DIR = PATH_DAOU + "/pretty/{YYYYMM}/{MODEL}"
-
-PATH_CT_DAILY_DB_ADDTIONAL = PATH_DAOU + "/daily_{ADD_CODE}/{YYYY}/ct_day_{MODEL}_{OBS}_{YYYYMM}.db"
-PATH_CT_DAILYSUM_DB_ADDTIONAL = PATH_DAOU + "/daily_{ADD_CODE}/{YYYY}/ct_daysum_{OBS}_{YYYYMM}.db"
-
-PATH_PRETTY_FORMAT_DIR_ADDTIONAL = PATH_DAOU + "/pretty_{ADD_CODE}/{YYYYMM}/{MODEL}"
-
-
-thresholdMms = [ 0.1, 1.0, 5.0, 12.5, 15.0, 25.0, 50.0 ]
-
-modelConf = {
-    
-    'gdps_ne36' : {
-        'modelThresholdHours' : [ 3, 6, 12 ],
-        'modelFcstMaxHours' : [ 72, 120 ],
-        'modelExtractHours' : 135,
-        't' : [0, 12],
-        'fcstInterval' : 3
-    },
-    'klfs_ne36' : {
-        'modelThresholdHours' : [ 1, 3 ],
-        'modelFcstMaxHours' : [ 12 ],
-        'modelExtractHours' : 12,
-        't' : [0, 3, 6, 9, 12, 15, 18, 21],
-        'fcstInterval' : 1
-    },
-}
-
-
-#modelCodes = ['gdps_ne36', 'gdps_n128', 'rdps_ne36', 'ldps_n128', 'ecmf', 'klfs_ne36', 'klfs_n128']
+#MODEL_CODES = ['gdps_ne36', 'gdps_n128', 'rdps_ne36', 'ldps', 'ecmf']
+PATH_DAIN = "../DAIN"
+PATH_DABA = "../DABA"
+PATH_DABA = "../DABA"
+PATH_OBS = "../DAIN/OBS"
+PATH_DAOU = "../DAOU"
+
+PATH_OBS_STN =  PATH_DAIN + "/OBS_STN/{YYYY}/stn_{YYYYMMDD}_{OBS}.csv" #############################추가한 거// 
+PATH_MODEL_STN = PATH_DAIN + "/MODEL_STN/stn_{YYYYMMDD}_{MODEL}_{OBS}.csv"
+
+PATH_TMP = PATH_DAIN + '/TMP'
+PATH_OBS_LATEST = PATH_OBS + '/latest_{OBS}.txt'
+PATH_OBS_DB = PATH_OBS + "/{YYYY}/{OBS}_{YYYYMM}.db"
+PATH_OBS_TXT = PATH_OBS + "/{YYYY}/rain_obsv_{OBS}.{YYYYMMDD}" 
+PATH_OBS_CUBE = PATH_OBS + "/{YYYY}/rain_obsv_{OBS}.{YYYY}.npy" # [지점 인덱스, 연중 시간] memmap
+PATH_OBS_CUBE_META = PATH_OBS + "/{YYYY}/rain_obsv_{OBS}.{YYYY}.meta.npz" # 지점번호, 적재된 일자
+
+PATH_STN_LIST = PATH_DABA + "/stn_{MODEL}_{OBS}.dat" # 지점번호만 사용
+
+PATH_AWS_INFO_DB = PATH_DAIN + "/STN/aws_info.db"
+
+
+
+PATH_MODEL_EXTRACT_TXT = PATH_DAIN + "/MODEL/{MODEL}/{YYYY}/extract_{MODEL}_{OBS}.{YYYYMMDDHH}"
+PATH_MODEL_EXTRACT_BIN = PATH_DAIN + "/MODEL/{MODEL}/{YYYY}/extract_{MODEL}_{OBS}.{YYYYMMDDHH}.bin" # 바이너리 추출 파일 (extract_store)
+PATH_MODEL_EXTRACT_STNXY = PATH_DAIN + "/MODEL/{MODEL}/{YYYY}/extract_{MODEL}_{OBS}.{YYYYMMDDHH}.stnxy.npy" # 추출한 지점의 격자 위치 (지점번호, x, y)
+PATH_MODEL_CUBE = PATH_DAIN + "/MODEL_CUBE/{MODEL}/{YYYY}/cube_{MODEL}.{YYYYMMDDHH}.npy" # 영역 모델 큐브 [step, y, x] memmap (model_cube)
+PATH_MODEL_CUBE_META = PATH_DAIN + "/MODEL_CUBE/{MODEL}/{YYYY}/cube_{MODEL}.{YYYYMMDDHH}.meta.npz" # 영역 위치, 위경도, 투영 정보
+
+PATH_MODEL_STNXY = PATH_DAIN + "/STNXY/{MODEL}/stnxy_{MODEL}_{OBS}.csv" ################################수정한거임
+PATH_MODEL_STNXY_WEIGHTS = PATH_DAIN + "/STNXY/{MODEL}/stnxy_{MODEL}_{OBS}.{METHOD}.npz" # 지점 보간 가중치 (stn_weights, bilinear / idw)
+PATH_MODEL_GRID_INDEX = PATH_DABA + "/grid_index_{MODEL}.pkl" # grid_latlon_{MODEL}.npz 최근접점 검색 인덱스 (grid_index)
+PATH_MODEL_GRID_PROJ = PATH_DABA + "/grid_proj_{MODEL}.json" # 모델 격자 투영 정보 (grid_registry)
+PATH_MODEL_GRIB_IDX = PATH_DAIN + "/GRIB_IDX/{NAME}.idx" # GRIB 파일 메시지 목록 (wgrib2 -s, grib_inventory)
+# PATH_MODEL_STNXY_CHANGEONLY_TXT = PATH_DAIN + "/STN/CHANGE_ONLY/{MODEL}/stnxy_{MODEL}_{OBS}_{YYYYMMDD}.csv"
+
+
+PATH_CT_STORE = PATH_DAOU + "/ct_store/{TABLE}/{MODEL}_{OBS}/{YYYYMM}/ct_{TABLE}_{MODEL}_{OBS}.{YYYYMMDD}.bin" # 분할표 열 저장소 (ct_store, 월 파티션, 하루 한 파일)
+PATH_CT_PREFIX = PATH_DAOU + "/ct_store/prefix/{MODEL}_{OBS}/ct_prefix_{MODEL}_{OBS}.{YYYY}.npy" # 일 분할표 누적합 [일, code, th_hour, mm, lead] (ct_prefix)
+# PATH_CT_DAILY_DB = PATH_DAOU + "/daily/{YYYY}/ct_day_{MODEL}_{OBS}_{YYYYMM}.db"
+# PATH_CT_DAILYSUM_DB = PATH_DAOU + "/daily/{YYYY}/ct_daysum_{OBS}_{YYYYMM}.db"
+
+PATH_PRETTY_FORMAT_DIR = PATH_DAOU + "/pretty/{YYYYMM}/{MODEL}"
+
+PATH_CT_DAILY_DB_ADDTIONAL = PATH_DAOU + "/daily_{ADD_CODE}/{YYYY}/ct_day_{MODEL}_{OBS}_{YYYYMM}.db"
+PATH_CT_DAILYSUM_DB_ADDTIONAL = PATH_DAOU + "/daily_{ADD_CODE}/{YYYY}/ct_daysum_{OBS}_{YYYYMM}.db"
+
+PATH_PRETTY_FORMAT_DIR_ADDTIONAL = PATH_DAOU + "/pretty_{ADD_CODE}/{YYYYMM}/{MODEL}"
+
+
+thresholdMms = [ 0.1, 1.0, 5.0, 12.5, 15.0, 25.0, 50.0 ]
+
+# 영역 모델 큐브 범위 (model_cube)
+modelCubeDomain = { 'latMin' : 32.0, 'latMax' : 39.0, 'lonMin' : 124.0, 'lonMax' : 132.0 }
+
+modelConf = {
+    
+    'gdps_ne36' : {
+        'modelThresholdHours' : [ 3, 6, 12 ],
+        'modelFcstMaxHours' : [ 72, 120 ],
+        'modelExtractHours' : 135,
+        't' : [0, 12],
+        'fcstInterval' : 3
+    },
+    'klfs_ne36' : {
+        'modelThresholdHours' : [ 1, 3 ],
+        'modelFcstMaxHours' : [ 12 ],
+        'modelExtractHours' : 12,
+        't' : [0, 3, 6, 9, 12, 15, 18, 21],
+        'fcstInterval' : 1
+    },
+}
+
+
+#modelCodes = ['gdps_ne36', 'gdps_n128', 'rdps_ne36', 'ldps_n128', 'ecmf', 'klfs_ne36', 'klfs_n128']
 #obsCodes = ['asos', 'aws']
\ No newline at end of file
@@ -1,507 +1,577 @@
-#import json
-from datetime import datetime, timedelta
-import os
-import sqlite3
-import argparse
-import math
-import _config as cfg
-import pandas as pd
-
-
-class CalcContingencyDay :
-    def __init__(self) -> None:
-        pass
-
-    def GetDayObs(self, targetDay, thresholdHour, stnIds, obsCode) -> dict:
-        '''
-        Calculates and returns the Observed Accumulative Precipitation for the given date, thresholdHour
-        
-        Parameters:
-        - targetDay(datetime): date (KST)
-        - thresholdHour(int): Time to determine the prediction interval
-        - stnIds(list): Station Id list
-        - obsCode(str): Observation code (aws, asos)
-
-        Returns:
-        - dict: Observed Accumulative precipitation by section for each station
-        '''
-        ymd = targetDay.strftime('%Y%m%d')
-        txtFile = cfg.PATH_OBS_TXT.format(OBS=obsCode, YYYY=ymd[0:4], YYYYMMDD=ymd) # "./DAIN/OBS/{YYYY}/rain_obsv_{OBS}.{YYYYMMDD}" 
-    
-        if os.path.exists(txtFile) == False :
-            print('GetDayObs - File not found - ' + txtFile)
-            return False
-
-        obs = {}
-        for stn in stnIds :
-            obs[stn] = {}
-            for s in range(thresholdHour, 24+thresholdHour, thresholdHour) :
-                obs[stn][s] = 0
-        
-        f = open(txtFile, 'r')
-        while True :
-            line = f.readline()
-            if not line : break
-            if len(line) < 242 : continue # stnId:9,dt:9,rn:9*24,=:8
-            stn = int(line[0:9]) # # stnId:9,dt:9,rn:9*24,=:8
-            if stn not in stnIds :
-                continue
-            #posBase = 18
-            for hIdx in range(0,24) :
-                pos = 18 + (hIdx * 9)
-                tmp = line[pos:pos+9].strip()
-                rn = None
-                if len(tmp) < 1 : continue
-                rn = float(tmp)
-                hour = hIdx + 1 # 1h ~ 24h
-                s = math.ceil(hour / thresholdHour) * thresholdHour
-                obs[stn][s] += round(rn, 1)
-                obs[stn][s] = round(obs[stn][s], 1)
-        f.close()
-
-        return obs
-    
-    def GetDayModel(self, targetDay, thresholdHour, stnIds, modelCode, obsCode) -> dict:
-        '''
-        Calculates and returns the Model predicted Accumulative Precipitation for the given date, thresholdHour
-        
-        Parameters:
-        - targetDay(datetime): date (KST)
-        - thresholdHour(int): Time to determine the prediction interval
-        - stnIds(list): Station Id list
-        - modelCode(str): model code
-        - obsCode(str): Observation code (aws, asos)
-
-        Returns:
-        - dict: Model Predicted Accumulative Precipitation by section for each station
-        '''
-        targetDayEnd = targetDay + timedelta(days=1)
-
-        modelSum = {stn : {} for stn in stnIds}
-        modelFcstMaxHour = max(cfg.modelConf[modelCode]['modelFcstMaxHours'])
-
-        dtStart = targetDay - timedelta(hours=max(cfg.modelConf[modelCode]['modelFcstMaxHours']))
-        dtEnd = targetDay + timedelta(days=1) - timedelta(hours=thresholdHour)
-
-        modelDts = []
-        dt = dtStart
-        while dt <= dtEnd :
-            for t in cfg.modelConf[modelCode]['t'] : # 모델의 발표 시각마다
-                dt1 = dt + timedelta(hours=t)
-                dt1Str = dt1.strftime("%Y-%m-%d %H:%M:%S")
-                for s in range(thresholdHour, modelFcstMaxHour+thresholdHour, thresholdHour) :
-                    dt2 = dt1 + timedelta(hours=s)
-                    if dt2 <= targetDay or dt2>targetDayEnd :
-                        continue
-                    if dt1Str not in modelDts :
-                        modelDts.append(dt1Str)
-                    for stn in stnIds :
-                        if dt1Str not in modelSum[stn] :
-                            modelSum[stn][dt1Str] = {}                        
-                        modelSum[stn][dt1Str][s] = 0
-            dt = dt + timedelta(days=1)
-            
-        txtFiles = []
-        for modelDtStr in modelDts :
-            modelDt = datetime.strptime(modelDtStr, '%Y-%m-%d %H:%M:%S')
-            fn = cfg.PATH_MODEL_EXTRACT_TXT.format(MODEL=modelCode, OBS=obsCode, YYYY=modelDt.strftime('%Y'), YYYYMMDDHH=modelDt.strftime('%Y%m%d%H'))
-            if os.path.exists(fn) == False :
-                print('GetDayModel - File not found - ' + fn)
-                return False
-            txtFiles.append(fn)
-
-        # 각 발표 시각 마다 thresholdHour 단위로 취합
-        for txtFile in txtFiles :
-            #print(txtFile)
-            f = open(txtFile, 'r')
-            line = f.readline()
-            if not line :
-                print('GetDayModel - no lines - ' + txtFile)
-                return False
-            if line[0:6] != '# INFO' :
-                print('GetDayModel - no info line - ' + txtFile)
-                return False
-            tmp = line.split(',')
-            info = {}
-            for kv in tmp :
-                tmp2 = kv.strip().split(':')
-                #print(kv)
-                #print(tmp2)
-                if len(tmp2)<2 : continue
-                k1 = tmp2[0]
-                v1 = tmp2[1]
-                if k1 == 'fcstInterval' or k1 == 'fcstMaxHour' :
-                    v1 = int(v1)
-                info[k1] = v1
-            #print(info)
-            
-            if modelFcstMaxHour > info['fcstMaxHour'] :
-                print('GetDayModel - not enough ft - ' + txtFile)
-                return False
-            if thresholdHour < info['fcstInterval'] :
-                print('GetDayModel - file interval is bigger then thresholdHour - ' + txtFile)
-                return False
-            if thresholdHour % info['fcstInterval'] != 0 :
-                print('GetDayModel - thresholdHour is not multiples of file fcstInterval - ' + txtFile)
-                return False
-
-            model_dt = datetime.strptime(info['ymdh'], '%Y%m%d%H')
-            
-            szModelDt = model_dt.strftime("%Y-%m-%d %H:%M:%S")
-
-            while True :
-                line = f.readline()
-                if not line : break
-                if len(line) < 6 : continue
-                if line[0] == '#' : continue
-                stn = int(line[0:6])
-                if stn not in stnIds :
-                    continue
-                #print(line)
-                
-                #print(modelSum[stn][szModelDt])
-                
-                for step in range(info['fcstInterval'], modelFcstMaxHour+info['fcstInterval'], info['fcstInterval']) :
-                    sIdx = int(step / info['fcstInterval'])
-                    pos = 6 + 2 + ((sIdx-1) * 7)
-                    tmp = line[pos:pos+7].strip()
-                    #print(stn, step, sIdx, pos, tmp)
-                    
-                    thS = math.ceil(step / thresholdHour) * thresholdHour
-                    #print(thS, '=', step, '/', thresholdHour, '*', thresholdHour)
-                    if thS not in modelSum[stn][szModelDt] :
-                        continue
-                    if len(tmp) < 1 : continue
-                    rn = float(tmp)
-
-                    modelSum[stn][szModelDt][thS] += round(rn, 2)
-                    modelSum[stn][szModelDt][thS] = round(modelSum[stn][szModelDt][thS], 2)
-            f.close()
-
-        # # 모델값 출력 포맷
-        # maxHour = max(cfg.modelConf[modelCode]['modelFcstMaxHours'])
-        # modelDts.sort()
-        # for dt in modelDts :
-        #     print(dt)
-        #     print("      ", end='')
-        #     for s in range(thresholdHour, maxHour+thresholdHour, thresholdHour) :
-        #         print(format(s, "7d"), end='')
-        #     print("")
-        #     for stn in modelSum :
-        #         print(format(stn, "6d"), end='')
-        #         for s in range(thresholdHour, maxHour+thresholdHour, thresholdHour) :
-        #         #for s in modelSum[stn][dt] :
-        #             if dt in modelSum[stn] and s in modelSum[stn][dt] :
-        #                 print(format(modelSum[stn][dt][s], "7.2f"), end='')
-        #             else :    
-        #                 print("   x.xx", end='')
-        #         print("")
-        #     print("")
-                
-        return modelSum
-
-        
-    
-
-
-
-
-    def CalcContingency(self, targetDay, thresholdHour, stnIds, modelCode, obs, model) -> dict:
-        '''
-        Calculates Contingency table with Observed Accumulative Precipitation and Model Predicted Accumulative Precipitation
-        
-        Parameters:
-        - targetDay(datetime): date (KST)
-        - thresholdHour(int): Time to determine the prediction interval
-        - stnIds(list): Station Id list
-        - modelCode(str): model code
-        - obs(dict): Observed Accumulative Precipitation by section for each station
-        - model(dict): Model Predicted Accumulative Precipitation by section for each station
-
-        Returns:
-        - dict: Contingency table
-        '''
-        ymd1 = targetDay.strftime('%Y-%m-%d') + " 00:00:00"
-        ymd2 = (targetDay+timedelta(days=1)).strftime('%Y-%m-%d') + " 00:00:00"
-        
-        modelFcstMaxHour = max(cfg.modelConf[modelCode]['modelFcstMaxHours'])
-
-        dtStart = targetDay - timedelta(hours=modelFcstMaxHour)
-        dtEnd = targetDay + timedelta(days=1) - timedelta(hours=thresholdHour)
-
-        ct = {}
-        for mm in cfg.thresholdMms:
-            szMm = format(mm, ".1f")
-            ct[szMm] = {}
-            for stn in stnIds:
-                stnVals = {}
-                # for s in ss :
-                #     stnVals[str(s)] = {'h':0, 'f':0, 'm':0, 'z':0, 't':0}
-
-                for modelDtStr in model[stn] :
-                    for s in model[stn][modelDtStr] :
-                        
-                        modelV = model[stn][modelDtStr][s]
-
-                        obsDt = datetime.strptime(modelDtStr, '%Y-%m-%d %H:%M:%S') + timedelta(hours=s)
-
-                        obsS = obsDt.hour
-                        if obsS == 0 : obsS = 24
-                        
-                        obsV = obs[stn][obsS]
-
-                        
-                        ft = True if modelV >= mm else False
-                        ob = True if obsV >= mm else False
-
-                        szS = str(s)
-                        if szS not in stnVals :
-                            stnVals[szS] = {'h':0, 'f':0, 'm':0, 'z':0, 't':0}
-                        rstCode = 'z'
-                        if ft is True and ob is True: rstCode = 'h' # hit
-                        elif ft is False and ob is True: rstCode = 'm' # miss
-                        elif ft is True and ob is False: rstCode = 'f' # false alarm
-                        elif ft is False and ob is False: rstCode = 'z' # correct negative, null
-                        
-                        stnVals[szS][rstCode] += 1
-                        stnVals[szS]['t'] += 1
-
-                        
-
-                # print(stn)
-                # print(stnVals)
-                ct[szMm][stn] = stnVals
-        return ct
-    
-
-    def rows_ContingencyDay(self, targetDay, thresholdHour, stnIds, modelCode, obsCode, ct):
-        '''
-        make rows for the daily contingency table
-        
-        Parameters:
-        - targetDay (datetime): The date for which the contingency table is being created (KST).
-        - thresholdHour (int): The time interval for which the predictions are made.
-        - stnIds (list): A list of station IDs.
-        - modelCode (str): The code of the model being used.
-        - obsCode (str): The code for the observed data (not used in this function).
-        - ct (dict): The contingency data, containing observed and predicted values for each station and threshold.
-
-        Returns:
-        - list: A list of dictionaries, each representing a row in the contingency table.
-        '''
-                
-        insertDatas = []
-        for mm in cfg.thresholdMms:
-            szMm = format(mm, ".1f")
-            for s in range(thresholdHour, max(cfg.modelConf[modelCode]['modelFcstMaxHours'])+thresholdHour, thresholdHour):
-                for stn in stnIds:
-                    row = {
-                        'd': targetDay.strftime('%Y-%m-%d'),
-                        's': s,
-                        'th_hour': thresholdHour,
-                        'mm': szMm,
-                        'stn': stn,
-                        'h': ct[szMm][stn][str(s)]['h'],
-                        'f': ct[szMm][stn][str(s)]['f'],
-                        'm': ct[szMm][stn][str(s)]['m'],
-                        'z': ct[szMm][stn][str(s)]['z'],
-                        't': ct[szMm][stn][str(s)]['t']
-                    }
-                    insertDatas.append(row)
-        return insertDatas
-
-    def rows_ContingencyDaySum(self, targetDay, thresholdHour, modelCode, obsCode, ctSum):
-        '''
-        make rows for the contingency daily sum table
-        
-        Parameters:
-        - targetDay (datetime): The date for which the summary contingency table is being created (KST).
-        - thresholdHour (int): The time interval for which the predictions are aggregated.
-        - modelCode (str): The code of the model being used.
-        - obsCode (str): The code for the observed data (not used in this function).
-        - ctSum (dict): The summary contingency data, containing aggregated observed and predicted values for each threshold.
-
-        Returns:
-        - list: A list of dictionaries, each representing a row in the summary contingency table.
-        '''
-        insertDatas = []
-        for mm in cfg.thresholdMms:
-            szMm = format(mm, ".1f")
-            for s in range(thresholdHour, max(cfg.modelConf[modelCode]['modelFcstMaxHours'])+thresholdHour, thresholdHour):
-                row = {
-                    'd': targetDay.strftime('%Y-%m-%d'),
-                    'th_hour': thresholdHour,
-                    's': s,
-                    'mm': szMm,
-                    'model': modelCode,
-                    'h': ctSum[szMm][str(s)]['h'],
-                    'f': ctSum[szMm][str(s)]['f'],
-                    'm': ctSum[szMm][str(s)]['m'],
-                    'z': ctSum[szMm][str(s)]['z'],
-                    't': ctSum[szMm][str(s)]['t']
-                }
-                insertDatas.append(row)
-        return insertDatas
-
-    def SaveContingencyDay(self, targetDay, modelCode, obsCode, data):
-        '''
-        Save the contingency data for a specific day.
-
-        Parameters:
-        - targetDay (datetime): The date for which the contingency data is being saved (KST).
-        - modelCode (str): The code of the model being used.
-        - obsCode (str): The code for the observed data.
-        - data (dict or list): The contingency data to be saved in CSV format.
-
-        Returns:
-        - None: The function saves the data to a CSV file without returning any values.
-        '''
-        csvFile = cfg.PATH_CT_DAILY_CSV.format(MODEL=modelCode, OBS=obsCode, YYYY=targetDay.strftime('%Y'), YYYYMMDD=targetDay.strftime('%Y%m%d'))
-        csvFileDir = os.path.dirname(csvFile)
-        
-        if not os.path.isdir(csvFileDir):
-            os.makedirs(csvFileDir)
-        
-        df = pd.DataFrame(data)
-        df.to_csv(csvFile, index=False)
-
-    def SaveContingencyDaySum(self, targetDay, modelCode, obsCode, data):
-        '''
-        Save the summary contingency data for a specific day.
-
-        Parameters:
-        - targetDay (datetime): The date for which the summary contingency data is being saved (KST).
-        - modelCode (str): The code of the model being used.
-        - obsCode (str): The code for the observed data.
-        - data (dict or list): The summary contingency data to be saved in CSV format.
-
-        Returns:
-        - None: The function saves the data to a CSV file without returning any values.
-        '''
-        csvFile = cfg.PATH_CT_DAILYSUM_CSV.format(MODEL=modelCode, OBS=obsCode, YYYY=targetDay.strftime('%Y'), YYYYMMDD=targetDay.strftime('%Y%m%d'))
-        csvFileDir = os.path.dirname(csvFile)
-        
-        if not os.path.isdir(csvFileDir):
-            os.makedirs(csvFileDir)
-        
-        df = pd.DataFrame(data)
-        df.to_csv(csvFile, index=False)
-
-
-
-    def SumContingency(self, thresholdHour, stnIds, modelCode, ct) -> dict:
-        '''
-        Sum the values in the Contingency Table for given stnIds, ththresholdHour
-        
-        Parameters:
-        - thresholdHour(int): Time to determine the prediction interval
-        - stnIds(list): Station Id list
-        - modelCode(str): model code
-        - ct(dict): Contingency table
-
-        Returns:
-        - dict: Sum Contingency Table values for each Threshold precipitation(szMm) and publish time(pubTm)
-        '''
-        maxHour = max(cfg.modelConf[modelCode]['modelFcstMaxHours'])
-        ss = []
-        for s in range(thresholdHour, maxHour+thresholdHour, thresholdHour):
-            ss.append(s)
-
-        ctSum = {}
-        for mm in cfg.thresholdMms:
-            #szMm = round(mm, 1)
-            szMm = format(mm, ".1f")
-            ctSum[szMm] = {}
-            for s in ss :
-                szS = str(s)
-                h = 0
-                f = 0
-                m = 0
-                z = 0
-                for stn in stnIds :
-                    h += ct[szMm][stn][szS]['h']
-                    f += ct[szMm][stn][szS]['f']
-                    m += ct[szMm][stn][szS]['m']
-                    z += ct[szMm][stn][szS]['z']
-                    
-                ctSum[szMm][szS] = {'h': h, 'f': f, 'm': m, 'z': z, 't': h+f+m+z}
-        return ctSum
-    
-   
-    
-    def GetStnIds(self, model, obs, dt) :
-        '''
-        Read station location information from a given file and returns a list of station IDs
-        
-        Parameters:
-        - model(str): model code
-        - obs(str): Observation code (aws, asos)
-        - dt(datetime): datetime for finding a file
-
-        Returns:
-        - list: station IDs
-        '''
-        stnIds = []       
-        xyfile = cfg.PATH_MODEL_STNXY.format(MODEL=model, OBS=obs, YYYY=dt.strftime('%Y'), YYYYMMDD=dt.strftime('%Y%m%d'))
-        if os.path.exists(xyfile) == False :
-            return False
-        f = open(xyfile, 'r')
-        
-        # 첫 줄을 건너뛰어 헤더를 무시 (STNXY 파일 헤더 넣으면서 바뀐 부분)
-        f.readline()
-        
-        while True :
-            line = f.readline()
-            if not line : break
-            row = line.split(',')
-            x = int(row[3])
-            y = int(row[4])
-            if x is None or y is None :
-                continue
-            stnId = int(row[0])
-            stnIds.append(stnId)
-        f.close()
-            
-        return stnIds
-
-
-
-if __name__ == '__main__':
-
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--model', required=True, help='gdps_ne36/gdps_n128/rdps_ne36/ldps/ecmf')
-    parser.add_argument('--obs', required=True, help='asos/aws')
-    parser.add_argument('--targetDate', required=True, help='yyyymmdd')
-
-    args = parser.parse_args()
-
-    dt = datetime.strptime(args.targetDate, '%Y%m%d')
-
-    print("- Calc Contingency : ", args.model, args.obs, args.targetDate)
-
-    calcCt = CalcContingencyDay()
-    
-    stnIds = calcCt.GetStnIds(args.model, args.obs, dt)
-    
-    all_ct_data = []
-    all_ctSum_data = []
-
-    for thresholdHour in cfg.modelConf[args.model]['modelThresholdHours']:
-        print(args.model, args.obs, args.targetDate, 'thresholdHour : ', thresholdHour)
-        obs = calcCt.GetDayObs(dt, thresholdHour, stnIds, args.obs)
-        if obs is None or obs is False:
-            continue
-        model = calcCt.GetDayModel(dt, thresholdHour, stnIds, args.model, args.obs)
-        if model is None or model is False:
-            continue
-
-        ct = calcCt.CalcContingency(dt, thresholdHour, stnIds, args.model, obs, model) 
-        ctSum = calcCt.SumContingency(thresholdHour, stnIds, args.model, ct) 
-
-        # Accumulate data for all thresholdHours
-        all_ct_data.extend(calcCt.rows_ContingencyDay(dt, thresholdHour, stnIds, args.model, args.obs, ct))
-        all_ctSum_data.extend(calcCt.rows_ContingencyDaySum(dt, thresholdHour, args.model, args.obs, ctSum))
-
-    # Save all accumulated data after the loop
-    calcCt.SaveContingencyDay(dt, args.model, args.obs, all_ct_data)
-    calcCt.SaveContingencyDaySum(dt, args.model, args.obs, all_ctSum_data)
+#import json
+from datetime import datetime, timedelta
+import os
+import argparse
+import _config as cfg
+import ct_engine
+import ct_store
+import ct_prefix
+import extract_store
+import file_cache
+import obs_cube
+import obs_reader
+import numpy as np
+
+
+class CalcContingencyDay :
+    def __init__(self, modelCache=None, obsCache=None) -> None:
+        '''
+        Parameters:
+        - modelCache(file_cache.FileCache): optional cache of parsed model extract files (date range mode)
+        - obsCache(file_cache.FileCache): optional cache of observation cubes / text days (date range mode)
+        '''
+        self.modelCache = modelCache
+        self.obsCache = obsCache
+
+    def ReadModelRun(self, modelCode, obsCode, modelDt) :
+        '''
+        Reads the extract of a model run through the model cache if there is one (same return value as extract_store.readExtract)
+        '''
+        if self.modelCache is None :
+            return extract_store.readExtract(modelCode, obsCode, modelDt)
+        txtFile, binFile = extract_store.extractPaths(modelCode, obsCode, modelDt)
+        path = binFile if os.path.exists(binFile) else txtFile
+        return self.modelCache.get(path, lambda : extract_store.readExtract(modelCode, obsCode, modelDt), modelDt)
+
+    def EvictCache(self, targetDay, modelCode) :
+        '''
+        Drops cached model runs and observation days that can not verify on targetDay or later
+        
+        Parameters:
+        - targetDay(datetime): first date (KST) still to be calculated
+        - modelCode(str): model code
+        '''
+        modelFcstMaxHour = max(cfg.modelConf[modelCode]['modelFcstMaxHours'])
+        if self.modelCache is not None :
+            self.modelCache.evict(lambda modelDt : modelDt + timedelta(hours=modelFcstMaxHour) <= targetDay)
+        if self.obsCache is not None :
+            self.obsCache.evict(lambda dt : dt < targetDay)
+
+    def GetDayObs(self, targetDay, thresholdHour, stnIds, obsCode) -> dict:
+        '''
+        Calculates and returns the Observed Accumulative Precipitation for the given date, thresholdHour
+        
+        Parameters:
+        - targetDay(datetime): date (KST)
+        - thresholdHour(int): Time to determine the prediction interval
+        - stnIds(list): Station Id list
+        - obsCode(str): Observation code (aws, asos)
+
+        Returns:
+        - dict: Observed Accumulative precipitation by section for each station
+        '''
+        obsHours = obs_cube.getObsHours(obsCode, targetDay, 1, stnIds, self.obsCache)
+        if obsHours is False :
+            return False
+
+        rn, valid = obsHours
+        sums = obs_reader.sumObsHours(rn, thresholdHour)
+
+        ss = list(range(thresholdHour, 24+thresholdHour, thresholdHour))
+        obs = {}
+        for i, stn in enumerate(stnIds) :
+            obs[stn] = dict(zip(ss, sums[i].tolist()))
+
+        return obs
+    
+    def GetModelRunSteps(self, targetDay, thresholdHour, modelCode) -> dict:
+        '''
+        Finds the model runs and forecast sections (s) that verify on the given date
+        
+        Parameters:
+        - targetDay(datetime): date (KST)
+        - thresholdHour(int): Time to determine the prediction interval
+        - modelCode(str): model code
+
+        Returns:
+        - dict: forecast sections s (list) by model run time string ('%Y-%m-%d %H:%M:%S'), in run order
+        '''
+        targetDayEnd = targetDay + timedelta(days=1)
+        modelFcstMaxHour = max(cfg.modelConf[modelCode]['modelFcstMaxHours'])
+
+        dtStart = targetDay - timedelta(hours=modelFcstMaxHour)
+        dtEnd = targetDay + timedelta(days=1) - timedelta(hours=thresholdHour)
+
+        runSteps = {}
+        dt = dtStart
+        while dt <= dtEnd :
+            for t in cfg.modelConf[modelCode]['t'] : # 모델의 발표 시각마다
+                dt1 = dt + timedelta(hours=t)
+                dt1Str = dt1.strftime("%Y-%m-%d %H:%M:%S")
+                for s in range(thresholdHour, modelFcstMaxHour+thresholdHour, thresholdHour) :
+                    dt2 = dt1 + timedelta(hours=s)
+                    if dt2 <= targetDay or dt2>targetDayEnd :
+                        continue
+                    if dt1Str not in runSteps :
+                        runSteps[dt1Str] = []
+                    runSteps[dt1Str].append(s)
+            dt = dt + timedelta(days=1)
+        return runSteps
+
+    def GetDayModel(self, targetDay, thresholdHour, stnIds, modelCode, obsCode) -> dict:
+        '''
+        Calculates and returns the Model predicted Accumulative Precipitation for the given date, thresholdHour
+        
+        Parameters:
+        - targetDay(datetime): date (KST)
+        - thresholdHour(int): Time to determine the prediction interval
+        - stnIds(list): Station Id list
+        - modelCode(str): model code
+        - obsCode(str): Observation code (aws, asos)
+
+        Returns:
+        - dict: Model Predicted Accumulative Precipitation by section for each station
+        '''
+        modelFcstMaxHour = max(cfg.modelConf[modelCode]['modelFcstMaxHours'])
+
+        runSteps = self.GetModelRunSteps(targetDay, thresholdHour, modelCode)
+        modelDts = list(runSteps)
+        modelSum = {stn : {dt1Str : {s : 0 for s in runSteps[dt1Str]} for dt1Str in modelDts} for stn in stnIds}
+
+        exts = []
+        for modelDtStr in modelDts :
+            modelDt = datetime.strptime(modelDtStr, '%Y-%m-%d %H:%M:%S')
+            ext = self.ReadModelRun(modelCode, obsCode, modelDt)
+            if ext is False :
+                print('GetDayModel - File not found - ' + extract_store.extractPaths(modelCode, obsCode, modelDt)[0])
+                return False
+            exts.append(ext)
+
+        # 각 발표 시각 마다 thresholdHour 단위로 취합
+        for info, fileStns, values in exts :
+            txtFile = info['path']
+            
+            if modelFcstMaxHour > info['fcstMaxHour'] :
+                print('GetDayModel - not enough ft - ' + txtFile)
+                return False
+            if thresholdHour < info['fcstInterval'] :
+                print('GetDayModel - file interval is bigger then thresholdHour - ' + txtFile)
+                return False
+            if thresholdHour % info['fcstInterval'] != 0 :
+                print('GetDayModel - thresholdHour is not multiples of file fcstInterval - ' + txtFile)
+                return False
+
+            model_dt = datetime.strptime(info['ymdh'], '%Y%m%d%H')
+            
+            szModelDt = model_dt.strftime("%Y-%m-%d %H:%M:%S")
+
+            # step 은 thS = ceil(step / thresholdHour) * thresholdHour 구간으로 합산 (구간 인덱스 thS/thresholdHour - 1)
+            steps = np.arange(info['fcstInterval'], modelFcstMaxHour+info['fcstInterval'], info['fcstInterval'])
+            bucketIdx = (steps - 1) // thresholdHour
+            rows = obs_reader.stationRows(fileStns, stnIds)
+            sel = np.nonzero(rows >= 0)[0]
+            sums = extract_store.sumStepBuckets(values[rows[sel]], bucketIdx, int(bucketIdx[-1]) + 1).tolist()
+
+            for i, stnSums in zip(sel.tolist(), sums) :
+                stnModel = modelSum[stnIds[i]][szModelDt]
+                for thS in stnModel :
+                    stnModel[thS] = stnSums[thS // thresholdHour - 1]
+
+        # # 모델값 출력 포맷
+        # maxHour = max(cfg.modelConf[modelCode]['modelFcstMaxHours'])
+        # modelDts.sort()
+        # for dt in modelDts :
+        #     print(dt)
+        #     print("      ", end='')
+        #     for s in range(thresholdHour, maxHour+thresholdHour, thresholdHour) :
+        #         print(format(s, "7d"), end='')
+        #     print("")
+        #     for stn in modelSum :
+        #         print(format(stn, "6d"), end='')
+        #         for s in range(thresholdHour, maxHour+thresholdHour, thresholdHour) :
+        #         #for s in modelSum[stn][dt] :
+        #             if dt in modelSum[stn] and s in modelSum[stn][dt] :
+        #                 print(format(modelSum[stn][dt][s], "7.2f"), end='')
+        #             else :    
+        #                 print("   x.xx", end='')
+        #         print("")
+        #     print("")
+                
+        return modelSum
+
+    def GetDayModelRuns(self, targetDay, stnIds, modelCode, obsCode) -> dict:
+        '''
+        Reads every model run that verifies on the given date once, for all modelThresholdHours
+        
+        Parameters:
+        - targetDay(datetime): date (KST)
+        - stnIds(list): Station Id list
+        - modelCode(str): model code
+        - obsCode(str): Observation code (aws, asos)
+
+        Returns:
+        - dict: by model run time string, (info, cumulative precipitation) tuple or False if the file is missing
+                cumulative precipitation is (len(stnIds) x nStep+1, int64, 0.01mm unit),
+                column k is the sum of the first k steps at native fcstInterval, 0 for stations not in the file
+        '''
+        modelDts = []
+        for thresholdHour in cfg.modelConf[modelCode]['modelThresholdHours'] :
+            for dt1Str in self.GetModelRunSteps(targetDay, thresholdHour, modelCode) :
+                if dt1Str not in modelDts :
+                    modelDts.append(dt1Str)
+
+        runs = {}
+        for modelDtStr in modelDts :
+            ext = self.ReadModelRun(modelCode, obsCode, datetime.strptime(modelDtStr, '%Y-%m-%d %H:%M:%S'))
+            if ext is False :
+                runs[modelDtStr] = False
+                continue
+            info, fileStns, values = ext
+            rows = obs_reader.stationRows(fileStns, stnIds)
+            sel = rows >= 0
+            # 0.01mm 정수로 누적하면 구간 합이 (step 별 합산 후 반올림한 값과) 정확히 같다
+            vals = np.zeros((len(stnIds), info['nStep']), dtype=np.int64)
+            vals[sel] = np.rint(np.nan_to_num(np.asarray(values[rows[sel]], dtype=np.float64)) * 100)
+            cum = np.zeros((len(stnIds), info['nStep']+1), dtype=np.int64)
+            np.cumsum(vals, axis=1, out=cum[:, 1:])
+            runs[modelDtStr] = (info, cum)
+        return runs
+
+    def SectionArrays(self, thresholdHour, runSteps, runs, obsSums, modelFcstMaxHour) :
+        '''
+        Builds the (station x run x lead) observation and model section arrays of a thresholdHour
+        
+        Parameters:
+        - thresholdHour(int): Time to determine the prediction interval
+        - runSteps(dict): forecast sections s by model run time string (GetModelRunSteps)
+        - runs(dict): (info, cumulative precipitation) by model run time string (GetDayModelRuns)
+        - obsSums(numpy.ndarray): Observed Accumulative Precipitation (station x section, obs_reader.sumObsHours)
+        - modelFcstMaxHour(int): max forecast hour of the model
+
+        Returns:
+        - tuple: containing
+                - list: lead (s) of each lead index
+                - numpy.ndarray: observation sections, NaN where not verified
+                - numpy.ndarray: model sections, NaN where not verified
+        '''
+        # 지점 x 발표시각 x 구간(s) 배열, 검증하지 않는 칸은 NaN
+        leads = list(range(thresholdHour, modelFcstMaxHour+thresholdHour, thresholdHour))
+        modelArr = np.full((len(obsSums), len(runSteps), len(leads)), np.nan)
+        obsArr = np.full((len(obsSums), len(runSteps), len(leads)), np.nan)
+        for r, (modelDtStr, steps) in enumerate(runSteps.items()) :
+            info, cum = runs[modelDtStr]
+            iv = info['fcstInterval']
+            modelDt = datetime.strptime(modelDtStr, '%Y-%m-%d %H:%M:%S')
+            # 구간 s 는 (s - thresholdHour, min(s, modelFcstMaxHour)] 의 step 합
+            ends = np.array([min(s, modelFcstMaxHour) // iv for s in steps])
+            starts = np.array([(s - thresholdHour) // iv for s in steps])
+            leadIdx = np.array(steps) // thresholdHour - 1
+            # 관측 구간은 발표시각 + s 의 시(0시는 24시)
+            obsIdx = np.array([((modelDt.hour + s - 1) % 24 + 1) // thresholdHour - 1 for s in steps])
+            modelArr[:, r, leadIdx] = (cum[:, ends] - cum[:, starts]) / 100
+            obsArr[:, r, leadIdx] = obsSums[:, obsIdx]
+        return leads, obsArr, modelArr
+
+    def CalcContingencyDayAll(self, targetDay, stnIds, modelCode, obsCode, parityCheck=False) :
+        '''
+        Calculates the daily contingency rows of every modelThresholdHours in a single pass.
+        Observations and model runs are read once at native resolution and each thresholdHour section
+        is taken from cumulative sums along the forecast step axis.
+        The contingency table is counted by ct_engine on (station x run x lead) arrays,
+        and the continuous error moments (ct_engine.momentCube) are accumulated from the same arrays,
+        leaving out the observation sections with a missing hour.
+        
+        Parameters:
+        - targetDay(datetime): date (KST)
+        - stnIds(list): Station Id list
+        - modelCode(str): model code
+        - obsCode(str): Observation code (aws, asos)
+        - parityCheck(bool): also run CalcContingency and check the cube matches it
+
+        Returns:
+        - tuple: containing
+                - list: column blocks of the daily contingency table (ct_engine.cubeColumns), one per thresholdHour
+                - list: column blocks of the contingency daily sum table (ct_engine.cubeSumColumns)
+                - list: column blocks of the daily moment table (ct_engine.momentColumns)
+                - list: column blocks of the moment daily sum table (ct_engine.momentSumColumns)
+        '''
+        ctRows = []
+        ctSumRows = []
+        momentRows = []
+        momentSumRows = []
+
+        obsHours = obs_cube.getObsHours(obsCode, targetDay, 1, stnIds, self.obsCache)
+        if obsHours is False :
+            return ctRows, ctSumRows, momentRows, momentSumRows
+        rn, valid = obsHours
+
+        modelFcstMaxHour = max(cfg.modelConf[modelCode]['modelFcstMaxHours'])
+        runs = self.GetDayModelRuns(targetDay, stnIds, modelCode, obsCode)
+
+        for thresholdHour in cfg.modelConf[modelCode]['modelThresholdHours'] :
+            print(modelCode, obsCode, targetDay.strftime('%Y%m%d'), 'thresholdHour : ', thresholdHour)
+            runSteps = self.GetModelRunSteps(targetDay, thresholdHour, modelCode)
+
+            isValid = True
+            for modelDtStr in runSteps :
+                run = runs[modelDtStr]
+                if run is False :
+                    print('GetDayModel - File not found - ' + extract_store.extractPaths(modelCode, obsCode, datetime.strptime(modelDtStr, '%Y-%m-%d %H:%M:%S'))[0])
+                    isValid = False
+                    break
+                info = run[0]
+                if modelFcstMaxHour > info['fcstMaxHour'] :
+                    print('GetDayModel - not enough ft - ' + info['path'])
+                    isValid = False
+                    break
+                if thresholdHour < info['fcstInterval'] :
+                    print('GetDayModel - file interval is bigger then thresholdHour - ' + info['path'])
+                    isValid = False
+                    break
+                if thresholdHour % info['fcstInterval'] != 0 :
+                    print('GetDayModel - thresholdHour is not multiples of file fcstInterval - ' + info['path'])
+                    isValid = False
+                    break
+            if isValid == False :
+                continue
+
+            obsSums = obs_reader.sumObsHours(rn, thresholdHour)
+            leads, obsArr, modelArr = self.SectionArrays(thresholdHour, runSteps, runs, obsSums, modelFcstMaxHour)
+
+            cube = ct_engine.contingencyCube(obsArr, modelArr, cfg.thresholdMms)
+
+            if parityCheck :
+                # 관측 / 모델 자료를 GetDayObs, GetDayModel (thresholdHour 마다 step 합산) 로 따로 읽어서 비교
+                obs = self.GetDayObs(targetDay, thresholdHour, stnIds, obsCode)
+                model = self.GetDayModel(targetDay, thresholdHour, stnIds, modelCode, obsCode)
+                ct = self.CalcContingency(targetDay, thresholdHour, stnIds, modelCode, obs, model)
+                if ct_engine.checkParity(cube, leads, stnIds, cfg.thresholdMms, ct) :
+                    print('- ct_engine parity OK : ', modelCode, obsCode, targetDay.strftime('%Y%m%d'), thresholdHour)
+
+            ctRows.append(ct_engine.cubeColumns(thresholdHour, leads, stnIds, cube))
+            ctSumRows.append(ct_engine.cubeSumColumns(thresholdHour, leads, ct_engine.sumCube(cube)))
+
+            # 같은 칸의 연속 검증 충분통계량 (MAE, RMSE, 평균오차, 상관계수)
+            # 결측 시간이 있는 관측 구간은 분할표에서는 기존처럼 0 으로 세고, 연속 검증에서는 NaN 으로 뺀다
+            obsValid = obs_reader.validObsHours(valid, thresholdHour)
+            obsValidArr = self.SectionArrays(thresholdHour, runSteps, runs, obsValid.astype(np.float64), modelFcstMaxHour)[1]
+            moments = ct_engine.momentCube(np.where(obsValidArr == 1, obsArr, np.nan), modelArr)
+            momentRows.append(ct_engine.momentColumns(thresholdHour, leads, stnIds, moments))
+            momentSumRows.append(ct_engine.momentSumColumns(thresholdHour, leads, moments.sum(axis=-1)))
+
+        return ctRows, ctSumRows, momentRows, momentSumRows
+
+    def CalcContingency(self, targetDay, thresholdHour, stnIds, modelCode, obs, model) -> dict:
+        '''
+        Calculates Contingency table with Observed Accumulative Precipitation and Model Predicted Accumulative Precipitation
+        
+        Parameters:
+        - targetDay(datetime): date (KST)
+        - thresholdHour(int): Time to determine the prediction interval
+        - stnIds(list): Station Id list
+        - modelCode(str): model code
+        - obs(dict): Observed Accumulative Precipitation by section for each station
+        - model(dict): Model Predicted Accumulative Precipitation by section for each station
+
+        Returns:
+        - dict: Contingency table
+        '''
+        ymd1 = targetDay.strftime('%Y-%m-%d') + " 00:00:00"
+        ymd2 = (targetDay+timedelta(days=1)).strftime('%Y-%m-%d') + " 00:00:00"
+        
+        modelFcstMaxHour = max(cfg.modelConf[modelCode]['modelFcstMaxHours'])
+
+        dtStart = targetDay - timedelta(hours=modelFcstMaxHour)
+        dtEnd = targetDay + timedelta(days=1) - timedelta(hours=thresholdHour)
+
+        ct = {}
+        for mm in cfg.thresholdMms:
+            szMm = format(mm, ".1f")
+            ct[szMm] = {}
+            for stn in stnIds:
+                stnVals = {}
+                # for s in ss :
+                #     stnVals[str(s)] = {'h':0, 'f':0, 'm':0, 'z':0, 't':0}
+
+                for modelDtStr in model[stn] :
+                    for s in model[stn][modelDtStr] :
+                        
+                        modelV = model[stn][modelDtStr][s]
+
+                        obsDt = datetime.strptime(modelDtStr, '%Y-%m-%d %H:%M:%S') + timedelta(hours=s)
+
+                        obsS = obsDt.hour
+                        if obsS == 0 : obsS = 24
+                        
+                        obsV = obs[stn][obsS]
+
+                        
+                        ft = True if modelV >= mm else False
+                        ob = True if obsV >= mm else False
+
+                        szS = str(s)
+                        if szS not in stnVals :
+                            stnVals[szS] = {'h':0, 'f':0, 'm':0, 'z':0, 't':0}
+                        rstCode = 'z'
+                        if ft is True and ob is True: rstCode = 'h' # hit
+                        elif ft is False and ob is True: rstCode = 'm' # miss
+                        elif ft is True and ob is False: rstCode = 'f' # false alarm
+                        elif ft is False and ob is False: rstCode = 'z' # correct negative, null
+                        
+                        stnVals[szS][rstCode] += 1
+                        stnVals[szS]['t'] += 1
+
+                        
+
+                # print(stn)
+                # print(stnVals)
+                ct[szMm][stn] = stnVals
+        return ct
+    
+
+    def SaveContingencyDay(self, targetDay, modelCode, obsCode, data):
+        '''
+        Save the contingency data for a specific day.
+
+        Parameters:
+        - targetDay (datetime): The date for which the contingency data is being saved (KST).
+        - modelCode (str): The code of the model being used.
+        - obsCode (str): The code for the observed data.
+        - data (list): column blocks of the contingency table (CalcContingencyDayAll)
+
+        Returns:
+        - None: The function saves the data to the ct_store day file without returning any values.
+        '''
+        self.WriteStore('day', targetDay, modelCode, obsCode, data)
+
+    def SaveContingencyDaySum(self, targetDay, modelCode, obsCode, data):
+        '''
+        Save the summary contingency data for a specific day.
+
+        Parameters:
+        - targetDay (datetime): The date for which the summary contingency data is being saved (KST).
+        - modelCode (str): The code of the model being used.
+        - obsCode (str): The code for the observed data.
+        - data (list): column blocks of the contingency daily sum table (CalcContingencyDayAll)
+
+        Returns:
+        - None: The function saves the data to the ct_store daysum file without returning any values.
+        '''
+        self.WriteStore('daysum', targetDay, modelCode, obsCode, data)
+
+    def SaveMomentDay(self, targetDay, modelCode, obsCode, momentData, momentSumData):
+        '''
+        Save the continuous error moments (per station and station sum) for a specific day.
+
+        Parameters:
+        - targetDay (datetime): The date for which the moments are being saved (KST).
+        - modelCode (str): The code of the model being used.
+        - obsCode (str): The code for the observed data.
+        - momentData (list): column blocks of the daily moment table (CalcContingencyDayAll)
+        - momentSumData (list): column blocks of the moment daily sum table (CalcContingencyDayAll)
+
+        Returns:
+        - None: The function saves the data to the ct_store moment / momentsum files without returning any values.
+        '''
+        self.WriteStore('moment', targetDay, modelCode, obsCode, momentData)
+        self.WriteStore('momentsum', targetDay, modelCode, obsCode, momentSumData)
+
+
+    def WriteStore(self, table, targetDay, modelCode, obsCode, data):
+        '''
+        Write the column blocks of a day to ct_store in one bulk write (replaces the day atomically),
+        daily sums also update the ct_prefix cube
+
+        Parameters:
+        - table (str): 'day', 'daysum', 'moment' or 'momentsum'
+        - targetDay (datetime): date (KST)
+        - modelCode (str): model code
+        - obsCode (str): Observation code
+        - data (list): column blocks (dict of column arrays)
+
+        Returns:
+        - None
+        '''
+        columns = {}
+        for name, dtype in ct_store.TABLES[table] :
+            columns[name] = np.concatenate([block[name] for block in data]) if len(data) > 0 else np.zeros(0, dtype=dtype)
+        ct_store.writeDay(table, modelCode, obsCode, targetDay, columns)
+        # 기간 점수용 누적합 큐브도 그 날 이후만 갱신
+        if table == 'daysum' :
+            ct_prefix.updateDay(modelCode, obsCode, targetDay, columns)
+
+    def GetStnIds(self, model, obs, dt) :
+        '''
+        Read station location information from a given file and returns a list of station IDs
+        
+        Parameters:
+        - model(str): model code
+        - obs(str): Observation code (aws, asos)
+        - dt(datetime): datetime for finding a file
+
+        Returns:
+        - list: station IDs
+        '''
+        stnIds = []       
+        xyfile = cfg.PATH_MODEL_STNXY.format(MODEL=model, OBS=obs, YYYY=dt.strftime('%Y'), YYYYMMDD=dt.strftime('%Y%m%d'))
+        if os.path.exists(xyfile) == False :
+            return False
+        f = open(xyfile, 'r')
+        
+        # 첫 줄을 건너뛰어 헤더를 무시 (STNXY 파일 헤더 넣으면서 바뀐 부분)
+        f.readline()
+        
+        while True :
+            line = f.readline()
+            if not line : break
+            row = line.split(',')
+            x = int(row[3])
+            y = int(row[4])
+            if x is None or y is None :
+                continue
+            stnId = int(row[0])
+            stnIds.append(stnId)
+        f.close()
+            
+        return stnIds
+
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', required=True, help='gdps_ne36/gdps_n128/rdps_ne36/ldps/ecmf')
+    parser.add_argument('--obs', required=True, help='asos/aws')
+    parser.add_argument('--targetDate', required=False, help='yyyymmdd')
+    parser.add_argument('--startDate', required=False, help='yyyymmdd, date range mode (with --endDate)')
+    parser.add_argument('--endDate', required=False, help='yyyymmdd, date range mode (with --startDate)')
+    parser.add_argument('--cacheSize', required=False, type=int, default=64, help='max cached model runs / obs days in date range mode')
+    parser.add_argument('--parityCheck', action='store_true', help='check ct_engine against the dict contingency table')
+
+    args = parser.parse_args()
+
+    if args.startDate is not None and args.endDate is not None :
+        startDt = datetime.strptime(args.startDate, '%Y%m%d')
+        endDt = datetime.strptime(args.endDate, '%Y%m%d')
+    elif args.targetDate is not None :
+        startDt = datetime.strptime(args.targetDate, '%Y%m%d')
+        endDt = startDt
+    else :
+        parser.error('--targetDate or --startDate/--endDate is required')
+
+    # 여러 날짜를 처리하면 발표시각 자료가 5~6일 동안 재사용되므로 캐시를 사용
+    if startDt < endDt :
+        calcCt = CalcContingencyDay(file_cache.FileCache('model', args.cacheSize), file_cache.FileCache('obs', args.cacheSize))
+    else :
+        calcCt = CalcContingencyDay()
+
+    dt = startDt
+    while dt <= endDt :
+        print("- Calc Contingency : ", args.model, args.obs, dt.strftime('%Y%m%d'))
+
+        stnIds = calcCt.GetStnIds(args.model, args.obs, dt)
+
+        # 관측, 모델 자료는 한 번만 읽고 모든 thresholdHour 를 계산
+        all_ct_data, all_ctSum_data, all_moment_data, all_momentSum_data = calcCt.CalcContingencyDayAll(dt, stnIds, args.model, args.obs, args.parityCheck)
+
+        # Save all accumulated data after the loop
+        calcCt.SaveContingencyDay(dt, args.model, args.obs, all_ct_data)
+        calcCt.SaveContingencyDaySum(dt, args.model, args.obs, all_ctSum_data)
+        calcCt.SaveMomentDay(dt, args.model, args.obs, all_moment_data, all_momentSum_data)
+
+        dt = dt + timedelta(days=1)
+        calcCt.EvictCache(dt, args.model)
+
+    if calcCt.modelCache is not None :
+        calcCt.modelCache.report()
+        calcCt.obsCache.report()
@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+import time
+import argparse
+import _config as cfg
+import file_cache
+from calc_ct_day import CalcContingencyDay
+from calc_ct_day_shrtfcst import CalcContingencyDayShrtFcst
+
+# 작업 프로세스마다 (계산 종류, 모델, 관측) 별 계산 객체(캐시 포함)와 지점 목록을 유지
+_workerState = {}
+
+
+def MakeUnits(calcCodes, modelCodes, obsCodes, startDt, endDt, workers) -> list:
+    '''
+    Splits the work into units of consecutive dates for each calculator, model and observation code.
+    A (calculator, model, observation) chain is one unit, or is split into contiguous date ranges
+    when there are fewer chains than workers, so each worker keeps its model run / obs cache warm over its own range.
+
+    Parameters:
+    - calcCodes(list): calculators (day, shrt)
+    - modelCodes(list): model codes
+    - obsCodes(list): Observation codes (aws, asos)
+    - startDt(datetime): first date
+    - endDt(datetime): last date
+    - workers(int): number of worker processes
+
+    Returns:
+    - list: (calcCode, modelCode, obsCode, unit start date, unit end date) tuples
+    '''
+    chains = []
+    for calcCode in calcCodes :
+        for modelCode in modelCodes :
+            # 단기예보기준 검증은 72h 이상 예측 모델만 가능
+            if calcCode == 'shrt' and max(cfg.modelConf[modelCode]['modelFcstMaxHours']) < min(CalcContingencyDayShrtFcst.maxFcstHours) :
+                print('[WARN] shrt is not available for', modelCode)
+                continue
+            for obsCode in obsCodes :
+                chains.append((calcCode, modelCode, obsCode))
+    if len(chains) == 0 :
+        return []
+
+    # 계열마다 연속 기간 nSplit 개 (발표시각 자료는 앞뒤 날짜가 공유하므로 기간을 섞지 않음)
+    nDays = (endDt - startDt).days + 1
+    nSplit = max(1, min(nDays, -(-workers // len(chains))))
+    units = []
+    for calcCode, modelCode, obsCode in chains :
+        for k in range(nSplit) :
+            unitStart = startDt + timedelta(days=k * nDays // nSplit)
+            unitEnd = startDt + timedelta(days=(k + 1) * nDays // nSplit - 1)
+            units.append((calcCode, modelCode, obsCode, unitStart, unitEnd))
+    return units
+
+
+def RunUnit(calcCode, modelCode, obsCode, startDt, endDt, cacheSize) :
+    '''
+    Calculates the contingency tables of a unit in a worker process
+
+    Parameters:
+    - calcCode(str): calculator (day, shrt)
+    - modelCode(str): model code
+    - obsCode(str): Observation code (aws, asos)
+    - startDt(datetime): first date of the unit
+    - endDt(datetime): last date of the unit
+    - cacheSize(int): max cached model runs / obs days
+
+    Returns:
+    - tuple: (number of calculated dates, elapsed seconds)
+    '''
+    t0 = time.time()
+    key = (calcCode, modelCode, obsCode)
+    if key not in _workerState :
+        modelCache = file_cache.FileCache(modelCode, cacheSize)
+        obsCache = file_cache.FileCache(obsCode, cacheSize)
+        if calcCode == 'day' :
+            calcCt = CalcContingencyDay(modelCache, obsCache)
+        else :
+            calcCt = CalcContingencyDayShrtFcst(modelCache, obsCache)
+        _workerState[key] = {'calc': calcCt, 'stnIds': calcCt.GetStnIds(modelCode, obsCode, startDt)}
+    calcCt = _workerState[key]['calc']
+    stnIds = _workerState[key]['stnIds']
+    if stnIds is False :
+        print('[ERROR] station list not found :', modelCode, obsCode)
+        return 0, time.time() - t0
+
+    cnt = 0
+    dt = startDt
+    while dt <= endDt :
+        if calcCode == 'day' :
+            ctRows, ctSumRows, momentRows, momentSumRows = calcCt.CalcContingencyDayAll(dt, stnIds, modelCode, obsCode)
+            calcCt.SaveContingencyDay(dt, modelCode, obsCode, ctRows)
+            calcCt.SaveContingencyDaySum(dt, modelCode, obsCode, ctSumRows)
+            calcCt.SaveMomentDay(dt, modelCode, obsCode, momentRows, momentSumRows)
+        else :
+            calcCt.CalcContingencyDayAll(dt, stnIds, modelCode, obsCode)
+        cnt += 1
+        dt = dt + timedelta(days=1)
+        if calcCode == 'day' :
+            calcCt.EvictCache(dt, modelCode)
+        else :
+            calcCt.EvictCache(dt)
+
+    return cnt, time.time() - t0
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', required=True, help='comma seperated model codes. eg. gdps_ne36,klfs_ne36')
+    parser.add_argument('--obs', required=True, help='comma seperated obs codes. eg. asos,aws')
+    parser.add_argument('--startDate', required=True, help='yyyymmdd')
+    parser.add_argument('--endDate', required=True, help='yyyymmdd')
+    parser.add_argument('--calc', required=False, default='day', help='comma seperated calculators. day (calc_ct_day), shrt (calc_ct_day_shrtfcst)')
+    parser.add_argument('--workers', required=False, type=int, default=os.cpu_count(), help='number of worker processes (default: cpu count)')
+    parser.add_argument('--cacheSize', required=False, type=int, default=64, help='max cached model runs / obs days per worker')
+
+    args = parser.parse_args()
+
+    startDt = datetime.strptime(args.startDate, '%Y%m%d')
+    endDt = datetime.strptime(args.endDate, '%Y%m%d')
+
+    units = MakeUnits(args.calc.split(','), args.model.split(','), args.obs.split(','), startDt, endDt, args.workers)
+    print("- Calc Contingency Run : units", len(units), "workers", args.workers)
+
+    t0 = time.time()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor :
+        futures = {executor.submit(RunUnit, *unit, args.cacheSize) : unit for unit in units}
+        for future in as_completed(futures) :
+            calcCode, modelCode, obsCode, unitStart, unitEnd = futures[future]
+            unitName = f"{calcCode} {modelCode} {obsCode} {unitStart.strftime('%Y%m%d')}-{unitEnd.strftime('%Y%m%d')}"
+            try :
+                cnt, elapsed = future.result()
+                print(f"- done : {unitName} days {cnt} ({elapsed:.1f}s)")
+            except Exception as e :
+                print(f"[ERROR] {unitName} : {e}")
+
+    print(f"- Calc Contingency Run : finished ({time.time()-t0:.1f}s)")
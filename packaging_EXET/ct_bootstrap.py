@@ -0,0 +1,293 @@
+from datetime import datetime, timedelta
+import os
+import argparse
+import numpy as np
+
+import _config as cfg
+import ct_store
+import ct_prefix
+import save_local_format
+
+# 일 분할표 블록 부트스트랩 신뢰구간
+#  - 기간의 일별 분할표 daily[일, code, thresholdHour, thresholdMm, lead] (ct_store daysum, ct_prefix 와 같은 축)
+#  - 반복마다 blockDays 일 연속 블록을 복원 추출해서 기간 길이만큼 이어붙임 (강수의 일 간 상관 유지)
+#  - 반복 x 일 인덱스 행렬을 반복 x 일 가중치(뽑힌 횟수)로 바꿔 배치마다 행렬곱 한 번으로 반복별 분할표 합계
+#  - 대응(paired) 모드 : 두 모델의 공통 일자에 같은 인덱스를 적용해서 점수 차이의 구간
+SC_NAMES = ['ACCURACY', 'BIAS', 'CSI', 'ETS', 'POD', 'FAR', 'POFD']
+UNDEFINED = -9.99
+
+
+def dailyCt(modelCode, obsCode, startDt, endDt) :
+    '''
+    Reads the daily contingency sums of a date range (one scan of ct_store)
+
+    Returns:
+    - tuple: containing
+            - numpy.ndarray: daily (day x code x thresholdHour x thresholdMm x lead, int64), code order ct_prefix.PREFIX_CODES
+            - list: dates (datetime) of the day axis
+    '''
+    nDay = (endDt - startDt).days + 1
+    cols = ct_store.readRange('daysum', modelCode, obsCode, startDt, endDt, ['date', 's', 'th_hour', 'mm', 'h', 'f', 'm', 'z'])
+    ymds, inv = np.unique(cols['date'], return_inverse=True)
+    dayIdx = np.array([(datetime.strptime(str(v), '%Y%m%d') - startDt).days for v in ymds.tolist()], dtype=np.int64)[inv]
+    daily = ct_prefix.groupColumns(modelCode, cols, dayIdx, nDay)
+    return daily, [startDt + timedelta(days=i) for i in range(nDay)]
+
+
+def blockIndex(rng, nRep, nDay, blockDays) :
+    '''
+    Moving block bootstrap day indices
+
+    Returns:
+    - numpy.ndarray: (replicates x days) day index
+    '''
+    blockDays = max(1, min(blockDays, nDay))
+    nBlock = -(-nDay // blockDays)
+    starts = rng.integers(0, nDay - blockDays + 1, size=(nRep, nBlock))
+    idx = (starts[:, :, np.newaxis] + np.arange(blockDays)).reshape(nRep, nBlock * blockDays)
+    return idx[:, :nDay]
+
+
+def replicateCt(daily, idx, batch=200) :
+    '''
+    Sums the daily contingency of every replicate (one matmul per replicate batch)
+
+    Parameters:
+    - daily(numpy.ndarray): (day x ...) daily contingency
+    - idx(numpy.ndarray): (replicates x days) day index from blockIndex
+    - batch(int): replicates per matmul
+
+    Returns:
+    - numpy.ndarray: (replicates x ...) int64
+    '''
+    nRep, nDay = idx.shape
+    flatDaily = daily.reshape(daily.shape[0], -1).astype(np.float64)
+    rst = np.empty((nRep, flatDaily.shape[1]), dtype=np.int64)
+    for b0 in range(0, nRep, batch) :
+        sub = idx[b0:b0+batch]
+        rows = np.repeat(np.arange(len(sub)), nDay)
+        weights = np.bincount(rows * daily.shape[0] + sub.ravel(), minlength=len(sub) * daily.shape[0]).reshape(len(sub), daily.shape[0])
+        rst[b0:b0+batch] = np.rint(weights.astype(np.float64) @ flatDaily).astype(np.int64)
+    return rst.reshape((nRep,) + daily.shape[1:])
+
+
+def leadScores(modelCode, ct, thHours, maxFcstHour, axes=None) :
+    '''
+    Scores of every lead and of all leads up to maxFcstHour (lead 0)
+
+    Parameters:
+    - modelCode(str): model code
+    - ct(numpy.ndarray): (... x code x thresholdHour x thresholdMm x lead) contingency
+    - thHours(list): thresholdHours
+    - maxFcstHour(int): max forecasting hour
+    - axes(tuple): (thresholdHours, number of leads) of ct, ct_prefix.cubeAxes(modelCode) if None
+
+    Returns:
+    - dict: thHour -> score name -> array (... x thresholdMm x 1 + lead), NaN where undefined
+    '''
+    cubeThHours, nLead = ct_prefix.cubeAxes(modelCode) if axes is None else axes
+    rst = {}
+    for thHour in thHours :
+        i = cubeThHours.index(thHour)
+        nUse = min(maxFcstHour // thHour, nLead)
+        sub = ct[..., i, :, :nUse]
+        sub = np.concatenate([sub.sum(axis=-1, keepdims=True), sub], axis=-1)
+        h, f, m, z = [sub[..., ct_prefix.PREFIX_CODES.index(code), :, :] for code in ['h', 'f', 'm', 'z']]
+        scores = save_local_format.CalcScoreArrays(h, f, m, z, h + f + m + z)
+        rst[thHour] = {scName : np.where(scores[scName] == UNDEFINED, np.nan, scores[scName]) for scName in SC_NAMES}
+    return rst
+
+
+def intervals(samples, alpha) :
+    '''
+    Percentile interval over the replicate axis (UNDEFINED if every replicate is undefined)
+
+    Returns:
+    - tuple: (low, high) arrays
+    '''
+    valid = np.any(~np.isnan(samples), axis=0)
+    # 모든 반복이 정의되지 않는 칸은 0 으로 채워서 계산 후 UNDEFINED 로 바꿈
+    samples = np.where(valid, samples, 0.)
+    lo, hi = np.nanpercentile(samples, [100 * alpha / 2, 100 * (1 - alpha / 2)], axis=0)
+    return np.where(valid, lo, UNDEFINED), np.where(valid, hi, UNDEFINED)
+
+
+def toKeyed(thHour, maxFcstHour, arr) :
+    '''
+    Converts a (thresholdMm x 1 + lead) array to {thMm: {s: value}} with the CalcScores keys of s (0 : all leads)
+    '''
+    rst = {}
+    for j, thMm in enumerate(cfg.thresholdMms) :
+        vals = {}
+        for s in range(thHour, maxFcstHour+1, thHour) :
+            vals[s] = float(arr[j, s // thHour]) if s // thHour < arr.shape[1] else UNDEFINED
+        vals[0] = float(arr[j, 0])
+        rst[thMm] = vals
+    return rst
+
+
+def ScoreIntervals(modelCode, obsCode, startDt, endDt, thHours, maxFcstHours, nRep=1000, blockDays=7, alpha=0.05, seed=0) :
+    '''
+    Block bootstrap percentile intervals of the scores of every (thresholdHour, thresholdMm, maxFcstHour)
+
+    Parameters:
+    - modelCode(str): model code
+    - obsCode(str): Observation code (aws, asos)
+    - startDt (datetime): start datetime
+    - endDt (datetime): end datetime
+    - thHours (list): thresholdHours
+    - maxFcstHours (list): max forecasting hours
+    - nRep (int): replicates
+    - blockDays (int): block length (days)
+    - alpha (float): 1 - confidence level
+    - seed (int): random seed
+
+    Returns:
+    - dict: (thHour, thMm, maxFcstHour) -> s -> score name -> (low, high)
+    '''
+    daily, dates = dailyCt(modelCode, obsCode, startDt, endDt)
+    # 자료가 있는 날만 추출 대상
+    daily = daily[daily[:, ct_prefix.PREFIX_CODES.index('n')].reshape(len(daily), -1).any(axis=1)]
+    if len(daily) == 0 :
+        return {}
+    idx = blockIndex(np.random.default_rng(seed), nRep, len(daily), blockDays)
+    reps = replicateCt(daily, idx)
+
+    rst = {}
+    for maxFcstHour in maxFcstHours :
+        scores = leadScores(modelCode, reps, thHours, maxFcstHour)
+        for thHour in thHours :
+            bounds = {scName : intervals(scores[thHour][scName], alpha) for scName in SC_NAMES}
+            keyed = {scName : (toKeyed(thHour, maxFcstHour, bounds[scName][0]), toKeyed(thHour, maxFcstHour, bounds[scName][1])) for scName in SC_NAMES}
+            for thMm in cfg.thresholdMms :
+                rst[(thHour, thMm, maxFcstHour)] = {s : {scName : (keyed[scName][0][thMm][s], keyed[scName][1][thMm][s]) for scName in SC_NAMES}
+                                                     for s in keyed[SC_NAMES[0]][0][thMm]}
+    return rst
+
+
+def PairedIntervals(modelA, modelB, obsCode, startDt, endDt, thHours, maxFcstHours, nRep=1000, blockDays=7, alpha=0.05, seed=0) :
+    '''
+    Paired block bootstrap of the score difference (modelA - modelB) on the days both models have,
+    over the thresholdHours both models have and the leads of the shorter one
+
+    Returns:
+    - dict: (thHour, thMm, maxFcstHour) -> s -> score name -> (difference, low, high, fraction of replicates with difference > 0)
+    '''
+    # 두 모델 큐브의 공통 thresholdHour, 짧은 쪽 lead 수 만큼만 비교 (lead 인덱스는 s // thresholdHour - 1 로 같다)
+    thHoursA, nLeadA = ct_prefix.cubeAxes(modelA)
+    thHoursB, nLeadB = ct_prefix.cubeAxes(modelB)
+    shared = [thHour for thHour in thHoursA if thHour in thHoursB]
+    if len(shared) == 0 :
+        print('[ERROR] paired bootstrap needs a shared thresholdHour : ', modelA, thHoursA, modelB, thHoursB)
+        return {}
+    for thHour in thHours :
+        if thHour not in shared :
+            print('[WARN] paired bootstrap skips thresholdHour', thHour, '- not in both', modelA, modelB)
+    thHours = [thHour for thHour in thHours if thHour in shared]
+    axes = (shared, min(nLeadA, nLeadB))
+
+    dailyA, dates = dailyCt(modelA, obsCode, startDt, endDt)
+    dailyB, dates = dailyCt(modelB, obsCode, startDt, endDt)
+    dailyA = dailyA[:, :, [thHoursA.index(thHour) for thHour in shared], :, :axes[1]]
+    dailyB = dailyB[:, :, [thHoursB.index(thHour) for thHour in shared], :, :axes[1]]
+    nCode = ct_prefix.PREFIX_CODES.index('n')
+    common = dailyA[:, nCode].reshape(len(dailyA), -1).any(axis=1) & dailyB[:, nCode].reshape(len(dailyB), -1).any(axis=1)
+    dailyA = dailyA[common]
+    dailyB = dailyB[common]
+    if len(dailyA) == 0 :
+        return {}
+    idx = blockIndex(np.random.default_rng(seed), nRep, len(dailyA), blockDays)
+    repsA = replicateCt(dailyA, idx)
+    repsB = replicateCt(dailyB, idx)
+
+    rst = {}
+    for maxFcstHour in maxFcstHours :
+        pointA = leadScores(modelA, dailyA.sum(axis=0), thHours, maxFcstHour, axes)
+        pointB = leadScores(modelB, dailyB.sum(axis=0), thHours, maxFcstHour, axes)
+        scoresA = leadScores(modelA, repsA, thHours, maxFcstHour, axes)
+        scoresB = leadScores(modelB, repsB, thHours, maxFcstHour, axes)
+        for thHour in thHours :
+            vals = {}
+            for scName in SC_NAMES :
+                diff = scoresA[thHour][scName] - scoresB[thHour][scName]
+                lo, hi = intervals(diff, alpha)
+                point = pointA[thHour][scName] - pointB[thHour][scName]
+                point = np.where(np.isnan(point), UNDEFINED, point)
+                nValid = np.maximum(np.count_nonzero(~np.isnan(diff), axis=0), 1)
+                frac = np.count_nonzero(diff > 0, axis=0) / nValid
+                vals[scName] = [toKeyed(thHour, maxFcstHour, v) for v in (point, lo, hi, frac)]
+            for thMm in cfg.thresholdMms :
+                rst[(thHour, thMm, maxFcstHour)] = {s : {scName : tuple(v[thMm][s] for v in vals[scName]) for scName in SC_NAMES}
+                                                     for s in vals[SC_NAMES[0]][0][thMm]}
+    return rst
+
+
+def SavePaired(modelA, modelB, obsCode, startDt, endDt, thHour, thMm, maxFcstHour, paired, nRep, blockDays, alpha) :
+    '''
+    Save the paired score differences of a (thresholdHour, thresholdMm, maxFcstHour) next to the pretty reports of modelA
+    '''
+    dirpath = cfg.PATH_PRETTY_FORMAT_DIR.format(MODEL=modelA, YYYYMM=startDt.strftime('%Y%m'))
+    os.makedirs(dirpath, exist_ok=True)
+    labels = {'ACCURACY': 'Accuracy    ', 'BIAS': 'Bias Score  ', 'POD': 'P.O.D.      ', 'FAR': 'F.A.R.      ',
+              'POFD': 'P.O.F.D.    ', 'CSI': 'T.S. (CSI)  ', 'ETS': 'E.T.S. (GSS)'}
+    ss = list(paired.keys())
+
+    cont = " \n"
+    cont += " ------------------------------------------------------\n"
+    cont += f" {modelA} - {modelB}  from {startDt.strftime('%Y%m%d')} to {endDt.strftime('%Y%m%d')}\n"
+    cont += f" paired block bootstrap : {nRep} replicates, {blockDays}-day blocks, {100*(1-alpha):.0f}% interval\n"
+    cont += " ------------------------------------------------------\n"
+    cont += f"  Valid Forecast time is  {format(maxFcstHour, '5d')} hr\n"
+    cont += f"  Threshold time  is  {format(thHour, '9d')} hr\n"
+    cont += f"  Threshold Value is    {format(thMm, '7.1f')} mm\n"
+    cont += " \n"
+    cont += "              " + ''.join(format(s, "7d") + "H" for s in ss) + "\n"
+    for scName in ['ACCURACY', 'BIAS', 'POD', 'FAR', 'POFD', 'CSI', 'ETS'] :
+        for k, tag in enumerate(['diff', 'low ', 'high', 'P>0 ']) :
+            cont += "  " + (labels[scName] if k == 0 else ' ' * 12) + ' ' + tag + ''.join(format(paired[s][scName][k], "8.2f") for s in ss) + "\n"
+    cont += " ------------------------------------------------------\n"
+
+    fn = dirpath + '/' + modelA + '_vs_' + modelB + '_vrfy_obsv_' + format(thMm, ".1f") + 'mm_' + str(thHour).zfill(2) + 'hr_' + str(maxFcstHour) + 'ft' + '_' + startDt.strftime('%Y%m%d') + '_' + endDt.strftime('%Y%m%d') + '_' + obsCode + '.txt'
+    with open(fn, 'w') as f :
+        f.write(cont)
+
+
+if __name__ == '__main__' :
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', required=True, help='model code, or two comma separated model codes for the paired mode. eg. gdps_ne36,ecmf')
+    parser.add_argument('--obs', required=True, help='asos/aws')
+    parser.add_argument('--startDate', required=True, help='yyyymmdd')
+    parser.add_argument('--endDate', required=True, help='yyyymmdd')
+    parser.add_argument('--replicates', required=False, type=int, default=1000, help='bootstrap replicates (default 1000)')
+    parser.add_argument('--blockDays', required=False, type=int, default=7, help='bootstrap block length in days (default 7)')
+    parser.add_argument('--alpha', required=False, type=float, default=0.05, help='1 - confidence level (default 0.05)')
+    parser.add_argument('--seed', required=False, type=int, default=0, help='random seed')
+
+    args = parser.parse_args()
+
+    startDt = datetime.strptime(args.startDate, '%Y%m%d')
+    endDt = datetime.strptime(args.endDate, '%Y%m%d')
+    models = args.model.split(',')
+    thHours = cfg.modelConf[models[0]]['modelThresholdHours']
+    maxFcstHours = cfg.modelConf[models[0]]['modelFcstMaxHours']
+
+    if len(models) == 2 :
+        # 두 모델 모두 있는 thresholdHour, 짧은 모델의 최대 예보시간까지
+        thHours = [thHour for thHour in thHours if thHour in cfg.modelConf[models[1]]['modelThresholdHours']]
+        maxFcstHours = sorted(set(min(h, max(cfg.modelConf[models[1]]['modelFcstMaxHours'])) for h in maxFcstHours))
+        print("Paired bootstrap : ", models[0], models[1], args.obs, args.startDate, args.endDate)
+        paired = PairedIntervals(models[0], models[1], args.obs, startDt, endDt, thHours, maxFcstHours, args.replicates, args.blockDays, args.alpha, args.seed)
+        for (thHour, thMm, maxFcstHour), vals in paired.items() :
+            SavePaired(models[0], models[1], args.obs, startDt, endDt, thHour, thMm, maxFcstHour, vals, args.replicates, args.blockDays, args.alpha)
+    else :
+        print("Bootstrap intervals : ", models[0], args.obs, args.startDate, args.endDate)
+        allScores = save_local_format.CalcScoresAll(models[0], args.obs, startDt, endDt, thHours, cfg.thresholdMms, maxFcstHours, None)
+        cis = ScoreIntervals(models[0], args.obs, startDt, endDt, thHours, maxFcstHours, args.replicates, args.blockDays, args.alpha, args.seed)
+        moments = save_local_format.CalcMomentScores(models[0], args.obs, startDt, endDt, thHours, maxFcstHours)
+        for key, scores in allScores.items() :
+            if (key[0], key[2]) in moments :
+                scores['cont'] = moments[(key[0], key[2])]
+            scores['ci'] = cis.get(key, {})
+            scores['ciInfo'] = (args.replicates, args.blockDays, args.alpha)
+            save_local_format.SaveScores(models[0], args.obs, startDt, endDt, key[0], key[1], key[2], scores, None)
@@ -0,0 +1,258 @@
+import numpy as np
+
+# 분할표 큐브 : cube[code, threshold, lead, station] (int32), code 순서는 CT_CODES
+# lead 는 일별 검증에서 예측 구간 s, 단기예보 검증에서 예보관 발표시각 pubTm
+CT_CODES = ['h', 'f', 'm', 'z']
+# 연속 검증 충분통계량 : moments[code, lead, station] (float64), code 순서는 MOMENT_CODES
+# 개수, 합 f, 합 o, 합 f^2, 합 o^2, 합 fo, 합 |f-o| (f : 모델, o : 관측), 기간은 더하기만 하면 됨
+MOMENT_CODES = ['n', 'sf', 'so', 'sff', 'soo', 'sfo', 'sae']
+
+
+def contingencyCube(obsArr, modelArr, thresholdMms) :
+    '''
+    Counts hit / false alarm / miss / correct negative of every threshold at once
+
+    Parameters:
+    - obsArr(numpy.ndarray): Observed Accumulative Precipitation (station x run x lead)
+    - modelArr(numpy.ndarray): Model Predicted Accumulative Precipitation (station x run x lead),
+                               NaN where the (run, lead) cell is not verified
+    - thresholdMms(list): threshold precipitation list
+
+    Returns:
+    - numpy.ndarray: contingency cube (len(CT_CODES) x threshold x lead x station, int32)
+    '''
+    cell = ~np.isnan(modelArr)
+    mms = np.asarray(thresholdMms, dtype=np.float64).reshape(-1, 1, 1, 1)
+
+    # NaN 비교는 False 이므로 검증하지 않는 칸은 예측/관측 모두 False
+    ft = modelArr[np.newaxis] >= mms
+    ob = (obsArr[np.newaxis] >= mms) & cell[np.newaxis]
+
+    h = np.count_nonzero(ft & ob, axis=2)
+    f = np.count_nonzero(ft, axis=2) - h
+    m = np.count_nonzero(ob, axis=2) - h
+    z = np.count_nonzero(cell, axis=1)[np.newaxis] - h - f - m
+
+    # (code, threshold, station, lead) -> (code, threshold, lead, station)
+    return np.stack([h, f, m, z]).transpose(0, 1, 3, 2).astype(np.int32)
+
+
+def sumCube(cube) :
+    '''
+    Sums the contingency cube over stations
+
+    Parameters:
+    - cube(numpy.ndarray): contingency cube (code x threshold x lead x station)
+
+    Returns:
+    - numpy.ndarray: summed contingency (code x threshold x lead, int64)
+    '''
+    return cube.sum(axis=-1, dtype=np.int64)
+
+
+def momentCube(obsArr, modelArr) :
+    '''
+    Accumulates the continuous error sufficient statistics of the cells the contingency cube counts
+
+    Parameters:
+    - obsArr(numpy.ndarray): Observed Accumulative Precipitation (station x run x lead)
+    - modelArr(numpy.ndarray): Model Predicted Accumulative Precipitation (station x run x lead),
+                               NaN where the (run, lead) cell is not verified
+
+    Returns:
+    - numpy.ndarray: moments (len(MOMENT_CODES) x lead x station, float64)
+    '''
+    cell = ~np.isnan(modelArr) & ~np.isnan(obsArr)
+    f = np.where(cell, modelArr, 0.)
+    o = np.where(cell, obsArr, 0.)
+    moments = np.stack([cell.sum(axis=1), f.sum(axis=1), o.sum(axis=1), (f * f).sum(axis=1), (o * o).sum(axis=1), (f * o).sum(axis=1), np.abs(f - o).sum(axis=1)])
+    # (code, station, lead) -> (code, lead, station)
+    return moments.transpose(0, 2, 1).astype(np.float64)
+
+
+def cubeRows(targetDay, thresholdHour, leads, stnIds, thresholdMms, cube) :
+    '''
+    Makes the daily contingency rows (threshold, lead, station order) from a contingency cube
+
+    Parameters:
+    - targetDay(datetime): date (KST)
+    - thresholdHour(int): Time to determine the prediction interval
+    - leads(list): lead (s) of each cube lead index
+    - stnIds(list): Station Id list
+    - thresholdMms(list): threshold precipitation list
+    - cube(numpy.ndarray): contingency cube (code x threshold x lead x station)
+
+    Returns:
+    - list: A list of dictionaries, each representing a row in the contingency table.
+    '''
+    d = targetDay.strftime('%Y-%m-%d')
+    h, f, m, z = [cube[i].ravel().tolist() for i in range(len(CT_CODES))]
+    keys = [(s, format(mm, ".1f"), stn) for mm in thresholdMms for s in leads for stn in stnIds]
+    return [{'d': d, 's': s, 'th_hour': thresholdHour, 'mm': szMm, 'stn': stn, 'h': h[i], 'f': f[i], 'm': m[i], 'z': z[i], 't': h[i]+f[i]+m[i]+z[i]}
+            for i, (s, szMm, stn) in enumerate(keys)]
+
+
+def cubeSumRows(targetDay, thresholdHour, leads, modelCode, thresholdMms, ctSum) :
+    '''
+    Makes the contingency daily sum rows (threshold, lead order) from a summed contingency cube
+
+    Parameters:
+    - targetDay(datetime): date (KST)
+    - thresholdHour(int): Time to determine the prediction interval
+    - leads(list): lead (s) of each cube lead index
+    - modelCode(str): model code
+    - thresholdMms(list): threshold precipitation list
+    - ctSum(numpy.ndarray): summed contingency (code x threshold x lead)
+
+    Returns:
+    - list: A list of dictionaries, each representing a row in the summary contingency table.
+    '''
+    d = targetDay.strftime('%Y-%m-%d')
+    h, f, m, z = [ctSum[i].ravel().tolist() for i in range(len(CT_CODES))]
+    keys = [(s, format(mm, ".1f")) for mm in thresholdMms for s in leads]
+    return [{'d': d, 'th_hour': thresholdHour, 's': s, 'mm': szMm, 'model': modelCode, 'h': h[i], 'f': f[i], 'm': m[i], 'z': z[i], 't': h[i]+f[i]+m[i]+z[i]}
+            for i, (s, szMm) in enumerate(keys)]
+
+
+def momentRows(targetDay, thresholdHour, leads, stnIds, moments) :
+    '''
+    Makes the daily moment rows (lead, station order) from a moment cube
+
+    Returns:
+    - list: A list of dictionaries (d, th_hour, s, stn, n, sf, so, sff, soo, sfo, sae)
+    '''
+    d = targetDay.strftime('%Y-%m-%d')
+    vals = [moments[i].ravel().tolist() for i in range(len(MOMENT_CODES))]
+    keys = [(s, stn) for s in leads for stn in stnIds]
+    return [dict({'d': d, 'th_hour': thresholdHour, 's': s, 'stn': stn}, **{code: vals[j][i] for j, code in enumerate(MOMENT_CODES)})
+            for i, (s, stn) in enumerate(keys)]
+
+
+def momentSumRows(targetDay, thresholdHour, leads, modelCode, momentSum) :
+    '''
+    Makes the moment daily sum rows (lead order) from a summed moment cube (code x lead)
+
+    Returns:
+    - list: A list of dictionaries (d, th_hour, s, model, n, sf, so, sff, soo, sfo, sae)
+    '''
+    d = targetDay.strftime('%Y-%m-%d')
+    vals = [momentSum[i].tolist() for i in range(len(MOMENT_CODES))]
+    return [dict({'d': d, 'th_hour': thresholdHour, 's': s, 'model': modelCode}, **{code: vals[j][i] for j, code in enumerate(MOMENT_CODES)})
+            for i, s in enumerate(leads)]
+
+
+def cubeColumns(thresholdHour, leads, stnIds, cube) :
+    '''
+    Makes the daily contingency columns (threshold, lead, station order, same as cubeRows) for ct_store
+
+    Returns:
+    - dict: column -> array (s, th_hour, mm (threshold index), stn, h, f, m, z, t)
+    '''
+    nMm, nLead, nStn = cube.shape[1:]
+    cols = {
+        's': np.tile(np.repeat(np.asarray(leads), nStn), nMm),
+        'th_hour': np.full(nMm * nLead * nStn, thresholdHour),
+        'mm': np.repeat(np.arange(nMm), nLead * nStn),
+        'stn': np.tile(np.asarray(stnIds, dtype=np.int64), nMm * nLead)
+    }
+    for i, code in enumerate(CT_CODES) :
+        cols[code] = cube[i].ravel()
+    cols['t'] = cube.sum(axis=0).ravel()
+    return cols
+
+
+def cubeSumColumns(thresholdHour, leads, ctSum) :
+    '''
+    Makes the contingency daily sum columns (threshold, lead order, same as cubeSumRows) for ct_store
+
+    Returns:
+    - dict: column -> array (s, th_hour, mm (threshold index), h, f, m, z, t)
+    '''
+    nMm, nLead = ctSum.shape[1:]
+    cols = {
+        's': np.tile(np.asarray(leads), nMm),
+        'th_hour': np.full(nMm * nLead, thresholdHour),
+        'mm': np.repeat(np.arange(nMm), nLead)
+    }
+    for i, code in enumerate(CT_CODES) :
+        cols[code] = ctSum[i].ravel()
+    cols['t'] = ctSum.sum(axis=0).ravel()
+    return cols
+
+
+def momentColumns(thresholdHour, leads, stnIds, moments) :
+    '''
+    Makes the daily moment columns (lead, station order) for ct_store
+
+    Returns:
+    - dict: column -> array (s, th_hour, stn, n, sf, so, sff, soo, sfo, sae)
+    '''
+    nLead, nStn = moments.shape[1:]
+    cols = {
+        's': np.repeat(np.asarray(leads), nStn),
+        'th_hour': np.full(nLead * nStn, thresholdHour),
+        'stn': np.tile(np.asarray(stnIds, dtype=np.int64), nLead)
+    }
+    for i, code in enumerate(MOMENT_CODES) :
+        cols[code] = moments[i].ravel()
+    return cols
+
+
+def momentSumColumns(thresholdHour, leads, momentSum) :
+    '''
+    Makes the moment daily sum columns (lead order) for ct_store
+
+    Returns:
+    - dict: column -> array (s, th_hour, n, sf, so, sff, soo, sfo, sae)
+    '''
+    cols = {
+        's': np.asarray(leads),
+        'th_hour': np.full(len(leads), thresholdHour)
+    }
+    for i, code in enumerate(MOMENT_CODES) :
+        cols[code] = momentSum[i]
+    return cols
+
+
+def cubeToDict(cube, leads, stnIds, thresholdMms) -> dict:
+    '''
+    Converts a contingency cube to the nested dict of CalcContingency (ct[szMm][stn][str(s)][code])
+    '''
+    ct = {}
+    for mmIdx, mm in enumerate(thresholdMms) :
+        szMm = format(mm, ".1f")
+        ct[szMm] = {}
+        for stnIdx, stn in enumerate(stnIds) :
+            stnVals = {}
+            for leadIdx, s in enumerate(leads) :
+                vals = {code : int(cube[i, mmIdx, leadIdx, stnIdx]) for i, code in enumerate(CT_CODES)}
+                vals['t'] = sum(vals.values())
+                stnVals[str(s)] = vals
+            ct[szMm][stn] = stnVals
+    return ct
+
+
+def checkParity(cube, leads, stnIds, thresholdMms, ct) :
+    '''
+    Checks that a contingency cube matches the dict output of CalcContingency exactly
+
+    Parameters:
+    - cube(numpy.ndarray): contingency cube (code x threshold x lead x station)
+    - leads(list): lead (s) of each cube lead index
+    - stnIds(list): Station Id list
+    - thresholdMms(list): threshold precipitation list
+    - ct(dict): Contingency table from CalcContingency
+
+    Returns:
+    - bool: True if identical
+    '''
+    cubeCt = cubeToDict(cube, leads, stnIds, thresholdMms)
+    if cubeCt == ct :
+        return True
+    for szMm in ct :
+        for stn in ct[szMm] :
+            if cubeCt.get(szMm, {}).get(stn) != ct[szMm][stn] :
+                print('[ERROR] ct_engine parity - mm:', szMm, 'stn:', stn, 'dict:', ct[szMm][stn], 'cube:', cubeCt.get(szMm, {}).get(stn))
+                return False
+    print('[ERROR] ct_engine parity - key mismatch')
+    return False
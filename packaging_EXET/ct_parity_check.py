@@ -0,0 +1,132 @@
+# ct_engine 분할표 큐브와 CalcContingency (dict) 결과가 같은지 합성 자료로 확인
+#  - 관측 / 모델 파일 없이 난수 자료로 CalcContingencyDay.SectionArrays -> ct_engine.contingencyCube 와
+#    같은 자료의 dict 입력 -> CalcContingency 를 비교 (ct_engine.checkParity)
+#  - 강수 0, 임계값과 같은 값을 섞어서 경계 (>=) 처리도 확인
+# 실행 (packaging_EXET 에서) : python ct_parity_check.py [--model gdps_ne36] [--seeds 3]
+
+import sys
+import argparse
+from datetime import datetime
+import numpy as np
+import _config as cfg
+import ct_engine
+import obs_reader
+from calc_ct_day import CalcContingencyDay
+
+
+def randomPrecip(rng, shape, scale) :
+    '''
+    Makes precipitation in 0.01mm integers, about half zero and some exactly on a threshold
+
+    Parameters:
+    - rng(numpy.random.Generator): random generator
+    - shape(tuple): array shape
+    - scale(int): 0.01mm unit scale of the non zero values
+
+    Returns:
+    - numpy.ndarray: precipitation (int64, 0.01mm unit)
+    '''
+    vals = rng.integers(1, scale, size=shape)
+    vals[rng.random(shape) < 0.5] = 0
+    edge = rng.random(shape) < 0.1
+    vals[edge] = rng.choice(np.rint(np.array(cfg.thresholdMms) * 100).astype(np.int64), size=int(edge.sum()))
+    return vals
+
+
+def syntheticRuns(calcCt, modelCode, targetDay, nStn, rng) :
+    '''
+    Makes the GetDayModelRuns output of every model run verifying on targetDay from random step values
+
+    Returns:
+    - tuple: containing
+            - dict: (info, cumulative precipitation) by model run time string
+            - dict: step values (station x step, int64, 0.01mm unit) by model run time string
+    '''
+    conf = cfg.modelConf[modelCode]
+    iv = conf['fcstInterval']
+    nStep = conf['modelExtractHours'] // iv
+    runs = {}
+    stepVals = {}
+    for thresholdHour in conf['modelThresholdHours'] :
+        for modelDtStr in calcCt.GetModelRunSteps(targetDay, thresholdHour, modelCode) :
+            if modelDtStr in runs :
+                continue
+            vals = randomPrecip(rng, (nStn, nStep), 500 * iv)
+            cum = np.zeros((nStn, nStep+1), dtype=np.int64)
+            np.cumsum(vals, axis=1, out=cum[:, 1:])
+            info = {'fcstInterval': iv, 'fcstMaxHour': nStep * iv, 'nStep': nStep, 'path': 'synthetic'}
+            runs[modelDtStr] = (info, cum)
+            stepVals[modelDtStr] = vals
+    return runs, stepVals
+
+
+def checkModel(modelCode, targetDay, nStn, seed) :
+    '''
+    Compares the contingency cube and the dict contingency table of every modelThresholdHours on synthetic data
+
+    Parameters:
+    - modelCode(str): model code
+    - targetDay(datetime): date (KST)
+    - nStn(int): number of synthetic stations
+    - seed(int): random seed
+
+    Returns:
+    - bool: True if every thresholdHour matches
+    '''
+    rng = np.random.default_rng(seed)
+    calcCt = CalcContingencyDay()
+    stnIds = list(range(90, 90 + nStn))
+    modelFcstMaxHour = max(cfg.modelConf[modelCode]['modelFcstMaxHours'])
+
+    runs, stepVals = syntheticRuns(calcCt, modelCode, targetDay, nStn, rng)
+    # 관측은 0.1mm 단위 매시 강수
+    rn = np.round(randomPrecip(rng, (nStn, 24), 300) / 10) / 10
+
+    isOk = True
+    for thresholdHour in cfg.modelConf[modelCode]['modelThresholdHours'] :
+        runSteps = calcCt.GetModelRunSteps(targetDay, thresholdHour, modelCode)
+        obsSums = obs_reader.sumObsHours(rn, thresholdHour)
+        leads, obsArr, modelArr = calcCt.SectionArrays(thresholdHour, runSteps, runs, obsSums, modelFcstMaxHour)
+        cube = ct_engine.contingencyCube(obsArr, modelArr, cfg.thresholdMms)
+
+        # 같은 자료를 GetDayObs, GetDayModel 형식의 dict 로 (step 값을 구간마다 직접 합산)
+        ss = list(range(thresholdHour, 24+thresholdHour, thresholdHour))
+        obs = {stn : dict(zip(ss, obsSums[i].tolist())) for i, stn in enumerate(stnIds)}
+        model = {}
+        for i, stn in enumerate(stnIds) :
+            model[stn] = {}
+            for modelDtStr, steps in runSteps.items() :
+                iv = runs[modelDtStr][0]['fcstInterval']
+                vals = stepVals[modelDtStr][i].tolist()
+                model[stn][modelDtStr] = {s : sum(vals[(s - thresholdHour) // iv : min(s, modelFcstMaxHour) // iv]) / 100 for s in steps}
+        ct = calcCt.CalcContingency(targetDay, thresholdHour, stnIds, modelCode, obs, model)
+
+        if ct_engine.checkParity(cube, leads, stnIds, cfg.thresholdMms, ct) :
+            print('- ct_engine parity OK : ', modelCode, targetDay.strftime('%Y%m%d'), thresholdHour, 'seed', seed)
+        else :
+            isOk = False
+    return isOk
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', required=False, help='model code, all models in _config.modelConf if not given')
+    parser.add_argument('--targetDate', required=False, default='20240701', help='yyyymmdd')
+    parser.add_argument('--stations', required=False, type=int, default=20)
+    parser.add_argument('--seeds', required=False, type=int, default=3)
+
+    args = parser.parse_args()
+
+    modelCodes = [args.model] if args.model is not None else list(cfg.modelConf)
+    targetDay = datetime.strptime(args.targetDate, '%Y%m%d')
+
+    isOk = True
+    for modelCode in modelCodes :
+        for seed in range(args.seeds) :
+            if checkModel(modelCode, targetDay, args.stations, seed) == False :
+                isOk = False
+
+    if isOk == False :
+        print('[ERROR] ct_engine parity check failed')
+        sys.exit(1)
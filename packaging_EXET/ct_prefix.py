@@ -0,0 +1,309 @@
+from datetime import datetime, timedelta
+import os
+import fcntl
+import argparse
+import numpy as np
+
+import _config as cfg
+import ct_store
+import save_local_format
+
+# 일 분할표 누적합 큐브 (모델, 관측, 연도 마다 한 파일)
+#  - cube[일 + 1, code, thresholdHour, thresholdMm, lead] (int64), cube[0] = 0, cube[k] = 1 월 1 일 ~ k 번째 날의 합
+#  - code 순서는 PREFIX_CODES (n : 그 날 자료가 있으면 1, 구간의 자료 일수)
+#  - lead 인덱스 = s / thresholdHour - 1 (ct_store daysum 의 s)
+#  - 기간 [a, b] 의 분할표 = cube[b + 1] - cube[a] , 연도가 바뀌면 연도별 차이의 합
+#  - calc_ct_day 가 하루를 저장할 때 그 날 이후 누적값만 차이만큼 갱신 (같은 날을 다시 계산해도 됨), 갱신은 파일 잠금
+PREFIX_CODES = ['h', 'f', 'm', 'z', 'n']
+
+
+def prefixPath(modelCode, obsCode, year) :
+    return cfg.PATH_CT_PREFIX.format(MODEL=modelCode, OBS=obsCode, YYYY=str(year))
+
+
+def cubeAxes(modelCode) :
+    '''
+    Returns the thresholdHours and the number of leads of the cube of a model
+    '''
+    thHours = list(cfg.modelConf[modelCode]['modelThresholdHours'])
+    nLead = max(cfg.modelConf[modelCode]['modelFcstMaxHours']) // min(thHours)
+    return thHours, nLead
+
+
+def yearDays(year) :
+    return (datetime(year+1, 1, 1) - datetime(year, 1, 1)).days
+
+
+def dayIndex(dt) :
+    return dt.timetuple().tm_yday - 1
+
+
+def groupColumns(modelCode, columns, dayIdx=None, nDay=1) :
+    '''
+    Groups ct_store daysum columns into a contingency array
+
+    Parameters:
+    - modelCode(str): model code
+    - columns(dict): ct_store daysum columns (s, th_hour, mm, h, f, m, z)
+    - dayIdx(numpy.ndarray): day index of each row (None : all rows are one day)
+    - nDay(int): number of days
+
+    Returns:
+    - numpy.ndarray: (day x code x thresholdHour x thresholdMm x lead, int64)
+    '''
+    thHours, nLead = cubeAxes(modelCode)
+    nMm = len(cfg.thresholdMms)
+    shape = (nDay, len(PREFIX_CODES), len(thHours), nMm, nLead)
+
+    th = np.asarray(columns['th_hour'], dtype=np.int64)
+    s = np.asarray(columns['s'], dtype=np.int64)
+    mm = np.asarray(columns['mm'], dtype=np.int64)
+    day = np.zeros(len(s), dtype=np.int64) if dayIdx is None else np.asarray(dayIdx, dtype=np.int64)
+    thIdx = np.array([thHours.index(v) if v in thHours else -1 for v in th.tolist()], dtype=np.int64)
+    leadIdx = s // np.maximum(th, 1) - 1
+    keep = (thIdx >= 0) & (mm >= 0) & (mm < nMm) & (leadIdx >= 0) & (leadIdx < nLead) & (s % np.maximum(th, 1) == 0)
+
+    flat = np.ravel_multi_index((day[keep], thIdx[keep], mm[keep], leadIdx[keep]), (nDay, len(thHours), nMm, nLead))
+    size = nDay * len(thHours) * nMm * nLead
+    arr = np.zeros(shape, dtype=np.int64)
+    for i, code in enumerate(PREFIX_CODES) :
+        if code == 'n' :
+            cnt = np.bincount(flat, minlength=size)
+        else :
+            cnt = np.bincount(flat, weights=np.asarray(columns[code])[keep], minlength=size)
+        arr[:, i] = cnt.astype(np.int64).reshape(nDay, len(thHours), nMm, nLead)
+    return arr
+
+
+def openCube(modelCode, obsCode, year, mode='r') :
+    '''
+    Opens the prefix cube of a year as a memory map
+
+    Parameters:
+    - modelCode(str): model code
+    - obsCode(str): Observation code
+    - year(int): year
+    - mode(str): 'r' or 'r+'
+
+    Returns:
+    - numpy.memmap: prefix cube, False if it does not exist or does not match the model config
+    '''
+    cubeFile = prefixPath(modelCode, obsCode, year)
+    thHours, nLead = cubeAxes(modelCode)
+    shape = (yearDays(year) + 1, len(PREFIX_CODES), len(thHours), len(cfg.thresholdMms), nLead)
+
+    if os.path.exists(cubeFile) == False :
+        return False
+
+    cube = np.load(cubeFile, mmap_mode=mode)
+    if cube.shape != shape :
+        print(f'[ERROR] ct prefix cube does not match the model config, rebuild it (--build) : {cubeFile} {cube.shape} {shape}')
+        return False
+    return cube
+
+
+class CubeLock :
+    '''
+    Exclusive lock of a prefix cube file (calc_ct_run workers may update the same year)
+    '''
+    def __init__(self, modelCode, obsCode, year) -> None:
+        self.lockFile = prefixPath(modelCode, obsCode, year) + '.lock'
+
+    def __enter__(self) :
+        os.makedirs(os.path.dirname(self.lockFile), exist_ok=True)
+        self.f = open(self.lockFile, 'w')
+        fcntl.flock(self.f, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *args) :
+        fcntl.flock(self.f, fcntl.LOCK_UN)
+        self.f.close()
+
+
+def updateDay(modelCode, obsCode, targetDay, columns) :
+    '''
+    Puts the contingency daily sums of a day into the prefix cube (only the cumulative values from the day on change)
+
+    Parameters:
+    - modelCode(str): model code
+    - obsCode(str): Observation code
+    - targetDay(datetime): date (KST)
+    - columns(dict): ct_store daysum columns of the day
+
+    Returns:
+    - bool: True if updated
+    '''
+    day = groupColumns(modelCode, columns)[0]
+    d = dayIndex(targetDay)
+    with CubeLock(modelCode, obsCode, targetDay.year) :
+        # 큐브가 없으면 0 에서 시작하지 않고 ct_store 의 그 해 전체로 만듦 (그 날은 이미 ct_store 에 저장됨)
+        if os.path.exists(prefixPath(modelCode, obsCode, targetDay.year)) == False :
+            print('- ct prefix cube not found, build from ct_store : ', modelCode, obsCode, targetDay.year)
+            writeYear(modelCode, obsCode, targetDay.year)
+            return True
+        cube = openCube(modelCode, obsCode, targetDay.year, 'r+')
+        if cube is False :
+            return False
+        delta = day - (cube[d+1] - cube[d])
+        if delta.any() :
+            cube[d+1:] += delta
+            cube.flush()
+        del cube
+    return True
+
+
+def buildYear(modelCode, obsCode, year) :
+    '''
+    Builds the prefix cube of a year from ct_store (one scan of the year)
+
+    Returns:
+    - tuple: cube shape
+    '''
+    with CubeLock(modelCode, obsCode, year) :
+        return writeYear(modelCode, obsCode, year)
+
+
+def writeYear(modelCode, obsCode, year) :
+    '''
+    Writes the prefix cube of a year from ct_store (the caller holds CubeLock)
+
+    Returns:
+    - tuple: cube shape
+    '''
+    startDt = datetime(year, 1, 1)
+    endDt = datetime(year, 12, 31)
+    cols = ct_store.readRange('daysum', modelCode, obsCode, startDt, endDt, ['date', 's', 'th_hour', 'mm', 'h', 'f', 'm', 'z'])
+    ymds, inv = np.unique(cols['date'], return_inverse=True)
+    dayIdx = np.array([dayIndex(datetime.strptime(str(v), '%Y%m%d')) for v in ymds.tolist()], dtype=np.int64)[inv]
+    days = groupColumns(modelCode, cols, dayIdx, yearDays(year))
+
+    cubeFile = prefixPath(modelCode, obsCode, year)
+    os.makedirs(os.path.dirname(cubeFile), exist_ok=True)
+    tmpFile = cubeFile + '.' + str(os.getpid()) + '.tmp.npy'
+    cube = np.lib.format.open_memmap(tmpFile, mode='w+', dtype=np.int64, shape=(days.shape[0] + 1,) + days.shape[1:])
+    cube[0] = 0
+    np.cumsum(days, axis=0, out=cube[1:])
+    cube.flush()
+    shape = cube.shape
+    del cube
+    os.replace(tmpFile, cubeFile)
+    return shape
+
+
+def loadPrefix(modelCode, obsCode, startDt, endDt) :
+    '''
+    Returns the prefix sums over the days of a date range (across years)
+
+    Returns:
+    - numpy.ndarray: P (days + 1 x code x thresholdHour x thresholdMm x lead), P[k] = sum of the first k days from startDt
+    '''
+    thHours, nLead = cubeAxes(modelCode)
+    segs = [np.zeros((1, len(PREFIX_CODES), len(thHours), len(cfg.thresholdMms), nLead), dtype=np.int64)]
+    for year in range(startDt.year, endDt.year + 1) :
+        d0 = dayIndex(max(startDt, datetime(year, 1, 1)))
+        d1 = dayIndex(min(endDt, datetime(year, 12, 31))) + 1
+        cube = openCube(modelCode, obsCode, year)
+        if cube is False :
+            print('[WARN] ct prefix cube not found, the year counts as no data (build it with --build) : ', modelCode, obsCode, year)
+            seg = np.zeros((d1 - d0,) + segs[0].shape[1:], dtype=np.int64)
+        else :
+            seg = cube[d0+1:d1+1] - cube[d0]
+        segs.append(seg + segs[-1][-1])
+    return np.concatenate(segs)
+
+
+def rangeCt(modelCode, obsCode, startDt, endDt) :
+    '''
+    Contingency table of a date range as a difference of two cube slices per year
+
+    Returns:
+    - numpy.ndarray: (code x thresholdHour x thresholdMm x lead, int64), code order PREFIX_CODES
+    '''
+    thHours, nLead = cubeAxes(modelCode)
+    ct = np.zeros((len(PREFIX_CODES), len(thHours), len(cfg.thresholdMms), nLead), dtype=np.int64)
+    for year in range(startDt.year, endDt.year + 1) :
+        cube = openCube(modelCode, obsCode, year)
+        if cube is False :
+            print('[WARN] ct prefix cube not found, the year counts as no data (build it with --build) : ', modelCode, obsCode, year)
+            continue
+        d0 = dayIndex(max(startDt, datetime(year, 1, 1)))
+        d1 = dayIndex(min(endDt, datetime(year, 12, 31))) + 1
+        ct += cube[d1] - cube[d0]
+    return ct
+
+
+def rollingCt(modelCode, obsCode, startDt, endDt, window) :
+    '''
+    Contingency tables of the window days ending on each day of a date range
+
+    Returns:
+    - numpy.ndarray: (day x code x thresholdHour x thresholdMm x lead, int64)
+    '''
+    P = loadPrefix(modelCode, obsCode, startDt - timedelta(days=window-1), endDt)
+    return P[window:] - P[:-window]
+
+
+def ctScores(modelCode, ct, thHour, thMm, maxFcstHour) :
+    '''
+    Scores of the leads up to maxFcstHour of contingency arrays (lead 0 of CalcScores)
+
+    Parameters:
+    - modelCode(str): model code
+    - ct(numpy.ndarray): (... x code x thresholdHour x thresholdMm x lead) from rangeCt / rollingCt
+    - thHour(int): thresholdHour
+    - thMm(float): thresholdMm
+    - maxFcstHour(int): max forecasting hour
+
+    Returns:
+    - dict: 'ct' (h, f, m, z, t, n arrays) and 'score' (save_local_format.CalcScoreArrays)
+    '''
+    thHours, nLead = cubeAxes(modelCode)
+    i = thHours.index(thHour)
+    j = [format(mm, ".1f") for mm in cfg.thresholdMms].index(format(thMm, ".1f"))
+    nUse = min(maxFcstHour // thHour, nLead)
+    sums = ct[..., i, j, :nUse].sum(axis=-1)
+    h, f, m, z = [sums[..., PREFIX_CODES.index(code)] for code in ['h', 'f', 'm', 'z']]
+    t = h + f + m + z
+    # 자료 일수는 첫 구간 기준
+    n = ct[..., PREFIX_CODES.index('n'), i, j, 0]
+    return {'ct' : {'h': h, 'f': f, 'm': m, 'z': z, 't': t, 'n': n}, 'score' : save_local_format.CalcScoreArrays(h, f, m, z, t)}
+
+
+if __name__ == '__main__' :
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', required=True, help='model code')
+    parser.add_argument('--obs', required=True, help='asos/aws')
+    parser.add_argument('--startDate', required=True, help='yyyymmdd')
+    parser.add_argument('--endDate', required=True, help='yyyymmdd')
+    parser.add_argument('--build', action='store_true', help='rebuild the cubes of the years from ct_store')
+    parser.add_argument('--window', required=False, type=int, help='rolling window days (print a score time series)')
+    parser.add_argument('--thHour', required=False, type=int, help='thresholdHour (default first of the model)')
+    parser.add_argument('--thMm', required=False, type=float, default=0.1, help='thresholdMm (default 0.1)')
+    parser.add_argument('--maxFcstHour', required=False, type=int, help='max forecasting hour (default first of the model)')
+
+    args = parser.parse_args()
+
+    startDt = datetime.strptime(args.startDate, '%Y%m%d')
+    endDt = datetime.strptime(args.endDate, '%Y%m%d')
+    thHour = args.thHour if args.thHour is not None else cfg.modelConf[args.model]['modelThresholdHours'][0]
+    maxFcstHour = args.maxFcstHour if args.maxFcstHour is not None else cfg.modelConf[args.model]['modelFcstMaxHours'][0]
+
+    if args.build :
+        for year in range(startDt.year, endDt.year + 1) :
+            print('- CT Prefix build : ', args.model, args.obs, year, buildYear(args.model, args.obs, year))
+
+    scNames = ['ACCURACY', 'BIAS', 'CSI', 'ETS', 'POD', 'FAR', 'POFD']
+    print('  date         days       h       f       m       z ' + ''.join(format(scName, '>9s') for scName in scNames))
+    if args.window is None :
+        rst = ctScores(args.model, rangeCt(args.model, args.obs, startDt, endDt), thHour, args.thMm, maxFcstHour)
+        dates = [args.startDate + '-' + args.endDate]
+        rows = [{k : v.reshape(1) for k, v in rst['ct'].items()}, {k : v.reshape(1) for k, v in rst['score'].items()}]
+    else :
+        rst = ctScores(args.model, rollingCt(args.model, args.obs, startDt, endDt, args.window), thHour, args.thMm, maxFcstHour)
+        dates = [(startDt + timedelta(days=i)).strftime('%Y%m%d') for i in range((endDt - startDt).days + 1)]
+        rows = [rst['ct'], rst['score']]
+    for k, date in enumerate(dates) :
+        line = '  ' + date.ljust(10) + format(rows[0]['n'][k], '6d') + ''.join(format(rows[0][code][k], '8d') for code in ['h', 'f', 'm', 'z'])
+        line += ''.join(format(rows[1][scName][k], '9.3f') for scName in scNames)
+        print(line)
@@ -0,0 +1,222 @@
+from datetime import datetime, timedelta
+import os
+import argparse
+import numpy as np
+
+import _config as cfg
+
+# 분할표 열 저장소 (calc_ct_day 가 쓰고 save_local_format 이 읽음)
+#  - 월 단위 파티션 : ct_store/{TABLE}/{MODEL}_{OBS}/{YYYYMM}/ , 하루 자료는 한 파일 (행 그룹)
+#    파일 이름으로 모델 / 관측 / 기간을 거르고, 하루 파일은 통째로 교체(원자적)하므로 같은 달을 여러 프로세스가 동시에 써도 됨
+#  - 0 ~ 511 byte : '# CTSTORE, table:.., model:.., obs:.., ymd:.., nRow:.., nBlock:.., mms:0.1/1.0/..' (공백 채움, 마지막 '\n')
+#  - int32 [nBlock, 4] : (th_hour, mm 인덱스, 시작 행, 끝 행) , 행은 (th_hour, mm) 순으로 정렬되어 블록마다 연속
+#  - 열 자료 : TABLES 의 열 순서대로 [nRow] 씩 이어짐 (열 단위로 필요한 열, 필요한 블록만 읽음)
+#  - 날짜(date, YYYYMMDD)는 파일 이름의 값으로 읽을 때 만듦, mm 은 mms 의 인덱스 (thMm : 헤더 mms 의 임계값)
+HEADER_LEN = 512
+
+TABLES = {
+    # 지점별 일 분할표 (예전 ct_day csv)
+    'day' : [('s', np.int16), ('th_hour', np.int16), ('mm', np.int16), ('stn', np.int32),
+             ('h', np.int16), ('f', np.int16), ('m', np.int16), ('z', np.int16), ('t', np.int16)],
+    # 지점 합계 일 분할표 (예전 ct_daysum csv / db)
+    'daysum' : [('s', np.int16), ('th_hour', np.int16), ('mm', np.int16),
+                ('h', np.int32), ('f', np.int32), ('m', np.int32), ('z', np.int32), ('t', np.int32)],
+    # 지점별 일 연속 검증 충분통계량 (ct_engine.MOMENT_CODES, mm 구분 없음)
+    'moment' : [('s', np.int16), ('th_hour', np.int16), ('stn', np.int32), ('n', np.int32),
+                ('sf', np.float64), ('so', np.float64), ('sff', np.float64), ('soo', np.float64), ('sfo', np.float64), ('sae', np.float64)],
+    # 지점 합계 일 연속 검증 충분통계량
+    'momentsum' : [('s', np.int16), ('th_hour', np.int16), ('n', np.int32),
+                   ('sf', np.float64), ('so', np.float64), ('sff', np.float64), ('soo', np.float64), ('sfo', np.float64), ('sae', np.float64)],
+}
+
+
+def storePath(table, modelCode, obsCode, targetDay) :
+    return cfg.PATH_CT_STORE.format(TABLE=table, MODEL=modelCode, OBS=obsCode, YYYYMM=targetDay.strftime('%Y%m'), YYYYMMDD=targetDay.strftime('%Y%m%d'))
+
+
+def parseHeader(line) :
+    '''
+    Parses the '# CTSTORE' header line of a store file
+
+    Returns:
+    - dict: header values (nRow, nBlock as int, mms as float list), False if not a store file
+    '''
+    if line[0:9] != '# CTSTORE' :
+        return False
+    header = {}
+    for kv in line.split(',')[1:] :
+        tmp = kv.strip().split(':')
+        if len(tmp) < 2 : continue
+        header[tmp[0]] = tmp[1]
+    header['nRow'] = int(header['nRow'])
+    header['nBlock'] = int(header['nBlock'])
+    header['mms'] = [float(v) for v in header['mms'].split('/')]
+    return header
+
+
+def writeDay(table, modelCode, obsCode, targetDay, columns, thresholdMms=None) :
+    '''
+    Writes the rows of a day as one file of the monthly partition (replaces the day if it exists)
+
+    Parameters:
+    - table(str): 'day', 'daysum', 'moment' or 'momentsum'
+    - modelCode(str): model code
+    - obsCode(str): Observation code
+    - targetDay(datetime): date (KST)
+    - columns(dict): column name -> array (every column of TABLES[table], mm as index of thresholdMms)
+                     tables without mm are stored as mm index 0 blocks
+    - thresholdMms(list): threshold precipitation list (default cfg.thresholdMms)
+
+    Returns:
+    - str: written file path
+    '''
+    if thresholdMms is None :
+        thresholdMms = cfg.thresholdMms
+    schema = TABLES[table]
+    nRow = len(columns['s'])
+
+    # (th_hour, mm) 블록 순으로 정렬 (블록 안의 행 순서는 유지)
+    thHours = np.asarray(columns['th_hour'], dtype=np.int64)
+    mms = np.asarray(columns['mm'], dtype=np.int64) if 'mm' in columns else np.zeros(nRow, dtype=np.int64)
+    order = np.lexsort((mms, thHours))
+    thHours = thHours[order]
+    mms = mms[order]
+    starts = np.flatnonzero(np.r_[True, (np.diff(thHours) != 0) | (np.diff(mms) != 0)]) if nRow > 0 else np.zeros(0, dtype=np.int64)
+    ends = np.r_[starts[1:], nRow]
+    blocks = np.stack([thHours[starts], mms[starts], starts, ends], axis=1).astype(np.int32).reshape(-1, 4)
+
+    szMms = '/'.join(format(mm, ".1f") for mm in thresholdMms)
+    header = f"# CTSTORE, table:{table}, model:{modelCode}, obs:{obsCode}, ymd:{targetDay.strftime('%Y%m%d')}, nRow:{nRow}, nBlock:{len(blocks)}, mms:{szMms}"
+    header = header.ljust(HEADER_LEN-1) + '\n'
+
+    storeFile = storePath(table, modelCode, obsCode, targetDay)
+    os.makedirs(os.path.dirname(storeFile), exist_ok=True)
+    tmpFile = storeFile + '.' + str(os.getpid()) + '.tmp'
+    with open(tmpFile, 'wb') as f :
+        f.write(header.encode('ascii'))
+        f.write(blocks.tobytes())
+        for name, dtype in schema :
+            f.write(np.asarray(columns[name])[order].astype(dtype).tobytes())
+    os.replace(tmpFile, storeFile)
+    return storeFile
+
+
+def readDay(storeFile, columns, thHour=None, mm=None) :
+    '''
+    Reads the selected columns of the selected (th_hour, mm) blocks of a day file
+
+    Parameters:
+    - storeFile(str): store file path
+    - columns(list): column names to read ('date' for YYYYMMDD, 'thMm' for the threshold value of mm)
+    - thHour(int): th_hour filter (None : all)
+    - mm(float): threshold precipitation filter (None : all)
+
+    Returns:
+    - dict: column name -> array, False if the file does not exist or is not a store file
+    '''
+    if os.path.exists(storeFile) == False :
+        return False
+    with open(storeFile, 'rb') as f :
+        header = parseHeader(f.read(HEADER_LEN).decode('ascii'))
+        if header is False :
+            return False
+        blocks = np.frombuffer(f.read(16 * header['nBlock']), dtype=np.int32).reshape(-1, 4)
+
+    schema = TABLES[header['table']]
+    sel = np.ones(len(blocks), dtype=bool)
+    if thHour is not None :
+        sel &= blocks[:, 0] == thHour
+    if mm is not None :
+        szMms = [format(v, ".1f") for v in header['mms']]
+        mmIdx = szMms.index(format(mm, ".1f")) if format(mm, ".1f") in szMms else -1
+        sel &= blocks[:, 1] == mmIdx
+    ranges = [(int(b[2]), int(b[3])) for b in blocks[sel]]
+
+    # thMm 은 mm 인덱스를 이 파일 헤더의 mms 로 바꿈 (writeDay 의 thresholdMms)
+    readCols = list(columns) + (['mm'] if 'thMm' in columns and 'mm' not in columns else [])
+    rst = {}
+    nRow = header['nRow']
+    offset = HEADER_LEN + 16 * header['nBlock']
+    for name, dtype in schema :
+        if name in readCols :
+            if len(ranges) == 0 :
+                rst[name] = np.zeros(0, dtype=dtype)
+            else :
+                col = np.memmap(storeFile, dtype=dtype, mode='r', offset=offset, shape=(nRow,))
+                rst[name] = np.concatenate([col[start:end] for start, end in ranges])
+                del col
+        offset += np.dtype(dtype).itemsize * nRow
+    if 'date' in columns :
+        n = sum(end - start for start, end in ranges)
+        rst['date'] = np.full(n, int(header['ymd']), dtype=np.int32)
+    if 'thMm' in columns :
+        rst['thMm'] = np.asarray(header['mms'], dtype=np.float64)[rst['mm']]
+        if 'mm' not in columns :
+            del rst['mm']
+    return rst
+
+
+def readRange(table, modelCode, obsCode, startDt, endDt, columns, thHour=None, mm=None, maxLead=None) :
+    '''
+    Reads the selected columns of a model / observation over a date range.
+    Only the day files of the range are opened (monthly partitions, one file per day),
+    and only the selected columns of the matching (th_hour, mm) blocks are read.
+
+    Parameters:
+    - table(str): 'day', 'daysum', 'moment' or 'momentsum'
+    - modelCode(str): model code
+    - obsCode(str): Observation code
+    - startDt(datetime): first date
+    - endDt(datetime): last date (inclusive)
+    - columns(list): column names to read ('date' for YYYYMMDD, 'thMm' for the threshold value of mm)
+    - thHour(int): th_hour filter (None : all)
+    - mm(float): threshold precipitation filter (None : all)
+    - maxLead(int): keep rows with s <= maxLead (None : all)
+
+    Returns:
+    - dict: column name -> array (date order)
+    '''
+    readCols = list(columns) + (['s'] if maxLead is not None and 's' not in columns else [])
+    parts = {name : [] for name in readCols}
+    dt = startDt
+    while dt <= endDt :
+        day = readDay(storePath(table, modelCode, obsCode, dt), readCols, thHour, mm)
+        if day is not False :
+            for name in readCols :
+                parts[name].append(day[name])
+        dt = dt + timedelta(days=1)
+
+    dtypes = dict(TABLES[table] + [('date', np.int32), ('thMm', np.float64)])
+    rst = {name : np.concatenate(parts[name]) if len(parts[name]) > 0 else np.zeros(0, dtype=dtypes[name]) for name in readCols}
+    if maxLead is not None :
+        keep = rst['s'] <= maxLead
+        rst = {name : rst[name][keep] for name in columns}
+    return rst
+
+
+if __name__ == '__main__' :
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--table', required=False, default='daysum', choices=list(TABLES.keys()), help='day / daysum / moment / momentsum')
+    parser.add_argument('--model', required=True, help='model code')
+    parser.add_argument('--obs', required=True, help='asos/aws')
+    parser.add_argument('--startDate', required=True, help='yyyymmdd')
+    parser.add_argument('--endDate', required=True, help='yyyymmdd')
+    parser.add_argument('--csv', required=False, help='export the rows to a csv file')
+
+    args = parser.parse_args()
+
+    startDt = datetime.strptime(args.startDate, '%Y%m%d')
+    endDt = datetime.strptime(args.endDate, '%Y%m%d')
+    names = ['date'] + [name for name, dtype in TABLES[args.table]]
+    # mm 은 파일마다 헤더의 임계값으로 변환해서 내보냄
+    readNames = [('thMm' if name == 'mm' else name) for name in names]
+    rows = readRange(args.table, args.model, args.obs, startDt, endDt, readNames)
+    print('- CT Store : ', args.table, args.model, args.obs, args.startDate, args.endDate, 'rows', len(rows['date']))
+
+    if args.csv is not None :
+        with open(args.csv, 'w') as f :
+            f.write(','.join(names) + '\n')
+            cols = [[format(v, ".1f") for v in rows[name].tolist()] if name == 'thMm' else rows[name].tolist() for name in readNames]
+            for vals in zip(*cols) :
+                f.write(','.join(str(v) for v in vals) + '\n')
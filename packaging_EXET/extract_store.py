@@ -0,0 +1,279 @@
+from datetime import datetime
+import os
+import glob
+import argparse
+import numpy as np
+
+import _config as cfg
+
+# 바이너리 추출 파일 (extract_{MODEL}_{OBS}.{YYYYMMDDHH}.bin)
+#  - 0 ~ 511 byte : '# INFO, model:.., obs:.., ymdh:.., fcstInterval:.., fcstMaxHour:.., nStn:.., nStep:..' (공백 채움, 마지막 '\n')
+#  - int32 [nStn] : 지점번호
+#  - float32 [nStn, nStep] : 예측시간별 강수량 (결측은 NaN)
+BIN_HEADER_LEN = 512
+
+TXT_STN_WIDTH = 6
+TXT_SEP_WIDTH = 2
+TXT_VAL_WIDTH = 7
+
+
+def parseInfoLine(line) :
+    '''
+    Parses the '# INFO' header line of an extract file
+
+    Parameters:
+    - line(str): header line
+
+    Returns:
+    - dict: header values (fcstInterval, fcstMaxHour, nStn, nStep as int), False if not an INFO line
+    '''
+    if line[0:6] != '# INFO' :
+        return False
+    info = {}
+    for kv in line.split(',') :
+        tmp = kv.strip().split(':')
+        if len(tmp) < 2 : continue
+        k = tmp[0]
+        v = tmp[1]
+        if k in ['fcstInterval', 'fcstMaxHour', 'nStn', 'nStep'] :
+            v = int(v)
+        info[k] = v
+    return info
+
+
+def infoLine(modelCode, obsCode, modelDt, interval, maxHour, sample='nearest') :
+    line = f"# INFO, model:{modelCode}, obs:{obsCode}, ymdh:{modelDt.strftime('%Y%m%d%H')}, fcstInterval:{interval}, fcstMaxHour:{maxHour}"
+    # 보간 추출(stn_weights)만 표시, 최근접 격자 추출 파일은 예전과 같은 형식
+    if sample != 'nearest' :
+        line += f", sample:{sample}"
+    return line
+
+
+def writeExtractTxt(txtFile, modelCode, obsCode, modelDt, interval, maxHour, stnIds, values, sample='nearest') :
+    '''
+    Writes model extract values to the fixed-width text format
+
+    Parameters:
+    - txtFile(str): output path
+    - modelCode(str): model code
+    - obsCode(str): Observation code (aws, asos)
+    - modelDt(datetime): model run time
+    - interval(int): forecast interval (hour)
+    - maxHour(int): max forecast hour
+    - stnIds(list): Station Id list (row order of values)
+    - values(numpy.ndarray): precipitation (stations x steps)
+    - sample(str): station sampling (nearest, bilinear, idw)
+
+    Returns:
+    - None
+    '''
+    header2 = "#   FT  " + ''.join([format(step, "7d") for step in range(interval, maxHour+interval, interval)])
+    lines = [infoLine(modelCode, obsCode, modelDt, interval, maxHour, sample), header2]
+    for sid, row in zip(stnIds, np.asarray(values, dtype=np.float64).tolist()) :
+        lines.append(format(sid, "6d") + "  " + ''.join([format(v, "7.2f") for v in row]))
+
+    tmpFile = txtFile + '.tmp'
+    with open(tmpFile, 'w') as f :
+        f.write('\n'.join(lines) + '\n')
+    os.replace(tmpFile, txtFile)
+
+
+def writeExtractBin(binFile, modelCode, obsCode, modelDt, interval, maxHour, stnIds, values, sample='nearest') :
+    '''
+    Writes model extract values to the binary format (same parameters as writeExtractTxt)
+
+    Returns:
+    - None
+    '''
+    stnArr = np.asarray(stnIds, dtype=np.int32)
+    valArr = np.round(np.asarray(values, dtype=np.float64), 2).astype(np.float32)
+    header = infoLine(modelCode, obsCode, modelDt, interval, maxHour, sample) + f", nStn:{valArr.shape[0]}, nStep:{valArr.shape[1]}"
+    header = header.ljust(BIN_HEADER_LEN-1) + '\n'
+
+    tmpFile = binFile + '.tmp'
+    with open(tmpFile, 'wb') as f :
+        f.write(header.encode('ascii'))
+        f.write(stnArr.tobytes())
+        f.write(np.ascontiguousarray(valArr).tobytes())
+    os.replace(tmpFile, binFile)
+
+
+def readExtractBin(binFile) :
+    '''
+    Opens a binary extract file as memory maps
+
+    Parameters:
+    - binFile(str): binary extract path
+
+    Returns:
+    - tuple: containing
+            - dict: header values
+            - numpy.memmap: station IDs (int32)
+            - numpy.memmap: precipitation (stations x steps, float32), NaN where missing
+      False if the file does not exist or has no INFO header
+    '''
+    if os.path.exists(binFile) == False :
+        return False
+    with open(binFile, 'rb') as f :
+        info = parseInfoLine(f.read(BIN_HEADER_LEN).decode('ascii'))
+    if info is False :
+        return False
+    info['path'] = binFile
+
+    nStn = info['nStn']
+    nStep = info['nStep']
+    if nStn == 0 :
+        return info, np.zeros(0, dtype=np.int32), np.zeros((0, nStep), dtype=np.float32)
+    stnIds = np.memmap(binFile, dtype=np.int32, mode='r', offset=BIN_HEADER_LEN, shape=(nStn,))
+    values = np.memmap(binFile, dtype=np.float32, mode='r', offset=BIN_HEADER_LEN + 4*nStn, shape=(nStn, nStep))
+    return info, stnIds, values
+
+
+def readExtractTxt(txtFile) :
+    '''
+    Reads a fixed-width text extract file in one pass (same return value as readExtractBin)
+    '''
+    if os.path.exists(txtFile) == False :
+        return False
+    with open(txtFile, 'rb') as f :
+        lines = f.read().split(b'\n')
+    if len(lines) == 0 :
+        return False
+    info = parseInfoLine(lines[0].decode('ascii', 'replace'))
+    if info is False :
+        return False
+    info['path'] = txtFile
+
+    nStep = info['fcstMaxHour'] // info['fcstInterval']
+    rowLen = TXT_STN_WIDTH + TXT_SEP_WIDTH + TXT_VAL_WIDTH * nStep
+    rows = [line[:rowLen].ljust(rowLen) for line in lines[1:] if len(line) >= TXT_STN_WIDTH and line[0:1] != b'#']
+    info['nStn'] = len(rows)
+    info['nStep'] = nStep
+    if len(rows) == 0 :
+        return info, np.zeros(0, dtype=np.int32), np.zeros((0, nStep), dtype=np.float32)
+
+    raw = b''.join(rows)
+    table = np.frombuffer(raw, dtype=np.uint8).reshape(len(rows), rowLen)
+    stnIds = table[:, :TXT_STN_WIDTH].copy().view('S' + str(TXT_STN_WIDTH)).ravel().astype(np.int32)
+    fields = table[:, TXT_STN_WIDTH+TXT_SEP_WIDTH:].copy().view('S' + str(TXT_VAL_WIDTH))
+    isValid = np.char.strip(fields) != b''
+    values = np.where(isValid, fields, b'nan').astype(np.float32)
+    return info, stnIds, values
+
+
+def extractPaths(modelCode, obsCode, modelDt) :
+    txtFile = cfg.PATH_MODEL_EXTRACT_TXT.format(MODEL=modelCode, OBS=obsCode, YYYY=modelDt.strftime('%Y'), YYYYMMDDHH=modelDt.strftime('%Y%m%d%H'))
+    binFile = cfg.PATH_MODEL_EXTRACT_BIN.format(MODEL=modelCode, OBS=obsCode, YYYY=modelDt.strftime('%Y'), YYYYMMDDHH=modelDt.strftime('%Y%m%d%H'))
+    return txtFile, binFile
+
+
+def stnXyPath(modelCode, obsCode, modelDt) :
+    return cfg.PATH_MODEL_EXTRACT_STNXY.format(MODEL=modelCode, OBS=obsCode, YYYY=modelDt.strftime('%Y'), YYYYMMDDHH=modelDt.strftime('%Y%m%d%H'))
+
+
+def writeExtractStnXy(modelCode, obsCode, modelDt, stnXyList) :
+    '''
+    Saves the grid position of the extracted stations next to the extract file (int32 [nStn, 3] : stn, x, y)
+    '''
+    stnXyFile = stnXyPath(modelCode, obsCode, modelDt)
+    arr = np.array([[stn['stn'], stn['x'], stn['y']] for stn in stnXyList], dtype=np.int32).reshape(-1, 3)
+    tmpFile = stnXyFile + '.tmp.npy'
+    np.save(tmpFile, arr)
+    os.replace(tmpFile, stnXyFile)
+
+
+def readExtractStnXy(modelCode, obsCode, modelDt) :
+    '''
+    Reads the grid position of the extracted stations
+
+    Returns:
+    - dict: station ID -> (x, y), False if the file does not exist (extracts made before it was recorded)
+    '''
+    stnXyFile = stnXyPath(modelCode, obsCode, modelDt)
+    if os.path.exists(stnXyFile) == False :
+        return False
+    arr = np.load(stnXyFile)
+    return {int(stn): (int(x), int(y)) for stn, x, y in arr}
+
+
+def readExtract(modelCode, obsCode, modelDt) :
+    '''
+    Reads the extract of a model run, preferring the binary file over the text file
+
+    Parameters:
+    - modelCode(str): model code
+    - obsCode(str): Observation code (aws, asos)
+    - modelDt(datetime): model run time
+
+    Returns:
+    - tuple: (info, stnIds, values) as readExtractBin, False if neither file exists
+    '''
+    txtFile, binFile = extractPaths(modelCode, obsCode, modelDt)
+    ext = readExtractBin(binFile)
+    if ext is False :
+        ext = readExtractTxt(txtFile)
+    return ext
+
+
+def sumStepBuckets(values, bucketIdx, nBucket) :
+    '''
+    Sums forecast step columns into buckets (e.g. thresholdHour sections)
+
+    Parameters:
+    - values(numpy.ndarray): precipitation (stations x steps), NaN counts as 0
+    - bucketIdx(numpy.ndarray): bucket index of each step column, -1 to drop the step
+    - nBucket(int): number of buckets
+
+    Returns:
+    - numpy.ndarray: accumulated precipitation (stations x nBucket), rounded to 2 decimals
+    '''
+    bucketIdx = np.asarray(bucketIdx)
+    vals = np.round(np.nan_to_num(np.asarray(values[:, :len(bucketIdx)], dtype=np.float64)), 2)
+    keep = np.nonzero(bucketIdx >= 0)[0]
+    onehot = np.zeros((len(bucketIdx), nBucket), dtype=np.float64)
+    onehot[keep, bucketIdx[keep]] = 1
+    return np.round(vals @ onehot, 2)
+
+
+def convertExtractArchive(modelCode, obsCode, removeTxt=False) :
+    '''
+    Converts every text extract file of a model / observation network to the binary format
+
+    Parameters:
+    - modelCode(str): model code
+    - obsCode(str): Observation code (aws, asos)
+    - removeTxt(bool): remove the text file after conversion
+
+    Returns:
+    - int: number of converted files
+    '''
+    pattern = cfg.PATH_MODEL_EXTRACT_TXT.format(MODEL=modelCode, OBS=obsCode, YYYY='*', YYYYMMDDHH='[0-9]'*10)
+    cnt = 0
+    for txtFile in sorted(glob.glob(pattern)) :
+        ext = readExtractTxt(txtFile)
+        if ext is False :
+            print('[WARN] not an extract file ' + txtFile)
+            continue
+        info, stnIds, values = ext
+        modelDt = datetime.strptime(info['ymdh'], '%Y%m%d%H')
+        binFile = extractPaths(modelCode, obsCode, modelDt)[1]
+        writeExtractBin(binFile, info['model'], info['obs'], modelDt, info['fcstInterval'], info['fcstMaxHour'], stnIds, values, info.get('sample', 'nearest'))
+        if removeTxt :
+            os.remove(txtFile)
+        cnt += 1
+    return cnt
+
+
+if __name__ == '__main__' :
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', required=True, help='comma seperated model codes. eg. gdps_ne36,klfs_ne36')
+    parser.add_argument('--obs', required=True, help='comma seperated obs codes. eg. asos,aws')
+    parser.add_argument('--removeTxt', action='store_true', help='remove text files after conversion')
+
+    args = parser.parse_args()
+
+    for modelCode in args.model.split(',') :
+        for obsCode in args.obs.split(',') :
+            cnt = convertExtractArchive(modelCode, obsCode, args.removeTxt)
+            print('- Extract convert : ', modelCode, obsCode, 'files:', cnt)
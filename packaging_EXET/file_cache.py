@@ -0,0 +1,89 @@
+from collections import OrderedDict
+import os
+import threading
+
+
+class FileCache :
+    '''
+    Bounded LRU cache of parsed files, keyed by (path, mtime)
+
+    A file rewritten on disk gets a new key, so a stale entry is never returned.
+    Each entry carries a tag (e.g. model run time) that evict() can use to drop
+    entries that are no longer needed.
+    Lookups, inserts and evictions are serialized by a lock so the cache can be shared by
+    extractor threads (--workers); loader() runs outside the lock.
+    '''
+    def __init__(self, name, maxItems=64) -> None:
+        self.name = name
+        self.maxItems = maxItems
+        self.items = OrderedDict() # (path, mtime) : (tag, value)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, path, loader, tag=None) :
+        '''
+        Returns the cached value of a file, calling loader() on a miss
+
+        Parameters:
+        - path(str): file path, the cache key together with its mtime
+        - loader(function): reads and parses the file, False if it can not
+        - tag(object): tag of the entry for evict()
+
+        Returns:
+        - object: loader() result (False results are not cached)
+        '''
+        if os.path.exists(path) == False :
+            return loader()
+
+        key = (path, os.path.getmtime(path))
+        with self.lock :
+            if key in self.items :
+                self.items.move_to_end(key)
+                self.hits += 1
+                return self.items[key][1]
+            self.misses += 1
+
+        # 파일 읽기는 잠금 밖에서 (같은 파일을 동시에 읽으면 나중에 끝난 값으로 바뀐다)
+        value = loader()
+        if value is False :
+            return value
+
+        with self.lock :
+            # 같은 파일의 이전 버전은 제거
+            for oldKey in [k for k in self.items if k[0] == path] :
+                del self.items[oldKey]
+            self.items[key] = (tag, value)
+            while len(self.items) > self.maxItems :
+                self.items.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def evict(self, predicate) :
+        '''
+        Removes entries whose tag satisfies predicate(tag) (untagged entries are kept)
+
+        Returns:
+        - int: number of removed entries
+        '''
+        with self.lock :
+            keys = [k for k, (tag, value) in self.items.items() if tag is not None and predicate(tag)]
+            for k in keys :
+                del self.items[k]
+            self.evictions += len(keys)
+        return len(keys)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self.items),
+            'hitRate': self.hits / total if total > 0 else 0.0
+        }
+
+    def report(self) :
+        st = self.stats()
+        print(f"- Cache {self.name} : hit {st['hits']} / miss {st['misses']} (hit rate {st['hitRate']*100:.1f}%), evicted {st['evictions']}, size {st['size']}/{self.maxItems}")
@@ -0,0 +1,193 @@
+import os
+import pickle
+import argparse
+import numpy as np
+
+import _config as cfg
+
+try :
+    from scipy.spatial import cKDTree
+except ImportError :
+    cKDTree = None
+
+# 모델 격자 최근접점 검색 인덱스
+#  - 위경도를 단위구 3차원 좌표로 바꿔서 검색 (경도 0/360 경계, 극 부근에서도 거리가 정확)
+#  - grid_latlon_{MODEL}.npz 옆에 grid_index_{MODEL}.pkl 로 저장, npz 가 바뀌면 다시 생성
+#  - scipy 가 없으면 같은 좌표로 전체 격자를 비교 (느리지만 결과는 같음)
+
+_indexes = {}
+
+
+def latlonToXyz(lats, lons) :
+    '''
+    Converts latitude / longitude (degree) to 3-D unit vectors
+
+    Parameters:
+    - lats(numpy.ndarray): latitude
+    - lons(numpy.ndarray): longitude
+
+    Returns:
+    - numpy.ndarray: unit vectors (... x 3)
+    '''
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lon = np.radians(np.asarray(lons, dtype=np.float64))
+    cosLat = np.cos(lat)
+    return np.stack([cosLat * np.cos(lon), cosLat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def gridFiles(modelCode) :
+    npzFile = cfg.PATH_DABA + '/grid_latlon_' + modelCode + '.npz'
+    indexFile = cfg.PATH_MODEL_GRID_INDEX.format(MODEL=modelCode)
+    return npzFile, indexFile
+
+
+def buildGridIndex(modelCode) :
+    '''
+    Builds the nearest grid point index of a model grid and saves it next to the grid file
+
+    Parameters:
+    - modelCode(str): model code
+
+    Returns:
+    - dict: index ('tree', 'xyz', 'lats', 'lons', 'shape', 'npzMtime'), False if the grid file does not exist
+    '''
+    npzFile, indexFile = gridFiles(modelCode)
+    if os.path.exists(npzFile) == False :
+        print('[ERROR] grid file not exists. ' + npzFile)
+        return False
+
+    with np.load(npzFile, allow_pickle = True) as gridLatlon :
+        lats = np.asarray(gridLatlon['lats'])
+        lons = np.asarray(gridLatlon['lons'])
+
+    index = {
+        'npzMtime': os.path.getmtime(npzFile),
+        'shape': lats.shape,
+        'lats': lats.ravel(),
+        'lons': lons.ravel(),
+        'tree': None,
+        'xyz': None
+    }
+    xyz = latlonToXyz(index['lats'], index['lons'])
+    if cKDTree is not None :
+        index['tree'] = cKDTree(xyz)
+    else :
+        index['xyz'] = xyz
+
+    tmpFile = indexFile + '.' + str(os.getpid()) + '.tmp'
+    with open(tmpFile, 'wb') as f :
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmpFile, indexFile)
+    return index
+
+
+def loadGridIndex(modelCode) :
+    '''
+    Returns the nearest grid point index of a model, loading it from disk or building it when needed
+
+    Parameters:
+    - modelCode(str): model code
+
+    Returns:
+    - dict: index (see buildGridIndex), False if the grid file does not exist
+    '''
+    npzFile, indexFile = gridFiles(modelCode)
+    if os.path.exists(npzFile) == False :
+        print('[ERROR] grid file not exists. ' + npzFile)
+        return False
+    npzMtime = os.path.getmtime(npzFile)
+
+    index = _indexes.get(modelCode)
+    if index is None and os.path.exists(indexFile) :
+        with open(indexFile, 'rb') as f :
+            index = pickle.load(f)
+    # 격자 파일이 바뀌었거나, 저장된 인덱스 종류(scipy 유무)가 지금 환경과 다르면 다시 생성
+    if index is None or index['npzMtime'] != npzMtime or (index['tree'] is None) != (cKDTree is None) :
+        index = buildGridIndex(modelCode)
+    _indexes[modelCode] = index
+    return index
+
+
+def findNearestPoints(modelCode, lats, lons) :
+    '''
+    Finds the nearest grid point of every observation point in one batched query
+
+    Parameters:
+    - modelCode(str): model code
+    - lats(list): latitude of obs points
+    - lons(list): longitude of obs points
+
+    Returns:
+    - tuple: containing
+            - numpy.ndarray: Index of the nearest point in the grid (y-coordinate)
+            - numpy.ndarray: Index of the nearest point in the grid (x-coordinate)
+            - numpy.ndarray: Latitude of the nearest grid point
+            - numpy.ndarray: Longitude of the nearest grid point
+      False if the grid file does not exist
+    '''
+    index = loadGridIndex(modelCode)
+    if index is False :
+        return False
+
+    xyz = latlonToXyz(lats, lons).reshape(-1, 3)
+    if index['tree'] is not None :
+        dist, pos = index['tree'].query(xyz)
+    else :
+        pos = np.array([np.argmax(index['xyz'] @ p) for p in xyz], dtype=np.int64)
+    pos = np.asarray(pos, dtype=np.int64)
+
+    ys, xs = np.unravel_index(pos, index['shape'])
+    return ys, xs, index['lats'][pos], index['lons'][pos]
+
+
+def findNearestPointsK(modelCode, lats, lons, k=4) :
+    '''
+    Finds the k nearest grid points of every observation point
+
+    Parameters:
+    - modelCode(str): model code
+    - lats(list): latitude of obs points
+    - lons(list): longitude of obs points
+    - k(int): number of grid points per obs point
+
+    Returns:
+    - tuple: containing
+            - numpy.ndarray: y index of the nearest points (obs points x k)
+            - numpy.ndarray: x index of the nearest points (obs points x k)
+            - numpy.ndarray: chord distance on the unit sphere (obs points x k), nearest first
+      False if the grid file does not exist
+    '''
+    index = loadGridIndex(modelCode)
+    if index is False :
+        return False
+
+    xyz = latlonToXyz(lats, lons).reshape(-1, 3)
+    if index['tree'] is not None :
+        dist, pos = index['tree'].query(xyz, k=k)
+        dist = np.asarray(dist, dtype=np.float64).reshape(len(xyz), k)
+        pos = np.asarray(pos, dtype=np.int64).reshape(len(xyz), k)
+    else :
+        pos = np.zeros((len(xyz), k), dtype=np.int64)
+        dist = np.zeros((len(xyz), k), dtype=np.float64)
+        for i, p in enumerate(xyz) :
+            dots = index['xyz'] @ p
+            near = np.argpartition(-dots, k-1)[:k]
+            near = near[np.argsort(-dots[near])]
+            pos[i] = near
+            dist[i] = np.sqrt(np.maximum(2. - 2. * dots[near], 0.))
+
+    ys, xs = np.unravel_index(pos, index['shape'])
+    return ys, xs, dist
+
+
+if __name__ == '__main__' :
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', required=True, help='comma seperated model codes. eg. gdps_ne36,klfs_ne36')
+
+    args = parser.parse_args()
+
+    for modelCode in args.model.split(',') :
+        index = buildGridIndex(modelCode)
+        if index is not False :
+            print('- Grid index : ', modelCode, index['shape'])
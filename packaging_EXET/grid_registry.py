@@ -0,0 +1,308 @@
+import os
+import json
+import argparse
+import numpy as np
+
+import _config as cfg
+import grid_index
+
+# 모델 격자 투영 정보 (grid_proj_{MODEL}.json, grid_latlon_{MODEL}.npz 옆에 저장)
+#  - latlon  : 등간격 위경도 격자 (lat0, lon0 : 격자 (0,0) 위경도, dlat, dlon : 간격, nx, ny, cyclic : 경도 360도 순환)
+#  - lambert : 람베르트 정각원추 격자 (truelat1, truelat2, standLon, lat0, lon0 : 격자 (0,0) 위경도, dx, dy : 간격(m), nx, ny)
+# 투영 정보가 없는 격자(irregular)는 grid_index 검색으로 찾는다.
+
+EARTH_RADIUS = 6370000.0 # WRF 지구 반경 (m)
+
+_projs = {}
+
+
+def loadGridProj(modelCode) :
+    '''
+    Loads the projection metadata of a model grid
+
+    Parameters:
+    - modelCode(str): model code
+
+    Returns:
+    - dict: projection metadata, False if not registered
+    '''
+    if modelCode in _projs :
+        return _projs[modelCode]
+    projFile = cfg.PATH_MODEL_GRID_PROJ.format(MODEL=modelCode)
+    if os.path.exists(projFile) == False :
+        return False
+    with open(projFile, 'r') as f :
+        proj = json.load(f)
+    _projs[modelCode] = proj
+    return proj
+
+
+def saveGridProj(modelCode, proj) :
+    '''
+    Saves the projection metadata of a model grid (atomic)
+
+    Parameters:
+    - modelCode(str): model code
+    - proj(dict): projection metadata
+
+    Returns:
+    - None
+    '''
+    projFile = cfg.PATH_MODEL_GRID_PROJ.format(MODEL=modelCode)
+    os.makedirs(os.path.dirname(projFile), exist_ok=True)
+    tmpFile = projFile + '.' + str(os.getpid()) + '.tmp'
+    with open(tmpFile, 'w') as f :
+        json.dump(proj, f, indent=2)
+    os.replace(tmpFile, projFile)
+    _projs[modelCode] = proj
+
+
+def _lambertConst(proj) :
+    phi1 = np.radians(proj['truelat1'])
+    phi2 = np.radians(proj['truelat2'])
+    if abs(proj['truelat1'] - proj['truelat2']) < 1e-6 :
+        n = np.sin(phi1)
+    else :
+        n = np.log(np.cos(phi1) / np.cos(phi2)) / np.log(np.tan(np.pi/4 + phi2/2) / np.tan(np.pi/4 + phi1/2))
+    F = np.cos(phi1) * np.tan(np.pi/4 + phi1/2)**n / n
+    return n, F
+
+
+def _lambertPlane(proj, lats, lons) :
+    '''
+    Projects latitude / longitude to the Lambert conformal plane (m)
+    '''
+    n, F = _lambertConst(proj)
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    dlon = (np.asarray(lons, dtype=np.float64) - proj['standLon'] + 180.) % 360. - 180.
+    rho = EARTH_RADIUS * F / np.tan(np.pi/4 + lat/2)**n
+    theta = n * np.radians(dlon)
+    return rho * np.sin(theta), -rho * np.cos(theta)
+
+
+def lambertToXy(proj, lats, lons) :
+    '''
+    Converts latitude / longitude to fractional grid indices of a Lambert conformal grid
+
+    Returns:
+    - tuple: (y index, x index) as float arrays
+    '''
+    px, py = _lambertPlane(proj, lats, lons)
+    px0, py0 = _lambertPlane(proj, proj['lat0'], proj['lon0'])
+    return (py - py0) / proj['dy'], (px - px0) / proj['dx']
+
+
+def latlonGridToXy(proj, lats, lons) :
+    '''
+    Converts latitude / longitude to fractional grid indices of a regular latitude / longitude grid
+
+    Returns:
+    - tuple: (y index, x index) as float arrays
+    '''
+    ys = (np.asarray(lats, dtype=np.float64) - proj['lat0']) / proj['dlat']
+    dlon = np.asarray(lons, dtype=np.float64) - proj['lon0']
+    if proj.get('cyclic', False) :
+        # 순환 격자는 격자 진행 방향으로 [0, 360)
+        if proj['dlon'] > 0 :
+            dlon = dlon % 360.
+        else :
+            dlon = -((-dlon) % 360.)
+    else :
+        # 영역 격자는 lon0 기준 (-180, 180] (서쪽 밖의 지점이 동쪽 끝으로 가지 않게)
+        dlon = 180. - (180. - dlon) % 360.
+    xs = dlon / proj['dlon']
+    return ys, xs
+
+
+def latlon_to_xy(modelCode, lats, lons) :
+    '''
+    Finds the nearest grid point (y, x) of every point, directly from the projection when the grid is registered
+
+    Parameters:
+    - modelCode(str): model code
+    - lats(list): latitude of points
+    - lons(list): longitude of points
+
+    Returns:
+    - tuple: containing
+            - numpy.ndarray: Index of the nearest point in the grid (y-coordinate)
+            - numpy.ndarray: Index of the nearest point in the grid (x-coordinate)
+      False if the grid is neither registered nor has a grid file
+    '''
+    proj = loadGridProj(modelCode)
+    if proj is False or proj['type'] not in ['latlon', 'lambert'] :
+        nearest = grid_index.findNearestPoints(modelCode, lats, lons)
+        if nearest is False :
+            return False
+        return nearest[0], nearest[1]
+
+    if proj['type'] == 'lambert' :
+        ys, xs = lambertToXy(proj, lats, lons)
+    else :
+        ys, xs = latlonGridToXy(proj, lats, lons)
+
+    ys = np.clip(np.rint(ys).astype(np.int64), 0, proj['ny']-1)
+    xs = np.rint(xs).astype(np.int64)
+    if proj.get('cyclic', False) :
+        xs = xs % proj['nx']
+    else :
+        xs = np.clip(xs, 0, proj['nx']-1)
+    return ys, xs
+
+
+def projLatlonFromGrid(lats, lons) :
+    '''
+    Detects a regular latitude / longitude grid from 2-D coordinate arrays
+
+    Returns:
+    - dict: projection metadata, False if the grid is not regular
+    '''
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    if lats.ndim != 2 or lats.shape[0] < 2 or lats.shape[1] < 2 :
+        return False
+    if np.ptp(lats, axis=1).max() > 1e-6 or np.ptp(lons, axis=0).max() > 1e-6 :
+        return False
+    dlats = np.diff(lats[:, 0])
+    dlons = np.diff(lons[0, :])
+    if np.ptp(dlats) > 1e-4 or np.ptp(dlons) > 1e-4 :
+        return False
+
+    ny, nx = lats.shape
+    dlon = float(dlons.mean())
+    return {
+        'type': 'latlon',
+        'lat0': float(lats[0, 0]),
+        'lon0': float(lons[0, 0]),
+        'dlat': float(dlats.mean()),
+        'dlon': dlon,
+        'nx': nx,
+        'ny': ny,
+        'cyclic': bool(abs(abs(dlon) * nx - 360.) < 1e-4)
+    }
+
+
+def projLambertFromGrid(lats, lons, truelat1, truelat2, standLon) :
+    '''
+    Makes Lambert conformal projection metadata from 2-D coordinate arrays and the projection parameters
+    (grid spacing is taken from the projected coordinates)
+
+    Returns:
+    - dict: projection metadata
+    '''
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    ny, nx = lats.shape
+    proj = {
+        'type': 'lambert',
+        'truelat1': float(truelat1),
+        'truelat2': float(truelat2),
+        'standLon': float(standLon),
+        'lat0': float(lats[0, 0]),
+        'lon0': float(lons[0, 0]),
+        'dx': 1.0,
+        'dy': 1.0,
+        'nx': nx,
+        'ny': ny
+    }
+    px, py = _lambertPlane(proj, lats, lons)
+    proj['dx'] = float((px[:, -1] - px[:, 0]).mean() / (nx - 1))
+    proj['dy'] = float((py[-1, :] - py[0, :]).mean() / (ny - 1))
+    return proj
+
+
+def projFromWrf(ncFile) :
+    '''
+    Makes projection metadata from a WRF output file (MAP_PROJ, TRUELAT1/2, STAND_LON, XLAT/XLONG)
+
+    Returns:
+    - dict: projection metadata, False if the file is not a Lambert conformal WRF file
+    '''
+    import netCDF4
+    f = netCDF4.Dataset(ncFile)
+    if getattr(f, 'MAP_PROJ', None) != 1 :
+        f.close()
+        return False
+    lats = np.asarray(f.variables['XLAT'][0][:])
+    lons = np.asarray(f.variables['XLONG'][0][:])
+    proj = projLambertFromGrid(lats, lons, f.TRUELAT1, f.TRUELAT2, f.STAND_LON)
+    f.close()
+    return proj
+
+
+def checkGridProj(modelCode, proj) :
+    '''
+    Compares the projection with grid_latlon_{MODEL}.npz
+
+    Returns:
+    - float: max distance (in grid cells) between the projected and the stored grid indices, False without grid file
+    '''
+    gridLatlon = grid_index.gridFiles(modelCode)[0]
+    if os.path.exists(gridLatlon) == False :
+        return False
+    with np.load(gridLatlon, allow_pickle = True) as g :
+        lats = np.asarray(g['lats'])
+        lons = np.asarray(g['lons'])
+    if proj['type'] == 'lambert' :
+        ys, xs = lambertToXy(proj, lats, lons)
+    else :
+        ys, xs = latlonGridToXy(proj, lats, lons)
+    yTrue, xTrue = np.indices(lats.shape)
+    dx = np.abs(xs - xTrue)
+    if proj.get('cyclic', False) :
+        dx = np.minimum(dx, proj['nx'] - dx)
+    return float(max(np.abs(ys - yTrue).max(), dx.max()))
+
+
+def registerGrid(modelCode, wrfFile=None, lambert=None) :
+    '''
+    Registers the projection of a model grid from a WRF file, from the grid file and Lambert parameters,
+    or (regular latitude / longitude grids) from the grid file alone
+
+    Parameters:
+    - modelCode(str): model code
+    - wrfFile(str): WRF output file of the model (Lambert conformal grids)
+    - lambert(tuple): (truelat1, truelat2, standLon) of a Lambert conformal grid file
+
+    Returns:
+    - dict: registered projection metadata, False if the grid is irregular (grid_index is used)
+    '''
+    if wrfFile is not None :
+        proj = projFromWrf(wrfFile)
+    else :
+        gridFile = grid_index.gridFiles(modelCode)[0]
+        if os.path.exists(gridFile) == False :
+            print('[ERROR] grid file not exists. ' + gridFile)
+            return False
+        with np.load(gridFile, allow_pickle = True) as g :
+            if lambert is not None :
+                proj = projLambertFromGrid(g['lats'], g['lons'], *lambert)
+            else :
+                proj = projLatlonFromGrid(g['lats'], g['lons'])
+    if proj is False :
+        print('[WARN] irregular grid, grid_index is used : ' + modelCode)
+        return False
+
+    err = checkGridProj(modelCode, proj)
+    if err is not False and err > 0.1 :
+        print(f'[WARN] projection does not match the grid file ({err:.3f} cells), not registered : ' + modelCode)
+        return False
+    saveGridProj(modelCode, proj)
+    return proj
+
+
+if __name__ == '__main__' :
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', required=True, help='model code')
+    parser.add_argument('--wrf', required=False, help='WRF output file for Lambert conformal grids (klfs_ne36, klfs_n128)')
+    parser.add_argument('--lambert', required=False, help='truelat1,truelat2,standLon of a Lambert conformal grid file (eg. rdps_ne36)')
+
+    args = parser.parse_args()
+
+    lambert = None
+    if args.lambert is not None :
+        lambert = tuple(float(v) for v in args.lambert.split(','))
+    proj = registerGrid(args.model, args.wrf, lambert)
+    if proj is not False :
+        print('- Grid registry : ', args.model, proj['type'], proj['nx'], proj['ny'])
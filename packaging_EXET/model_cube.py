@@ -0,0 +1,200 @@
+from datetime import datetime
+import os
+import json
+import argparse
+import importlib
+import numpy as np
+
+import _config as cfg
+import grid_index
+import grid_registry
+from model_extract import sampler
+
+# 영역 모델 큐브 : cube[stepIdx, y - y0, x - x0] (float32, 추출 파일과 같은 step 별 강수량, 결측은 NaN)
+#  - 모델 자료 받은 뒤 실행 (모델, 실행시각) 마다 한 파일, cfg.modelCubeDomain 영역만 잘라서 저장
+#  - 큐브는 모델 추출 모듈에 영역의 모든 격자점을 지점으로 넘겨서 만든다 (지점 추출과 같은 값)
+#  - model_rain_extract 는 큐브가 있으면 모델 파일을 풀지 않고 큐브에서 지점 값을 읽는다
+#    보간 지점(ys, xs, ws : stn_weights)은 이웃 격자점 큐브 값의 가중합 (소수 둘째 자리로 반올림)
+#  - meta : y0, x0 (전체 격자에서 영역 시작 위치), fcstInterval, fcstMaxHour, lats, lons (영역 위경도), proj (grid_registry 투영 정보 json)
+
+# 지점마다 wgrib2 -ijlat 인자를 주는 추출 모듈은 격자 전체를 넘길 수 없음 (gdps_n128nc, ldps_n128nc 사용)
+CUBE_UNSUPPORTED = ['gdps_n128', 'ldps_n128']
+
+
+def cubePaths(modelCode, modelDt) :
+    cubeFile = cfg.PATH_MODEL_CUBE.format(MODEL=modelCode, YYYY=modelDt.strftime('%Y'), YYYYMMDDHH=modelDt.strftime('%Y%m%d%H'))
+    metaFile = cfg.PATH_MODEL_CUBE_META.format(MODEL=modelCode, YYYY=modelDt.strftime('%Y'), YYYYMMDDHH=modelDt.strftime('%Y%m%d%H'))
+    return cubeFile, metaFile
+
+
+def domainBox(modelCode, domain=None) :
+    '''
+    Finds the grid index box that covers the domain
+
+    Parameters:
+    - modelCode(str): model code
+    - domain(dict): latMin, latMax, lonMin, lonMax (default cfg.modelCubeDomain)
+
+    Returns:
+    - tuple: (y0, y1, x0, x1, lats, lons) box (end exclusive) and the latitude / longitude of the box,
+      False if the grid file does not exist or no grid point is in the domain
+    '''
+    if domain is None :
+        domain = cfg.modelCubeDomain
+    gridFile = grid_index.gridFiles(modelCode)[0]
+    if os.path.exists(gridFile) == False :
+        print('[ERROR] grid file not exists. ' + gridFile)
+        return False
+    with np.load(gridFile, allow_pickle = True) as g :
+        lats = np.asarray(g['lats'], dtype=np.float64)
+        lons = np.asarray(g['lons'], dtype=np.float64)
+
+    # 경도는 0~360 / -180~180 격자 모두 비교할 수 있게 lonMin 기준으로 계산
+    inDomain = (lats >= domain['latMin']) & (lats <= domain['latMax']) & ((lons - domain['lonMin']) % 360. <= domain['lonMax'] - domain['lonMin'])
+    ys, xs = np.nonzero(inDomain)
+    if len(ys) == 0 :
+        print('[ERROR] no grid point in the domain : ' + modelCode)
+        return False
+    y0, y1, x0, x1 = int(ys.min()), int(ys.max()) + 1, int(xs.min()), int(xs.max()) + 1
+    return y0, y1, x0, x1, lats[y0:y1, x0:x1], lons[y0:y1, x0:x1]
+
+
+def buildModelCube(modelCode, modelDt, interval, maxHour, workers=1, domain=None) :
+    '''
+    Decodes a model run once for every grid point of the domain and saves the regional cube
+
+    Parameters:
+    - modelCode(str): model code
+    - modelDt(datetime): model run time
+    - interval(int): forecast interval (hour)
+    - maxHour(int): max forecast hour
+    - workers(int): number of forecast steps decoded concurrently
+    - domain(dict): latMin, latMax, lonMin, lonMax (default cfg.modelCubeDomain)
+
+    Returns:
+    - tuple: (y0, x0, cube shape), False if the cube can not be made
+    '''
+    if modelCode in CUBE_UNSUPPORTED :
+        print(f'[ERROR] model cube is not supported for {modelCode}')
+        return False
+    box = domainBox(modelCode, domain)
+    if box is False :
+        return False
+    y0, y1, x0, x1, lats, lons = box
+    ny = y1 - y0
+    nx = x1 - x0
+    nStep = maxHour // interval
+
+    yy, xx = np.mgrid[y0:y1, x0:x1]
+    gridXyList = [{'stn': i, 'x': int(x), 'y': int(y)} for i, (y, x) in enumerate(zip(yy.ravel(), xx.ravel()))]
+
+    modelExtractor = importlib.import_module('model_extract.' + modelCode)
+    values = modelExtractor.model_extract(modelDt, interval, maxHour, gridXyList, cfg.PATH_TMP, workers)
+    if values is None :
+        print(f'[ERROR] {modelCode} model cube failed. {modelDt.strftime("%Y%m%d%H")}')
+        return False
+
+    cubeFile, metaFile = cubePaths(modelCode, modelDt)
+    os.makedirs(os.path.dirname(cubeFile), exist_ok=True)
+
+    tmpFile = cubeFile + '.tmp.npy'
+    cube = np.lib.format.open_memmap(tmpFile, mode='w+', dtype=np.float32, shape=(nStep, ny, nx))
+    cube[:] = np.asarray(values, dtype=np.float32).reshape(ny, nx, nStep).transpose(2, 0, 1)
+    cube.flush()
+    del cube
+
+    proj = grid_registry.loadGridProj(modelCode)
+    tmpMeta = metaFile + '.tmp'
+    with open(tmpMeta, 'wb') as f :
+        np.savez(f, y0=y0, x0=x0, fcstInterval=interval, fcstMaxHour=maxHour, lats=lats, lons=lons,
+                 proj=json.dumps(proj if proj is not False else {}))
+    os.replace(tmpFile, cubeFile)
+    os.replace(tmpMeta, metaFile)
+    return y0, x0, (nStep, ny, nx)
+
+
+def loadModelCube(modelCode, modelDt) :
+    '''
+    Opens the regional cube of a model run as a memory map
+
+    Parameters:
+    - modelCode(str): model code
+    - modelDt(datetime): model run time
+
+    Returns:
+    - tuple: containing
+            - numpy.memmap: cube (steps x y x x, float32)
+            - dict: meta (y0, x0, fcstInterval, fcstMaxHour, lats, lons, proj)
+      False if the cube does not exist
+    '''
+    cubeFile, metaFile = cubePaths(modelCode, modelDt)
+    if os.path.exists(cubeFile) == False or os.path.exists(metaFile) == False :
+        return False
+
+    with np.load(metaFile) as m :
+        meta = {k: m[k] for k in m.files}
+    for k in ['y0', 'x0', 'fcstInterval', 'fcstMaxHour'] :
+        meta[k] = int(meta[k])
+    meta['proj'] = json.loads(str(meta['proj']))
+    cube = np.load(cubeFile, mmap_mode='r')
+    return cube, meta
+
+
+def extractFromCube(modelCode, modelDt, interval, maxHour, stnXyList) :
+    '''
+    Reads station values from the regional cube
+
+    Parameters:
+    - modelCode(str): model code
+    - modelDt(datetime): model run time
+    - interval(int): forecast interval (hour)
+    - maxHour(int): max forecast hour
+    - stnXyList(list): station list (stn, x, y), or with interpolation neighbours (ys, xs, ws)
+
+    Returns:
+    - tuple: containing
+            - numpy.ndarray: values (stations x steps, float32) in stnXyList order, NaN for stations outside the cube
+            - list: row index of the stations outside the cube (with any neighbour outside the cube)
+      False if there is no cube of the run for the interval / max hour
+    '''
+    loaded = loadModelCube(modelCode, modelDt)
+    if loaded is False :
+        return False
+    cube, meta = loaded
+    if meta['fcstInterval'] != interval or meta['fcstMaxHour'] != maxHour :
+        return False
+
+    nStep, ny, nx = cube.shape
+    stnIds, ys, xs, ws = sampler.stationIndex(stnXyList)
+    ys = ys - meta['y0']
+    xs = xs - meta['x0']
+    inside = (ys >= 0) & (ys < ny) & (xs >= 0) & (xs < nx)
+
+    values = np.full((len(stnXyList), nStep), np.nan, dtype=np.float32)
+    if ws is None :
+        values[inside] = cube[:, ys[inside], xs[inside]].T
+        return values, np.nonzero(~inside)[0].tolist()
+
+    # 이웃 K 개가 모두 큐브 안에 있는 지점만 (steps x 지점 x K) 로 모아서 가중합
+    inside = inside.all(axis=1)
+    near = cube[:, ys[inside], xs[inside]]
+    values[inside] = sampler.finish((near * ws[inside].astype(np.float32)).sum(axis=-1).T)
+    return values, np.nonzero(~inside)[0].tolist()
+
+
+if __name__ == '__main__' :
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', required=True, help='comma seperated model codes. eg. gdps_ne36,klfs_ne36')
+    parser.add_argument('--modelTm', required=True, help='yyyymmddhh')
+    parser.add_argument('--workers', required=False, type=int, default=1, help='number of forecast steps decoded concurrently (default 1)')
+
+    args = parser.parse_args()
+
+    modelDt = datetime.strptime(args.modelTm, '%Y%m%d%H')
+    for modelCode in args.model.split(',') :
+        fcstInterval = cfg.modelConf[modelCode]['fcstInterval']
+        extractMaxHour = cfg.modelConf[modelCode]['modelExtractHours']
+        rst = buildModelCube(modelCode, modelDt, fcstInterval, extractMaxHour, args.workers)
+        if rst is not False :
+            print('- Model Cube : ', modelCode, args.modelTm, 'y0:', rst[0], 'x0:', rst[1], 'shape:', rst[2])
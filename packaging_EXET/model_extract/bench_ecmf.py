@@ -0,0 +1,94 @@
+# ecmf 지점 추출 시간 비교 (합성 GRIB 크기 배열)
+#  - 기존 : 지점마다 g[0].values[y][x] -> 메시지를 지점 수 만큼 다시 풀기
+#  - 변경 : step 마다 g[0].values 한 번 -> sampler.gather 로 모든 지점
+# 실행 (packaging_EXET 에서) : python -m model_extract.bench_ecmf --stations 700 --steps 4
+
+import time
+import argparse
+import numpy as np
+from model_extract import sampler
+
+
+class SyntheticMessage :
+    '''
+    GRIB message stand-in, .values unpacks the packed field on every access (like pygrib)
+    '''
+    def __init__(self, packed, scale, offset) :
+        self.packed = packed
+        self.scale = scale
+        self.offset = offset
+
+    @property
+    def values(self) :
+        return self.packed.astype(np.float64) * self.scale + self.offset
+
+
+def makeMessages(nStep, ny, nx, seed=0) :
+    '''
+    Makes accumulated total precipitation messages ([m], 16 bit packed) of a run
+    '''
+    rng = np.random.default_rng(seed)
+    scale = 1e-5
+    accum = np.zeros((ny, nx), dtype=np.int64)
+    messages = []
+    for i in range(nStep) :
+        accum += rng.integers(0, 300, size=(ny, nx))
+        messages.append([SyntheticMessage(np.minimum(accum, 65535).astype(np.uint16), scale, 0.)])
+    return messages
+
+
+def extractPerStation(messages, stnXyList) :
+    '''
+    Previous ecmf extraction (per station decode and round)
+    '''
+    stnLastRains = {}
+    stnRains = {}
+    for g in messages :
+        for stnInfo in stnXyList :
+            stn = stnInfo['stn']
+            tmpVal = g[0].values[stnInfo['y']][stnInfo['x']]*1000
+            prec = tmpVal - stnLastRains[stn] if stn in stnLastRains else tmpVal
+            stnLastRains[stn] = tmpVal
+            stnRains.setdefault(stn, []).append(round(prec, 2))
+    return stnRains
+
+
+def extractDecodeOnce(messages, stnXyList) :
+    '''
+    Current ecmf extraction (decode once per step, vectorized gather)
+    '''
+    stnIds, ys, xs, ws = sampler.stationIndex(stnXyList)
+    accum = sampler.newValues(stnXyList, len(messages), np.float64)
+    for i, g in enumerate(messages) :
+        field = g[0].values
+        accum[:, i] = sampler.gather(field, ys, xs, ws) * 1000
+    return sampler.finish(sampler.deaccumulate(accum))
+
+
+if __name__ == '__main__' :
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--stations', required=False, type=int, default=700, help='number of stations')
+    parser.add_argument('--steps', required=False, type=int, default=4, help='number of forecast steps')
+    parser.add_argument('--ny', required=False, type=int, default=361, help='grid rows (e025 nhem : 361)')
+    parser.add_argument('--nx', required=False, type=int, default=1440, help='grid columns (e025 nhem : 1440)')
+
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    stnXyList = [{'stn': 90 + i, 'y': int(rng.integers(0, args.ny)), 'x': int(rng.integers(0, args.nx))} for i in range(args.stations)]
+    messages = makeMessages(args.steps, args.ny, args.nx)
+
+    t0 = time.time()
+    old = extractPerStation(messages, stnXyList)
+    tOld = time.time() - t0
+
+    t0 = time.time()
+    new = extractDecodeOnce(messages, stnXyList)
+    tNew = time.time() - t0
+
+    oldArr = np.array([old[stnInfo['stn']] for stnInfo in stnXyList], dtype=np.float32)
+    print(f"- grid {args.ny}x{args.nx}, stations {args.stations}, steps {args.steps}")
+    print(f"- per station decode : {tOld:.3f}s")
+    print(f"- decode once        : {tNew:.4f}s (x{tOld/max(tNew, 1e-9):.0f})")
+    print(f"- same values        : {np.array_equal(oldArr, new)}")
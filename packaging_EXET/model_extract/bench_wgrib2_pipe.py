@@ -0,0 +1,58 @@
+# wgrib2 출력 읽기 시간 비교 (합성 격자, wgrib2 대신 같은 크기 float32 자료를 내보내는 cat 사용)
+#  - 기존 : 하위 프로세스가 임시 파일에 쓰고 -> 다시 열어서 읽고 -> 삭제
+#  - 변경 : 하위 프로세스 stdout 파이프 -> numpy (임시 파일 없음)
+# wgrib2 -netcdf 의 netCDF 인코딩 / netCDF4 해독 시간은 포함되지 않으므로 실제 차이는 이보다 크다.
+# 실행 (packaging_EXET 에서) : python -m model_extract.bench_wgrib2_pipe --steps 20
+
+import os
+import time
+import uuid
+import argparse
+import subprocess
+import numpy as np
+
+
+def readTempFile(srcFile, shape, tmpPath) :
+    tmpFile = tmpPath + '/' + str(uuid.uuid4()).replace('-', '') + '.bin'
+    subprocess.run(['cp', srcFile, tmpFile], check=True)
+    field = np.fromfile(tmpFile, dtype=np.float32).reshape(shape)
+    os.remove(tmpFile)
+    return field
+
+
+def readPipe(srcFile, shape) :
+    output = subprocess.run(['cat', srcFile], capture_output=True, check=True)
+    return np.frombuffer(output.stdout, dtype=np.float32).reshape(shape)
+
+
+if __name__ == '__main__' :
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--steps', required=False, type=int, default=20, help='number of forecast steps')
+    parser.add_argument('--ny', required=False, type=int, default=1920, help='grid rows (gdps n128 : 1920)')
+    parser.add_argument('--nx', required=False, type=int, default=2560, help='grid columns (gdps n128 : 2560)')
+    parser.add_argument('--tmpPath', required=False, default='../DAIN/TMP', help='temp directory')
+
+    args = parser.parse_args()
+    os.makedirs(args.tmpPath, exist_ok=True)
+
+    shape = (args.ny, args.nx)
+    srcFile = args.tmpPath + '/bench_wgrib2_pipe.src'
+    np.random.default_rng(0).random(shape, dtype=np.float32).tofile(srcFile)
+
+    t0 = time.time()
+    for step in range(args.steps) :
+        a = readTempFile(srcFile, shape, args.tmpPath)
+    tTmp = (time.time() - t0) / args.steps
+
+    t0 = time.time()
+    for step in range(args.steps) :
+        b = readPipe(srcFile, shape)
+    tPipe = (time.time() - t0) / args.steps
+    os.remove(srcFile)
+
+    stepMb = args.ny * args.nx * 4 / 1e6
+    print(f"- grid {args.ny}x{args.nx} ({stepMb:.1f} MB), steps {args.steps}")
+    print(f"- temp file : {tTmp*1000:.1f} ms/step, temp written {stepMb*args.steps:.1f} MB")
+    print(f"- pipe      : {tPipe*1000:.1f} ms/step, temp written 0.0 MB")
+    print(f"- same values : {np.array_equal(a, b)}")
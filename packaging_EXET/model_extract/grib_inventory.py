@@ -0,0 +1,124 @@
+import os
+import re
+import subprocess
+
+import _config as cfg
+import file_cache
+
+# GRIB 파일 메시지 목록(inventory)으로 필요한 메시지만 바이트 범위로 읽음
+#  - 목록 형식은 wgrib2 -s / .idx 와 같음 (메시지번호:시작 바이트:d=시각:변수:층:예보시간:)
+#  - GRIB 파일 옆 {파일}.idx 가 있으면 사용, 없으면 wgrib2 -s 로 만들어 PATH_MODEL_GRIB_IDX 에 저장
+#    (-s 는 메시지 머리만 읽고 자료는 풀지 않음), GRIB 파일보다 오래된 목록은 다시 만든다
+#  - 선택은 wgrib2 -match 와 같이 목록 줄에 정규식 검색
+
+_inventories = file_cache.FileCache('grib_idx', 256)
+
+
+def idxFiles(gribPath) :
+    '''
+    Returns the inventory files of a GRIB file (the .idx next to it, the cached one)
+    '''
+    return [gribPath + '.idx', cfg.PATH_MODEL_GRIB_IDX.format(NAME=os.path.basename(gribPath))]
+
+
+def parseInventory(text, fileSize) :
+    '''
+    Parses wgrib2 -s / .idx inventory text
+
+    Parameters:
+    - text(str): inventory lines
+    - fileSize(int): size of the GRIB file (length of the last message)
+
+    Returns:
+    - list: messages (dict : 'line', 'offset', 'length'), submessages share the offset of their message
+    '''
+    msgs = []
+    for line in text.splitlines() :
+        cols = line.split(':')
+        if len(cols) < 3 or cols[1].isdigit() == False :
+            continue
+        msgs.append({'line': line, 'offset': int(cols[1]), 'length': 0})
+
+    offsets = sorted(set(msg['offset'] for msg in msgs)) + [fileSize]
+    nextOffsets = {offsets[i]: offsets[i+1] for i in range(len(offsets)-1)}
+    for msg in msgs :
+        msg['length'] = nextOffsets[msg['offset']] - msg['offset']
+    return msgs
+
+
+def buildInventory(gribPath) :
+    '''
+    Makes the inventory of a GRIB file with wgrib2 -s and saves it (atomic)
+
+    Returns:
+    - str: inventory text, False if wgrib2 failed
+    '''
+    try :
+        output = subprocess.run(['wgrib2', gribPath, '-s'], capture_output=True, text=True, check=True)
+    except subprocess.CalledProcessError as grepexc:
+        print("[ERROR] during wgrib2 inventory", grepexc.returncode, grepexc.stderr)
+        return False
+
+    idxFile = idxFiles(gribPath)[1]
+    try :
+        os.makedirs(os.path.dirname(idxFile), exist_ok=True)
+        tmpFile = idxFile + '.' + str(os.getpid()) + '.tmp'
+        with open(tmpFile, 'w') as f :
+            f.write(output.stdout)
+        os.replace(tmpFile, idxFile)
+    except Exception as e :
+        print("[WARN] Error during save grib inventory", idxFile)
+        print(e)
+    return output.stdout
+
+
+def _readInventory(gribPath) :
+    gribMtime = os.path.getmtime(gribPath)
+    text = False
+    for idxFile in idxFiles(gribPath) :
+        if os.path.exists(idxFile) and os.path.getmtime(idxFile) >= gribMtime :
+            with open(idxFile, 'r') as f :
+                text = f.read()
+            break
+    if text is False :
+        text = buildInventory(gribPath)
+        if text is False :
+            return False
+    return parseInventory(text, os.path.getsize(gribPath))
+
+
+def loadInventory(gribPath) :
+    '''
+    Returns the message inventory of a GRIB file (cached by path and mtime)
+
+    Parameters:
+    - gribPath(str): GRIB file path
+
+    Returns:
+    - list: messages (see parseInventory), False if the inventory can not be made
+    '''
+    return _inventories.get(gribPath, lambda : _readInventory(gribPath))
+
+
+def readMessages(gribPath, match) :
+    '''
+    Reads only the GRIB messages whose inventory line matches (like wgrib2 -match)
+
+    Parameters:
+    - gribPath(str): GRIB file path
+    - match(str): regular expression (eg. "APCP", ":(NCPCP|SNOL)")
+
+    Returns:
+    - bytes: matched messages in file order (b'' if none), None if the inventory can not be made
+    '''
+    msgs = loadInventory(gribPath)
+    if msgs is False :
+        return None
+
+    ranges = sorted(set((msg['offset'], msg['length']) for msg in msgs if re.search(match, msg['line'])))
+    chunks = []
+    with open(gribPath, 'rb') as f :
+        for offset, length in ranges :
+            f.seek(offset)
+            chunks.append(f.read(length))
+    return b''.join(chunks)
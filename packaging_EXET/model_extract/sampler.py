@@ -0,0 +1,160 @@
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+# 모델 격자 -> 지점 추출 공통 함수
+#  - 지점 목록을 한 번 정수 인덱스 배열로 바꾸고, step 마다 한 번의 fancy index 로 모든 지점을 뽑는다
+#  - 결과는 (지점 x step) float32 배열, 행 순서는 stnXyList 순서 (결측은 NaN)
+#  - 지점에 보간 이웃(ys, xs, ws : stn_weights)이 있으면 이웃 격자값의 가중합 (없으면 최근접 격자 x, y)
+#  - 계산은 모델 자료형(float32) 그대로 하고 마지막에 소수 둘째 자리로 반올림 (기존 지점별 계산과 같은 값)
+#  - 전구 격자는 지점을 모두 포함하는 영역(window)만 netCDF 에서 읽는다 (한반도 영역 수백 KB, 전구 수십 MB)
+
+#  - step 파일 읽기는 workers 개 스레드로 동시에 할 수 있음 (wgrib2 프로세스로 해독하는 추출기에서 효과가 있음)
+#    netCDF4 / pygrib (netCDF-C, HDF5, eccodes) 는 파일이 달라도 스레드 안전하지 않으므로 그 호출은 DECODE_LOCK 안에서 하나씩
+#    결과는 항상 step 순서로 모은 뒤 누적 -> step 값 변환
+
+WINDOW_MARGIN = 2 # 지점 영역 바깥 여유 격자 수
+
+DECODE_LOCK = threading.Lock() # netCDF4 / pygrib 호출은 프로세스 안에서 한 번에 하나
+
+
+def stationIndex(stnXyList) :
+    '''
+    Converts the station list to index arrays
+
+    Parameters:
+    - stnXyList(list): A list of dictionaries containing station information (stn, x, y)
+
+    Returns:
+    - tuple: containing
+            - numpy.ndarray: station IDs
+            - numpy.ndarray: y index of each station (stations x K with interpolation neighbours)
+            - numpy.ndarray: x index of each station (stations x K with interpolation neighbours)
+            - numpy.ndarray: weight of each neighbour (stations x K), None for the nearest grid point
+    '''
+    stnIds = np.array([stnInfo['stn'] for stnInfo in stnXyList], dtype=np.int64)
+    if len(stnXyList) > 0 and 'ws' in stnXyList[0] :
+        ys = np.array([stnInfo['ys'] for stnInfo in stnXyList], dtype=np.intp)
+        xs = np.array([stnInfo['xs'] for stnInfo in stnXyList], dtype=np.intp)
+        ws = np.array([stnInfo['ws'] for stnInfo in stnXyList], dtype=np.float64)
+        return stnIds, ys, xs, ws
+    ys = np.array([stnInfo['y'] for stnInfo in stnXyList], dtype=np.intp)
+    xs = np.array([stnInfo['x'] for stnInfo in stnXyList], dtype=np.intp)
+    return stnIds, ys, xs, None
+
+
+def window(ys, xs, margin=WINDOW_MARGIN) :
+    '''
+    Returns the bounding box (plus margin) of the stations and the station indices inside the box
+    ex) field = ncfile['precc'][0, ySlice, xSlice] -> gather(field, wys, wxs)
+
+    Parameters:
+    - ys(numpy.ndarray): y index of each station
+    - xs(numpy.ndarray): x index of each station
+    - margin(int): grid cells added around the box
+
+    Returns:
+    - tuple: containing
+            - slice: y range of the box
+            - slice: x range of the box
+            - numpy.ndarray: y index of each station in the box
+            - numpy.ndarray: x index of each station in the box
+    '''
+    if len(ys) == 0 :
+        return slice(0, 0), slice(0, 0), ys, xs
+    y0 = max(int(ys.min()) - margin, 0)
+    x0 = max(int(xs.min()) - margin, 0)
+    # 끝은 격자 크기를 넘어도 slice 에서 잘림
+    ySlice = slice(y0, int(ys.max()) + margin + 1)
+    xSlice = slice(x0, int(xs.max()) + margin + 1)
+    return ySlice, xSlice, ys - y0, xs - x0
+
+
+def gather(field, ys, xs, ws=None) :
+    '''
+    Picks the grid value of every station from a 2-D field
+
+    Parameters:
+    - field(numpy.ndarray): 2-D field (y x x), masked values become NaN
+    - ys(numpy.ndarray): y index of each station (or of the neighbours, stations x K)
+    - xs(numpy.ndarray): x index of each station (or of the neighbours, stations x K)
+    - ws(numpy.ndarray): neighbour weights (stations x K), None for the nearest grid point
+
+    Returns:
+    - numpy.ndarray: value of each station (field dtype, at least float32), NaN if a neighbour is missing
+    '''
+    vals = field[ys, xs]
+    dtype = np.result_type(vals.dtype, np.float32)
+    vals = np.ma.filled(np.ma.asarray(vals).astype(dtype), np.nan)
+    if ws is None :
+        return vals
+    # 희소 행렬 (지점 x 격자점, 행마다 K 개) x 격자 벡터
+    return (vals * ws.astype(dtype)).sum(axis=1)
+
+
+def newValues(stnXyList, nStep, dtype=np.float32) :
+    '''
+    Returns an empty (station x step) array filled with NaN
+    '''
+    return np.full((len(stnXyList), nStep), np.nan, dtype=dtype)
+
+
+def readSteps(readStep, steps, workers=1) :
+    '''
+    Runs readStep for every forecast step and returns the results in step order
+
+    Parameters:
+    - readStep(function): reads one step, readStep(step) -> step values (None if failed)
+    - steps(list): forecast steps
+    - workers(int): number of concurrent reads (1 : one by one, stops at the first failure)
+
+    Returns:
+    - list: step values in the order of steps, None if any step failed
+    '''
+    if workers <= 1 :
+        results = []
+        for step in steps :
+            result = readStep(step)
+            if result is None :
+                return None
+            results.append(result)
+        return results
+
+    # 스레드 수 만큼만 동시에 읽음 (wgrib2 프로세스도 workers 개로 제한), map 은 steps 순서로 돌려준다
+    with ThreadPoolExecutor(max_workers=workers) as executor :
+        results = list(executor.map(readStep, steps))
+    if any(result is None for result in results) :
+        return None
+    return results
+
+
+def stackSteps(stnXyList, results, dtype=np.float32) :
+    '''
+    Puts the step values from readSteps into a (station x step) array
+    '''
+    values = newValues(stnXyList, len(results), dtype)
+    for i, result in enumerate(results) :
+        values[:, i] = result
+    return values
+
+
+def deaccumulate(accum) :
+    '''
+    Converts accumulated values since the model run to values of each step
+
+    Parameters:
+    - accum(numpy.ndarray): accumulated values (station x step)
+
+    Returns:
+    - numpy.ndarray: step values (station x step), the first step is kept as is
+    '''
+    values = accum.copy()
+    values[:, 1:] = accum[:, 1:] - accum[:, :-1]
+    return values
+
+
+def finish(values) :
+    '''
+    Rounds the extracted values to 2 decimals and returns them as float32 (station x step)
+    '''
+    return np.round(values, 2).astype(np.float32)
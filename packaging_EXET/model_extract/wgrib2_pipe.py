@@ -0,0 +1,55 @@
+import os
+import re
+import subprocess
+import numpy as np
+from model_extract import grib_inventory
+
+# wgrib2 로 푼 격자를 임시 netCDF 파일 없이 파이프로 바로 읽음
+#  - stdout : -no_header -bin - (float32 원시 자료, 메시지 순서대로 이어짐)
+#  - stderr : -inv 목록 (-var 변수명, -nxny 격자 크기)
+#  - grib_inventory 로 필요한 메시지만 읽어서 wgrib2 표준입력으로 넘김
+#  - 격자 순서는 -netcdf 출력과 같은 wgrib2 기본값(we:sn) 이라 grid_latlon_{MODEL}.npz 인덱스를 그대로 쓴다
+
+UNDEFINED = 9.999e20 # wgrib2 결측값
+
+
+def readFields(modelPath, match) :
+    '''
+    Decodes the matched GRIB messages with wgrib2 and returns the fields
+
+    Parameters:
+    - modelPath(str): GRIB2 file path
+    - match(str): wgrib2 -match pattern (eg. "APCP", ":(NCPCP|SNOL)")
+
+    Returns:
+    - dict: variable name -> 2-D float32 field (y x x, undefined values are NaN) of the first matched message,
+            None if wgrib2 failed
+    '''
+    msgBytes = grib_inventory.readMessages(modelPath, match)
+    if msgBytes is None :
+        return None
+    try :
+        output = subprocess.run(['wgrib2', '-', '-match', match, '-inv', '/dev/stderr', '-var', '-nxny', '-no_header', '-bin', '-'],
+                                input=msgBytes, capture_output=True, check=True, env=dict(os.environ, OMP_NUM_THREADS='1'))
+    except subprocess.CalledProcessError as grepexc:
+        print("[ERROR] during wgrib2", grepexc.returncode, grepexc.stderr.decode(errors='replace'))
+        return None
+
+    inv = output.stderr.decode(errors='replace')
+    # 1:0:APCP:(1440 x 721)
+    msgs = [(varName, int(ny), int(nx)) for varName, nx, ny in re.findall(r'^\d+:\d+:([^:]+):\((\d+) x (\d+)\)', inv, re.M)]
+    data = np.frombuffer(output.stdout, dtype=np.float32)
+    if len(msgs) == 0 or data.size != sum(ny * nx for varName, ny, nx in msgs) :
+        print(f"[ERROR] wgrib2 output size mismatch {modelPath} : {data.size} values, {inv.strip()}")
+        return None
+
+    fields = {}
+    offset = 0
+    for varName, ny, nx in msgs :
+        if varName not in fields :
+            field = data[offset:offset + ny * nx].reshape(ny, nx).copy()
+            field[field >= UNDEFINED * 0.999] = np.nan
+            fields[varName] = field
+        offset += ny * nx
+    return fields
+
@@ -1,137 +1,297 @@
-#import sqlite3
-import os
-from datetime import datetime
-import argparse
-import importlib
-
-import _config as cfg
-
-
-# 지점별 데이터 추출
-
-def model_extract(modelCode, modelDt, interval, maxHour, stnXyList, obsCode) :
-    '''
-    Extracts model data for the specified model code and date, and saves the results to a text file
-
-    Parameters:
-    - modelCode(str): The code of the model to be extracted
-    - modelDt(datetime): The date and time for which the model data is to be extracted
-    - interval(int): The time interval for the forecast (in hours)
-    - maxHour(int): The maximum forecast hour
-    - stnXyList(list): A list of dictionaries containing station information (station IDs, coordinates)
-    - obsCode(str): Observation code ('aws', 'asos')
-    
-        Returns:
-        - None
-    
-    '''
-    
-    modelExtractor = importlib.import_module('model_extract.' + modelCode)
-
-    modelData = modelExtractor.model_extract(modelDt, interval, maxHour, stnXyList, cfg.PATH_TMP)
-    if modelData is None :
-        print(f'[ERROR] {modelCode} model extract failed. {modelDt.strftime("%Y%m%d%H")}')
-        return False
-
-    #txtFile = cfg.PATH_MODEL_EXTRACT_TXT.format(MODEL=modelCode, OBS=obsCode, YYYY=modelDt.strftime('%Y'), TH_HR=interval, FT_HR=maxHour, YYYYMMDDHH=modelDt.strftime('%Y%m%d%H'))
-    txtFile = cfg.PATH_MODEL_EXTRACT_TXT.format(MODEL=modelCode, OBS=obsCode, YYYY=modelDt.strftime('%Y'), YYYYMMDDHH=modelDt.strftime('%Y%m%d%H'))
-    txtFileDir = os.path.dirname(txtFile)
-    if not os.path.isdir(txtFileDir) :
-        try :
-            os.makedirs(txtFileDir)
-        except :
-            pass
-    else :
-        if os.path.exists(txtFile) :
-            os.remove(txtFile)
-    
-
-    stnIds = []
-    for stn in stnXyList :
-        stnIds.append(stn['stn'])
-    stnIds.sort()
-
-    header1 = f"# INFO, model:{modelCode}, obs:{obsCode}, ymdh:{modelDt.strftime('%Y%m%d%H')}, fcstInterval:{interval}, fcstMaxHour:{maxHour}"
-    header2 = "#   FT  "
-    for step in range(interval, maxHour+interval, interval) : 
-        header2 += format(step, "7d")
-    cont = ""
-    for sid in stnIds :
-        #stnId = str(sid)
-        cont += format(sid, "6d")
-        cont += "  "
-        for i in range(len(modelData[sid])) :
-            cont += format(modelData[sid][i], "7.2f")
-        cont += "\n"
-    
-    f = open(txtFile, 'w')
-    f.write(header1)
-    f.write("\n")
-    f.write(header2)
-    f.write("\n")
-    f.write(cont)
-    f.close()
-
-def getStnXyList(model, obs, dt) :
-    '''
-    Read file and get station information including coordinates
-
-    Parameters:
-    - model(str): model code
-    - obs(str): Observation code (aws, asos)
-    - dt(datetime): datetime for finding a file (KST)
-
-    Returns:
-    - list: A list of dictionaries contains the station ID, latitude, longitude,
-             and x, y coordinates of the station. If the file does not exist, returns False
-    '''
-    
-    xyfile = cfg.PATH_MODEL_STNXY.format(MODEL=model, OBS=obs, YYYY=dt.strftime('%Y'), YYYYMMDD=dt.strftime('%Y%m%d'))
-    if os.path.exists(xyfile) == False :
-        return False
-    # f.write(f"{stnXyInfo['stn']},{stnXyInfo['lat']},{stnXyInfo['lon']},{stnXyInfo['x']},{stnXyInfo['y']}\n")
-    stnXyList = []
-    with open(xyfile, 'r') as f:
-        # 첫 번째 줄(헤더) 건너뛰기
-        header = f.readline()
-        
-        for line in f:
-            row = line.split(',')
-            pt = {
-                'stn': int(row[0]),
-                'lat': float(row[1]),
-                'lon': float(row[2]),
-                'x': int(row[3]),
-                'y': int(row[4])
-            }
-            stnXyList.append(pt)
-        
-
-    return stnXyList
-
-
-# main
-if __name__ == '__main__' :
-
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--model', required=True, help='gdps_ne36/gdps_n128/rdps_ne36/ldps/ecmf/klfs_ne36/klfs_n128')
-    parser.add_argument('--modelTm', required=True, help='yyyymmddhh')
-    # parser.add_argument('--fcstInterval', required=True, help='hour')
-    # parser.add_argument('--fcstMaxHours', required=True, help='hour')
-    parser.add_argument('--obs', required=True, help='asos/aws')
-
-    args = parser.parse_args()
-
-    #print("- Model Extract : ", args.model, args.obs, args.modelTm, 'fcstInterval:', args.fcstInterval, 'fcstMaxHour:',args.fcstMaxHours)
-    fcstInterval = cfg.modelConf[args.model]['fcstInterval']
-    extractMaxHour = cfg.modelConf[args.model]['modelExtractHours']
-    print("- Model Extract : ", args.model, args.obs, args.modelTm, 'interval:', str(fcstInterval), 'extractHour:', str(extractMaxHour))
-
-    modelDt = datetime.strptime(args.modelTm, '%Y%m%d%H')
-
-    stnXyList = getStnXyList(args.model, args.obs, modelDt)
- 
-    #model_extract(args.model, modelDt, int(args.fcstInterval), int(args.fcstMaxHours), stnXyList, args.obs)
-    
-    model_extract(args.model, modelDt, fcstInterval, extractMaxHour, stnXyList, args.obs)
-
+#import sqlite3
+import os
+from datetime import datetime
+import argparse
+import importlib
+import numpy as np
+
+import _config as cfg
+import extract_store
+import model_cube
+import stn_weights
+
+
+# 지점별 데이터 추출
+
+def model_extract(modelCode, modelDt, interval, maxHour, stnXyList, obsCode, outFormat='txt', workers=1) :
+    '''
+    Extracts model data for the specified model code and date, and saves the results to a text and/or binary file
+
+    Parameters:
+    - modelCode(str): The code of the model to be extracted
+    - modelDt(datetime): The date and time for which the model data is to be extracted
+    - interval(int): The time interval for the forecast (in hours)
+    - maxHour(int): The maximum forecast hour
+    - stnXyList(list): A list of dictionaries containing station information (station IDs, coordinates)
+    - obsCode(str): Observation code ('aws', 'asos')
+    - outFormat(str): 'txt', 'bin' or 'both' (see extract_store)
+    - workers(int): number of forecast steps decoded concurrently (1 : one by one)
+    
+        Returns:
+        - None
+    
+    '''
+    return model_extract_networks(modelCode, modelDt, interval, maxHour, {obsCode: stnXyList}, outFormat, workers)
+
+
+def model_extract_networks(modelCode, modelDt, interval, maxHour, stnXyLists, outFormat='txt', workers=1, incremental=True, sample='nearest') :
+    '''
+    Extracts model data for several observation networks in one pass (each step is decoded once
+    for the union of the grid points) and saves one extract file per network
+
+    Parameters:
+    - modelCode(str): The code of the model to be extracted
+    - modelDt(datetime): The date and time for which the model data is to be extracted
+    - interval(int): The time interval for the forecast (in hours)
+    - maxHour(int): The maximum forecast hour
+    - stnXyLists(dict): Observation code -> station list (see getStnXyList)
+    - outFormat(str): 'txt', 'bin' or 'both' (see extract_store)
+    - workers(int): number of forecast steps decoded concurrently (1 : one by one)
+    - incremental(bool): reuse the values of stations already in the extract files, extract only new or moved stations
+    - sample(str): 'nearest' grid point, or 'bilinear' / 'idw' interpolation (see stn_weights)
+
+    Returns:
+    - bool: False if the extraction failed
+    '''
+    # 이미 추출한 지점은 기존 추출 파일 값을 그대로 쓰고, 새로 생기거나 격자 위치가 바뀐 지점만 추출
+    # 보간 추출은 지점마다 이웃 격자점과 가중치를 붙임
+    if sample != 'nearest' :
+        stnXyLists = dict(stnXyLists)
+        for obsCode in stnXyLists :
+            stnXyLists[obsCode] = stn_weights.attachWeights(modelCode, obsCode, stnXyLists[obsCode], sample)
+            if stnXyLists[obsCode] is False :
+                return False
+
+    cached = {}
+    needLists = {}
+    for obsCode, stnXyList in stnXyLists.items() :
+        cached[obsCode] = cachedExtract(modelCode, obsCode, modelDt, interval, maxHour, stnXyList, sample) if incremental else ({}, set())
+        needLists[obsCode] = [stn for stn in stnXyList if stn['stn'] not in cached[obsCode][0]]
+
+    # 관측망 지점들의 격자점 합집합 (같은 격자점, 같은 보간 이웃은 한 번만 추출)
+    gridRows = {}
+    gridXyList = []
+    for stnXyList in needLists.values() :
+        for stn in stnXyList :
+            key = pointKey(stn)
+            if key not in gridRows :
+                gridRows[key] = len(gridXyList)
+                gridXyList.append(dict(stn, stn=gridRows[key]))
+
+    gridValues = None
+    if len(gridXyList) > 0 :
+        gridValues = extractGrid(modelCode, modelDt, interval, maxHour, gridXyList, workers)
+        if gridValues is None :
+            print(f'[ERROR] {modelCode} model extract failed. {modelDt.strftime("%Y%m%d%H")}')
+            return False
+
+    for obsCode, stnXyList in stnXyLists.items() :
+        cachedRows, existingIds = cached[obsCode]
+        if len(needLists[obsCode]) == 0 and existingIds == set(stn['stn'] for stn in stnXyList) and extractExists(modelCode, obsCode, modelDt, outFormat) :
+            print(f'- Model Extract : {modelCode} {obsCode} {modelDt.strftime("%Y%m%d%H")} unchanged, {len(stnXyList)} stations')
+            continue
+
+        # 지점번호 순으로 정렬해서 저장
+        stnXyList = sorted(stnXyList, key=lambda stn : stn['stn'])
+        values = []
+        for stn in stnXyList :
+            if stn['stn'] in cachedRows :
+                values.append(cachedRows[stn['stn']])
+            else :
+                values.append(gridValues[gridRows[pointKey(stn)]])
+        values = np.array(values, dtype=np.float64).reshape(len(stnXyList), maxHour // interval)
+        saveExtract(modelCode, obsCode, modelDt, interval, maxHour, stnXyList, values, outFormat, sample)
+        if incremental :
+            print(f'- Model Extract : {modelCode} {obsCode} {modelDt.strftime("%Y%m%d%H")} extracted {len(needLists[obsCode])}, reused {len(stnXyList) - len(needLists[obsCode])} stations')
+    return True
+
+
+def pointKey(stn) :
+    if 'ws' in stn :
+        return (stn['ys'], stn['xs'], stn['ws'])
+    return (stn['y'], stn['x'])
+
+
+def extractGrid(modelCode, modelDt, interval, maxHour, gridXyList, workers=1) :
+    '''
+    Extracts the values of grid points, from the regional model cube when there is one (see model_cube)
+    and from the model files for the points outside the cube
+
+    Returns:
+    - numpy.ndarray: values (points x steps) in gridXyList order, None if the extraction failed
+    '''
+    # 보간 추출은 이웃 격자점의 큐브 값을 가중합, 이웃이 큐브 밖에 있는 지점만 모델 파일에서 읽음
+    fromCube = model_cube.extractFromCube(modelCode, modelDt, interval, maxHour, gridXyList)
+    if fromCube is False :
+        rows = list(range(len(gridXyList)))
+        gridValues = None
+    else :
+        gridValues, rows = fromCube
+        if len(rows) == 0 :
+            return gridValues
+
+    modelExtractor = importlib.import_module('model_extract.' + modelCode)
+    pointXyList = [dict(gridXyList[row], stn=i) for i, row in enumerate(rows)]
+    modelData = modelExtractor.model_extract(modelDt, interval, maxHour, pointXyList, cfg.PATH_TMP, workers)
+    if modelData is None :
+        return None
+
+    if gridValues is None :
+        # (격자점 x step) 배열, 행은 gridXyList 순서
+        return modelData
+    gridValues[rows] = modelData
+    return gridValues
+
+
+def cachedExtract(modelCode, obsCode, modelDt, interval, maxHour, stnXyList, sample='nearest') :
+    '''
+    Finds the stations whose values are already in the extract file of the model run
+
+    Parameters:
+    - modelCode(str): model code
+    - obsCode(str): Observation code
+    - modelDt(datetime): model run time
+    - interval(int): forecast interval (hour)
+    - maxHour(int): max forecast hour
+    - stnXyList(list): current station list
+    - sample(str): station sampling (nearest, bilinear, idw)
+
+    Returns:
+    - tuple: containing
+            - dict: station ID -> values (steps) of the stations that can be reused
+            - set: station IDs in the extract file
+    '''
+    ext = extract_store.readExtract(modelCode, obsCode, modelDt)
+    if ext is False :
+        return {}, set()
+    info, stnIds, values = ext
+    if info['fcstInterval'] != interval or info['fcstMaxHour'] != maxHour or info.get('sample', 'nearest') != sample :
+        return {}, set()
+
+    # 격자 위치 기록이 있으면 위치가 바뀐 지점은 다시 추출 (기록이 없는 예전 파일은 지점번호만 비교)
+    stnXy = extract_store.readExtractStnXy(modelCode, obsCode, modelDt)
+    stnRows = {int(stnId): i for i, stnId in enumerate(stnIds)}
+    cachedRows = {}
+    for stn in stnXyList :
+        i = stnRows.get(stn['stn'])
+        if i is None :
+            continue
+        if stnXy is not False and stnXy.get(stn['stn']) != (stn['x'], stn['y']) :
+            continue
+        cachedRows[stn['stn']] = np.array(values[i], dtype=np.float32)
+    return cachedRows, set(stnRows)
+
+
+def extractExists(modelCode, obsCode, modelDt, outFormat) :
+    txtFile, binFile = extract_store.extractPaths(modelCode, obsCode, modelDt)
+    if outFormat in ['txt', 'both'] and os.path.exists(txtFile) == False :
+        return False
+    if outFormat in ['bin', 'both'] and os.path.exists(binFile) == False :
+        return False
+    return True
+
+
+def saveExtract(modelCode, obsCode, modelDt, interval, maxHour, stnXyList, values, outFormat='txt', sample='nearest') :
+    '''
+    Saves the extracted values of a network to a text and/or binary file, and the grid position of the stations
+
+    Parameters:
+    - stnXyList(list): station list (sorted by station ID, row order of values)
+    - values(numpy.ndarray): precipitation (stations x steps)
+    - outFormat(str): 'txt', 'bin' or 'both' (see extract_store)
+    - sample(str): station sampling (nearest, bilinear, idw)
+
+    Returns:
+    - None
+    '''
+    stnIds = [stn['stn'] for stn in stnXyList]
+    txtFile, binFile = extract_store.extractPaths(modelCode, obsCode, modelDt)
+    txtFileDir = os.path.dirname(txtFile)
+    if not os.path.isdir(txtFileDir) :
+        try :
+            os.makedirs(txtFileDir)
+        except :
+            pass
+
+    if outFormat in ['txt', 'both'] :
+        extract_store.writeExtractTxt(txtFile, modelCode, obsCode, modelDt, interval, maxHour, stnIds, values, sample)
+        if outFormat == 'txt' and os.path.exists(binFile) :
+            os.remove(binFile) # 읽을 때 바이너리 파일이 우선하므로 이전 결과는 지운다
+    if outFormat in ['bin', 'both'] :
+        extract_store.writeExtractBin(binFile, modelCode, obsCode, modelDt, interval, maxHour, stnIds, values, sample)
+    extract_store.writeExtractStnXy(modelCode, obsCode, modelDt, stnXyList)
+
+def getStnXyList(model, obs, dt) :
+    '''
+    Read file and get station information including coordinates
+
+    Parameters:
+    - model(str): model code
+    - obs(str): Observation code (aws, asos)
+    - dt(datetime): datetime for finding a file (KST)
+
+    Returns:
+    - list: A list of dictionaries contains the station ID, latitude, longitude,
+             and x, y coordinates of the station. If the file does not exist, returns False
+    '''
+    
+    xyfile = cfg.PATH_MODEL_STNXY.format(MODEL=model, OBS=obs, YYYY=dt.strftime('%Y'), YYYYMMDD=dt.strftime('%Y%m%d'))
+    if os.path.exists(xyfile) == False :
+        return False
+    # f.write(f"{stnXyInfo['stn']},{stnXyInfo['lat']},{stnXyInfo['lon']},{stnXyInfo['x']},{stnXyInfo['y']}\n")
+    stnXyList = []
+    with open(xyfile, 'r') as f:
+        # 첫 번째 줄(헤더) 건너뛰기
+        header = f.readline()
+        
+        for line in f:
+            row = line.split(',')
+            pt = {
+                'stn': int(row[0]),
+                'lat': float(row[1]),
+                'lon': float(row[2]),
+                'x': int(row[3]),
+                'y': int(row[4])
+            }
+            stnXyList.append(pt)
+        
+
+    return stnXyList
+
+
+# main
+if __name__ == '__main__' :
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', required=True, help='gdps_ne36/gdps_n128/rdps_ne36/ldps/ecmf/klfs_ne36/klfs_n128')
+    parser.add_argument('--modelTm', required=True, help='yyyymmddhh')
+    # parser.add_argument('--fcstInterval', required=True, help='hour')
+    # parser.add_argument('--fcstMaxHours', required=True, help='hour')
+    parser.add_argument('--obs', required=True, help='comma seperated obs codes, extracted in one pass. eg. asos,aws,gts')
+    parser.add_argument('--format', required=False, default='txt', choices=['txt', 'bin', 'both'], help='extract file format (default txt)')
+    parser.add_argument('--workers', required=False, type=int, default=1, help='number of forecast steps decoded concurrently (default 1, wgrib2 extractors; netCDF4 / pygrib reads run one at a time)')
+    parser.add_argument('--sample', required=False, default='nearest', choices=stn_weights.METHODS, help='station sampling : nearest grid point (default), bilinear or idw interpolation')
+    parser.add_argument('--full', action='store_true', help='extract every station again (default: only stations not in the extract file)')
+
+    args = parser.parse_args()
+
+    #print("- Model Extract : ", args.model, args.obs, args.modelTm, 'fcstInterval:', args.fcstInterval, 'fcstMaxHour:',args.fcstMaxHours)
+    fcstInterval = cfg.modelConf[args.model]['fcstInterval']
+    extractMaxHour = cfg.modelConf[args.model]['modelExtractHours']
+    print("- Model Extract : ", args.model, args.obs, args.modelTm, 'interval:', str(fcstInterval), 'extractHour:', str(extractMaxHour))
+
+    modelDt = datetime.strptime(args.modelTm, '%Y%m%d%H')
+
+    stnXyLists = {}
+    for obsCode in args.obs.split(',') :
+        stnXyList = getStnXyList(args.model, obsCode, modelDt)
+        if stnXyList is False :
+            print(f'[ERROR] station xy file not found : {args.model} {obsCode}')
+            continue
+        stnXyLists[obsCode] = stnXyList
+ 
+    #model_extract(args.model, modelDt, int(args.fcstInterval), int(args.fcstMaxHours), stnXyList, args.obs)
+    
+    if len(stnXyLists) > 0 :
+        model_extract_networks(args.model, modelDt, fcstInterval, extractMaxHour, stnXyLists, args.format, args.workers, not args.full, args.sample)
+
@@ -0,0 +1,238 @@
+from datetime import datetime, timedelta
+import os
+import argparse
+import numpy as np
+
+import _config as cfg
+import obs_reader
+
+# 연도별 관측 큐브 : cube[stnIdx, hourOfYear] (float32, 결측은 NaN)
+# hourOfYear = dayOfYear * 24 + hIdx, rain_obsv 파일의 hIdx 열(일자 + hIdx+1 시간)과 동일한 배치
+
+
+def daysOfYear(year) :
+    return (datetime(year+1, 1, 1) - datetime(year, 1, 1)).days
+
+
+def _atomicSaveMeta(metaFile, stnIds, days) :
+    tmpFile = metaFile + '.tmp'
+    with open(tmpFile, 'wb') as f :
+        np.savez(f, stnIds=stnIds, days=days)
+    os.replace(tmpFile, metaFile)
+
+
+def loadObsCube(obsCode, year, mode='r') :
+    '''
+    Opens the yearly observation cube of a network as a memory map
+
+    Parameters:
+    - obsCode(str): Observation code (aws, asos)
+    - year(int): year
+    - mode(str): memmap mode ('r' or 'r+')
+
+    Returns:
+    - tuple: containing
+            - numpy.memmap: cube (stations x hours of year, float32), NaN where missing
+            - numpy.ndarray: station ID of each cube row
+            - numpy.ndarray: loaded flag for each day of year (uint8)
+      False if the cube does not exist
+    '''
+    cubeFile = cfg.PATH_OBS_CUBE.format(OBS=obsCode, YYYY=str(year))
+    metaFile = cfg.PATH_OBS_CUBE_META.format(OBS=obsCode, YYYY=str(year))
+    if os.path.exists(cubeFile) == False or os.path.exists(metaFile) == False :
+        return False
+
+    with np.load(metaFile) as meta :
+        stnIds = meta['stnIds']
+        days = meta['days']
+    cube = np.load(cubeFile, mmap_mode=mode)
+
+    return cube, stnIds, days
+
+
+def _createCube(cubeFile, nStn, year, src=None) :
+    '''
+    Writes a new NaN filled cube next to cubeFile, copying the rows of src if given, and returns the temp path
+    '''
+    tmpFile = cubeFile + '.tmp.npy'
+    cube = np.lib.format.open_memmap(tmpFile, mode='w+', dtype=np.float32, shape=(nStn, daysOfYear(year)*24))
+    cube[:] = np.nan
+    if src is not None :
+        cube[:src.shape[0]] = src
+    cube.flush()
+    del cube
+    return tmpFile
+
+
+def _writeDay(cube, stnIds, doy, fileStns, rn, valid) :
+    rows = obs_reader.stationRows(stnIds, fileStns.tolist())
+    h0 = doy * 24
+    cube[:, h0:h0+24] = np.nan
+    cube[rows, h0:h0+24] = np.where(valid, rn, np.nan).astype(np.float32)
+
+
+def updateObsCube(obsCode, dt) :
+    '''
+    Loads one day of observation text file into the yearly cube, creating or growing the cube as needed
+
+    Parameters:
+    - obsCode(str): Observation code (aws, asos)
+    - dt(datetime): date (KST)
+
+    Returns:
+    - bool: True if the day was loaded, False otherwise
+    '''
+    ymd = dt.strftime('%Y%m%d')
+    txtFile = cfg.PATH_OBS_TXT.format(OBS=obsCode, YYYY=ymd[0:4], YYYYMMDD=ymd)
+    parsed = obs_reader.readObsFile(txtFile)
+    if parsed is False :
+        print('updateObsCube - File not found - ' + txtFile)
+        return False
+    fileStns, rn, valid = parsed
+
+    year = dt.year
+    doy = (datetime(dt.year, dt.month, dt.day) - datetime(year, 1, 1)).days
+    cubeFile = cfg.PATH_OBS_CUBE.format(OBS=obsCode, YYYY=str(year))
+    metaFile = cfg.PATH_OBS_CUBE_META.format(OBS=obsCode, YYYY=str(year))
+
+    loaded = loadObsCube(obsCode, year)
+    if loaded is False :
+        stnIds = fileStns
+        days = np.zeros(daysOfYear(year), dtype=np.uint8)
+        os.replace(_createCube(cubeFile, len(stnIds), year), cubeFile)
+    else :
+        cube, stnIds, days = loaded
+        newStns = np.setdiff1d(fileStns, stnIds)
+        if len(newStns) > 0 :
+            # 신규 지점은 뒤에 붙여서 기존 지점 인덱스를 유지
+            stnIds = np.concatenate([stnIds, newStns])
+            tmpFile = _createCube(cubeFile, len(stnIds), year, cube)
+            del cube
+            os.replace(tmpFile, cubeFile)
+        else :
+            del cube
+
+    cube = np.load(cubeFile, mmap_mode='r+')
+    _writeDay(cube, stnIds, doy, fileStns, rn, valid)
+    cube.flush()
+    del cube
+
+    days[doy] = 1
+    _atomicSaveMeta(metaFile, stnIds, days)
+    return True
+
+
+def buildObsCube(obsCode, year) :
+    '''
+    Builds the yearly cube from every daily observation text file of the year
+
+    Parameters:
+    - obsCode(str): Observation code (aws, asos)
+    - year(int): year
+
+    Returns:
+    - int: number of days loaded
+    '''
+    dayFiles = {}
+    dt = datetime(year, 1, 1)
+    while dt.year == year :
+        ymd = dt.strftime('%Y%m%d')
+        parsed = obs_reader.readObsFile(cfg.PATH_OBS_TXT.format(OBS=obsCode, YYYY=ymd[0:4], YYYYMMDD=ymd))
+        if parsed is not False :
+            dayFiles[(dt - datetime(year, 1, 1)).days] = parsed
+        dt = dt + timedelta(days=1)
+
+    if len(dayFiles) == 0 :
+        print(f'buildObsCube - no obs files - {obsCode} {year}')
+        return 0
+
+    stnIds = np.unique(np.concatenate([parsed[0] for parsed in dayFiles.values()]))
+    days = np.zeros(daysOfYear(year), dtype=np.uint8)
+
+    cubeFile = cfg.PATH_OBS_CUBE.format(OBS=obsCode, YYYY=str(year))
+    metaFile = cfg.PATH_OBS_CUBE_META.format(OBS=obsCode, YYYY=str(year))
+    tmpFile = _createCube(cubeFile, len(stnIds), year)
+    cube = np.load(tmpFile, mmap_mode='r+')
+    for doy, (fileStns, rn, valid) in dayFiles.items() :
+        _writeDay(cube, stnIds, doy, fileStns, rn, valid)
+        days[doy] = 1
+    cube.flush()
+    del cube
+
+    os.replace(tmpFile, cubeFile)
+    _atomicSaveMeta(metaFile, stnIds, days)
+    return len(dayFiles)
+
+
+def getObsHours(obsCode, dtStart, nDays, stnIds, cache=None) :
+    '''
+    Returns the hourly observation window of consecutive days, sliced from the yearly cubes.
+    Days that are not in a cube are read from the daily text file.
+
+    Parameters:
+    - obsCode(str): Observation code (aws, asos)
+    - dtStart(datetime): first date of the window (KST)
+    - nDays(int): number of days
+    - stnIds(list): Station Id list, defines the row order of the result
+    - cache(file_cache.FileCache): optional cache of opened cubes and parsed text days
+
+    Returns:
+    - tuple: containing
+            - numpy.ndarray: hourly precipitation (len(stnIds) x nDays*24, float64), 0 where missing
+                             column h is the hour ending at dtStart + h+1 hours
+            - numpy.ndarray: valid mask (len(stnIds) x nDays*24, bool), False where missing
+      False if a day is neither in the cube nor in a text file
+    '''
+    rn = np.zeros((len(stnIds), nDays*24), dtype=np.float64)
+    valid = np.zeros((len(stnIds), nDays*24), dtype=bool)
+
+    cubes = {}
+    for i in range(nDays) :
+        dt = dtStart + timedelta(days=i)
+        if dt.year not in cubes :
+            if cache is None :
+                loaded = loadObsCube(obsCode, dt.year)
+            else :
+                metaFile = cfg.PATH_OBS_CUBE_META.format(OBS=obsCode, YYYY=str(dt.year))
+                loaded = cache.get(metaFile, lambda : loadObsCube(obsCode, dt.year))
+            if loaded is not False :
+                cube, cubeStns, days = loaded
+                rows = obs_reader.stationRows(cubeStns, stnIds)
+                loaded = (cube, rows, days)
+            cubes[dt.year] = loaded
+
+        doy = (datetime(dt.year, dt.month, dt.day) - datetime(dt.year, 1, 1)).days
+        if cubes[dt.year] is not False and cubes[dt.year][2][doy] :
+            cube, rows, days = cubes[dt.year]
+            sel = rows >= 0
+            vals = np.asarray(cube[rows[sel], doy*24:doy*24+24], dtype=np.float64)
+            isValid = ~np.isnan(vals)
+            rn[sel, i*24:i*24+24] = np.round(np.where(isValid, vals, 0), 1)
+            valid[sel, i*24:i*24+24] = isValid
+            continue
+
+        ymd = dt.strftime('%Y%m%d')
+        txtFile = cfg.PATH_OBS_TXT.format(OBS=obsCode, YYYY=ymd[0:4], YYYYMMDD=ymd)
+        if cache is None :
+            parsed = obs_reader.readObsFile(txtFile)
+        else :
+            parsed = cache.get(txtFile, lambda : obs_reader.readObsFile(txtFile), dt)
+        if parsed is False :
+            print('GetDayObs - File not found - ' + txtFile)
+            return False
+        rn[:, i*24:i*24+24], valid[:, i*24:i*24+24] = obs_reader.alignObsRows(parsed, stnIds)
+
+    return rn, valid
+
+
+if __name__ == '__main__' :
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--obs', required=True, help='comma seperated obs codes. eg. asos,aws')
+    parser.add_argument('--year', required=True, help='yyyy')
+
+    args = parser.parse_args()
+
+    for obsCode in args.obs.split(',') :
+        n = buildObsCube(obsCode, int(args.year))
+        print('- Obs cube : ', obsCode, args.year, 'days:', n)
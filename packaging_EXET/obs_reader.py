@@ -0,0 +1,134 @@
+import os
+import numpy as np
+
+# rain_obsv_{OBS}.{YYYYMMDD} line layout (see obs_api_save.saveObsData)
+# stnId:9, dt:9, rn:9*24, =:8
+OBS_FIELD_WIDTH = 9
+OBS_HOURS = 24
+OBS_ROW_LEN = OBS_FIELD_WIDTH * (2 + OBS_HOURS)
+OBS_LINE_MIN_LEN = 241 # 242 including newline
+
+
+def readObsFile(txtFile) :
+    '''
+    Reads every station of a daily observation text file in one pass
+
+    Parameters:
+    - txtFile(str): rain_obsv file path
+
+    Returns:
+    - tuple: containing
+            - numpy.ndarray: station IDs in the file (sorted, unique, int64)
+            - numpy.ndarray: hourly precipitation (stations x 24, float64), 0 where missing
+            - numpy.ndarray: valid mask (stations x 24, bool), False where missing
+      False if the file does not exist
+    '''
+    if os.path.exists(txtFile) == False :
+        return False
+
+    with open(txtFile, 'rb') as f :
+        lines = [line[:OBS_ROW_LEN] for line in f.read().split(b'\n') if len(line) >= OBS_LINE_MIN_LEN]
+
+    if len(lines) == 0 :
+        return np.zeros(0, dtype=np.int64), np.zeros((0, OBS_HOURS)), np.zeros((0, OBS_HOURS), dtype=bool)
+
+    raw = np.frombuffer(b''.join(lines), dtype='S' + str(OBS_FIELD_WIDTH)).reshape(len(lines), 2 + OBS_HOURS)
+    lineStns = raw[:, 0].astype(np.int64)
+
+    fields = raw[:, 2:]
+    lineValid = np.char.strip(fields) != b''
+    fields = np.where(lineValid, fields, b'0')
+    lineRn = np.round(fields.astype(np.float64), 1)
+
+    # 같은 지점이 중복되어 있으면 기존처럼 더해준다
+    fileStns, rows = np.unique(lineStns, return_inverse=True)
+    rn = np.zeros((len(fileStns), OBS_HOURS), dtype=np.float64)
+    valid = np.zeros((len(fileStns), OBS_HOURS), dtype=bool)
+    np.add.at(rn, rows, lineRn)
+    np.logical_or.at(valid, rows, lineValid)
+
+    return fileStns, rn, valid
+
+
+def readObsDay(txtFile, stnIds) :
+    '''
+    Reads a daily observation text file into a (station x 24) array in one pass
+
+    Parameters:
+    - txtFile(str): rain_obsv file path
+    - stnIds(list): Station Id list, defines the row order of the result
+
+    Returns:
+    - tuple: containing
+            - numpy.ndarray: hourly precipitation (len(stnIds) x 24, float64), 0 where missing
+            - numpy.ndarray: valid mask (len(stnIds) x 24, bool), False where missing
+      False if the file does not exist
+    '''
+    parsed = readObsFile(txtFile)
+    if parsed is False :
+        return False
+    return alignObsRows(parsed, stnIds)
+
+
+def alignObsRows(parsed, stnIds) :
+    '''
+    Reorders a readObsFile result to the given station list (same return value as readObsDay)
+    '''
+    fileStns, fileRn, fileValid = parsed
+
+    rows = stationRows(fileStns, stnIds)
+    sel = rows >= 0
+    rn = np.zeros((len(stnIds), OBS_HOURS), dtype=np.float64)
+    valid = np.zeros((len(stnIds), OBS_HOURS), dtype=bool)
+    rn[sel] = fileRn[rows[sel]]
+    valid[sel] = fileValid[rows[sel]]
+
+    return rn, valid
+
+
+def stationRows(srcStnIds, stnIds) :
+    '''
+    Finds the row of each requested station in a station ID vector
+
+    Parameters:
+    - srcStnIds(numpy.ndarray): station IDs of the source rows
+    - stnIds(list): Station Id list to look up
+
+    Returns:
+    - numpy.ndarray: row index in srcStnIds for each of stnIds, -1 if absent
+    '''
+    srcPos = {stn : i for i, stn in enumerate(np.asarray(srcStnIds).tolist())}
+    return np.array([srcPos.get(stn, -1) for stn in stnIds], dtype=np.int64)
+
+
+def sumObsHours(rn, thresholdHour) :
+    '''
+    Sums consecutive hourly columns into thresholdHour buckets
+
+    Parameters:
+    - rn(numpy.ndarray): hourly precipitation (... x hours), 0 where missing
+    - thresholdHour(int): Time to determine the prediction interval
+
+    Returns:
+    - numpy.ndarray: accumulated precipitation (... x hours/thresholdHour),
+                     bucket i covers hours (i*thresholdHour, (i+1)*thresholdHour]
+    '''
+    nBucket = rn.shape[-1] // thresholdHour
+    buckets = rn[..., :nBucket*thresholdHour].reshape(rn.shape[:-1] + (nBucket, thresholdHour))
+    return np.round(buckets.sum(axis=-1), 1)
+
+
+def validObsHours(valid, thresholdHour) :
+    '''
+    Reduces the hourly valid mask to thresholdHour buckets (same buckets as sumObsHours)
+
+    Parameters:
+    - valid(numpy.ndarray): hourly valid mask (... x hours), False where missing
+    - thresholdHour(int): Time to determine the prediction interval
+
+    Returns:
+    - numpy.ndarray: bucket valid mask (... x hours/thresholdHour), True only if every hour of the bucket is valid
+    '''
+    nBucket = valid.shape[-1] // thresholdHour
+    buckets = valid[..., :nBucket*thresholdHour].reshape(valid.shape[:-1] + (nBucket, thresholdHour))
+    return buckets.all(axis=-1)
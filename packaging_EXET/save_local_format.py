@@ -1,281 +1,595 @@
-#import json
-from datetime import datetime, timedelta
-import os
-import sqlite3
-import argparse
-import _config as cfg
-
-
-def CalcScores(modelCode, obsCode, startDt, endDt, thHour, thMm, maxFcstHour, addtionalCode) :
-    '''
-    Calculate Contingency table and Scores based on precipitation of given parameters (model, observation code, date etc.)
-
-    Parameters:
-    - modelCode(str): model code
-    - obsCode(str): Observation code (aws, asos)
-    - startDt (datetime): start datetime 
-    - endDt (datetime): end datetime
-    - thHour (int): thresholdHour (time interval)
-    - thMm (float): thresholdMms, (precipitation threshold)
-    - maxFcstHour (int): max forecasting hour
-    - addtionalCode (str or None): addtionalCode, optional (shrt)
-
-    Returns:
-    - dict: 
-        - 'ct' (dict): Contingency table for each time interval
-        - 'score' (dict): Calculated scores ('ACCURACY', 'BIAS', 'CSI', 'ETS', 'POD', 'FAR', 'POFD')
-    '''
-    szMm = format(thMm, ".1f")
-    
-    dbFiles = []
-    dt = startDt
-    while dt <= endDt :
-        #fn = PATH_CT_DB.format(obs=obsCode, yyyy=dt.strftime('%Y'), yyyymm=dt.strftime('%Y%m'))
-        if addtionalCode is None :
-            fn = cfg.PATH_CT_DAILYSUM_DB.format(OBS=obsCode, YYYY=dt.strftime('%Y'), YYYYMM=dt.strftime('%Y%m'))
-        else :
-            fn = cfg.PATH_CT_DAILYSUM_DB_ADDTIONAL.format(OBS=obsCode, YYYY=dt.strftime('%Y'), YYYYMM=dt.strftime('%Y%m'), ADD_CODE=addtionalCode)
-        #print(fn)
-        if fn not in dbFiles :
-            dbFiles.append(fn)
-        dt = dt + timedelta(days=1) #relativedelta..
-
-    #print(dbFiles)
-    #print(modelCode, obsCode, startDt, endDt, thHour, thMm)
-
-    startYmd = (startDt-timedelta(hours=24)).strftime('%Y-%m-%d') + ' 00:00:00'
-    endYmd = (endDt+timedelta(days=1)).strftime('%Y-%m-%d') + ' 00:00:00'
-
-    cts = {}
-    if addtionalCode != 'shrt' :
-        for s in range(thHour, maxFcstHour+1, thHour) :
-            cts[s] = {'h':0, 'f':0, 'm':0, 'z':0, 't':0}
-    cts[0] = {'h':0, 'f':0, 'm':0, 'z':0, 't':0}
-    
-
-    for dbFile in dbFiles :
-        conn = sqlite3.connect(dbFile, timeout=30)
-        conn.row_factory = sqlite3.Row 
-        cur = conn.cursor()
-
-        query = f"SELECT s, h, f, m, z, t FROM ct WHERE d > '{startYmd}' AND d < '{endYmd}' AND th_hour='{thHour}' AND mm='{szMm}' AND model='{modelCode}' AND s<={maxFcstHour} ORDER BY s"
-        cur.execute(query)
-        
-        while True :
-            row = cur.fetchone()
-            if not row : break
-            #if row['s'] not in cts :
-            #    cts[row['s']] = {'h':0, 'f':0, 'm':0, 'z':0, 't':0}
-
-            #for x in row.keys() :
-            #    print(x, row[x])
-
-            s = row['s']
-
-            if addtionalCode == 'shrt' :
-                if s not in cts :
-                    cts[s] = {'h':0, 'f':0, 'm':0, 'z':0, 't':0}
-
-            cts[s]['h'] += row['h']
-            cts[s]['f'] += row['f']
-            cts[s]['m'] += row['m']
-            cts[s]['z'] += row['z']
-            cts[s]['t'] += row['t']
-
-            cts[0]['h'] += row['h']
-            cts[0]['f'] += row['f']
-            cts[0]['m'] += row['m']
-            cts[0]['z'] += row['z']
-            cts[0]['t'] += row['t']
-            
-        conn.close()
-
-    scNames = {'ACCURACY', 'BIAS', 'CSI', 'ETS', 'POD', 'FAR', 'POFD'}
-    scores = {}
-    for s in cts :
-        scores[s] = {}
-        ct = cts[s]
-        
-        for scName in scNames :
-            scVal = -9.99
-            if ct is None :
-                pass
-            elif ct['t'] == 0 :
-                pass
-            elif scName in ['BIAS', 'POD'] and ct['h'] == 0 and ct['m'] == 0 :
-                pass
-            elif scName == 'FAR' and ct['h'] == 0 and ct['f'] == 0 :
-                pass
-            elif scName == 'POFD' and ct['z'] == 0 and ct['f'] == 0 :
-                pass
-            elif scName == 'CSI' and ct['h'] == 0 and ct['m'] == 0 :
-                pass
-            else :
-                if scName == 'ACCURACY' :
-                    scVal = (ct['h'] + ct['z']) / (ct['t'])
-                elif scName == 'BIAS' :
-                    scVal = (ct['h'] + ct['f']) / (ct['h'] + ct['m'])
-                elif scName == 'CSI' :
-                    scVal = ct['h'] / (ct['h'] + ct['m'] + ct['f'])
-                elif scName == 'ETS' :
-                    ar = ((ct['h'] + ct['m']) * (ct['h'] + ct['f'])) / (ct['t'])
-                    if (ct['h'] + ct['m'] + ct['f'] - ar) == 0 :
-                        scVal = -9.99
-                    else :
-                        scVal = (ct['h'] - ar) / (ct['h'] + ct['m'] + ct['f'] - ar)
-                elif scName == 'POD' :
-                    scVal = ct['h'] / (ct['h'] + ct['m'])
-                elif scName == 'FAR' :
-                    scVal = ct['f'] / (ct['h'] + ct['f'])
-                elif scName == 'POFD' :
-                    scVal = ct['f'] / (ct['f'] + ct['z'])
-            scores[s][scName] = scVal
-
-    return {'ct':cts, 'score':scores}
-    
-
-def SaveScores(modelCode, obsCode, startDt, endDt, thHour, thMm, maxFcstHour, scores, addtionalCode) :
-    '''
-    Save the evaluation scores to a file
-    
-    Parameters:
-    - modelCode(str): model code
-    - obsCode(str): Observation code (aws, asos)
-    - startDt (datetime): start datetime 
-    - endDt (datetime): end datetime
-    - thHour (int): thresholdHour (time interval)
-    - thMm (float): thresholdMms, (precipitation threshold)
-    - maxFcstHour (int): max forecasting hour
-    - scores (dict): calculated scores and statistical information
-    - addtionalCode (str or None): addtionalCode, optional
-    
-    Returns:
-    - None
-    '''
-    #dirpath = cfg.PATH_DAOU + '/pretty/' + startDt.strftime('%Y%m') + '/' + modelCode
-    if addtionalCode is None :
-        dirpath = cfg.PATH_PRETTY_FORMAT_DIR.format(MODEL=modelCode, YYYYMM=startDt.strftime('%Y%m'))
-    else :
-        dirpath = cfg.PATH_PRETTY_FORMAT_DIR_ADDTIONAL.format(MODEL=modelCode, YYYYMM=startDt.strftime('%Y%m'), ADD_CODE=addtionalCode)
-
-    if not os.path.isdir(dirpath) :
-        os.makedirs(dirpath)
-
-    cont = " \n"
-    cont += " ------------------------------------------------------\n"
-    cont += " BASED ON OBSV  from {date1} to {date2}\n".format(date1=startDt.strftime('%Y%m%d'), date2=endDt.strftime('%Y%m%d'))
-    cont += " ------------------------------------------------------\n"
-    cont += " \n"
-    cont += "  Valid Forecast time is  {ft1} hr\n".format(ft1=format(maxFcstHour, "5d"))
-    cont += "  Threshold time  is  {th_hour} hr\n".format(th_hour=format(thHour, "9d"))
-    cont += "  Threshold Value is    {th_mm} mm\n".format(th_mm=format(thMm, "7.1f"))
-    cont += " \n"
-    cont += "       Contingency Table\n"
-    cont += "              "
-    for s in scores['ct'] :
-        #if s > maxFcstHour : break
-        cont += format(s, "7d") + "H"
-    cont += "\n"
-    cont += "  Hits  Number"
-    for s in scores['ct'] :
-        #if s > maxFcstHour : break
-        cont += format(scores['ct'][s]['h'], "8d")
-    cont += "\n"
-    cont += "  False Number"
-    for s in scores['ct'] :
-        #if s > maxFcstHour : break
-        cont += format(scores['ct'][s]['f'], "8d")
-    cont += "\n"
-    cont += "  Miss  Number"
-    for s in scores['ct'] :
-        #if s > maxFcstHour : break
-        cont += format(scores['ct'][s]['m'], "8d")
-    cont += "\n"
-    cont += "  Zero  Number"
-    for s in scores['ct'] :
-        #if s > maxFcstHour : break
-        cont += format(scores['ct'][s]['z'], "8d")
-    cont += "\n"
-    cont += "  Total Number"
-    for s in scores['ct'] :
-        #if s > maxFcstHour : break
-        cont += format(scores['ct'][s]['t'], "8d")
-    cont += "\n"
-
-    cont += " \n"
-    cont += "       Categorical statistics\n"
-
-    cont += "  Accuracy    "
-    for s in scores['score'] :
-        #if s > maxFcstHour : break
-        cont += format(scores['score'][s]['ACCURACY'], "8.2f")
-    cont += "\n"
-    cont += "  Bias Score  "
-    for s in scores['score'] :
-        #if s > maxFcstHour : break
-        cont += format(scores['score'][s]['BIAS'], "8.2f")
-    cont += "\n"
-    cont += "  P.O.D.      "
-    for s in scores['score'] :
-        #if s > maxFcstHour : break
-        cont += format(scores['score'][s]['POD'], "8.2f")
-    cont += "\n"
-    cont += "  F.A.R.      "
-    for s in scores['score'] :
-        #if s > maxFcstHour : break
-        cont += format(scores['score'][s]['FAR'], "8.2f")
-    cont += "\n"
-    cont += "  P.O.F.D.    "
-    for s in scores['score'] :
-        #if s > maxFcstHour : break
-        cont += format(scores['score'][s]['POFD'], "8.2f")
-    cont += "\n"
-    cont += "  T.S. (CSI)  "
-    for s in scores['score'] :
-        #if s > maxFcstHour : break
-        cont += format(scores['score'][s]['CSI'], "8.2f")
-    cont += "\n"
-    cont += "  E.T.S. (GSS)"
-    for s in scores['score'] :
-        #if s > maxFcstHour : break
-        cont += format(scores['score'][s]['ETS'], "8.2f")
-    cont += "\n"
-    cont += " \n"
-
-    cont += " ------------------------------------------------------\n"
-
-    #print(dirpath, modelCode, thMm, thHour, maxFcstHour, startDt, endDt, obsCode)
-    fn = dirpath + '/' + modelCode + '_vrfy_obsv_' + format(thMm, ".1f") + 'mm_' + str(thHour).zfill(2) + 'hr_' + str(maxFcstHour) + 'ft' + '_' + startDt.strftime('%Y%m%d') + '_' + endDt.strftime('%Y%m%d') + '_' + obsCode + '.txt'
-
-    f = open(fn, 'w')
-    f.write(cont)
-    f.close()
-
-if __name__ == '__main__':
-
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--model', required=True, help='gdps_ne36/gdps_n128/rdps_ne36/ldps/ecmf/klfs_ne36/klfs_n128')
-    parser.add_argument('--obs', required=True, help='asos/aws')
-    parser.add_argument('--startDate', required=True, help='yyyymmdd')
-    parser.add_argument('--endDate', required=True, help='yyyymmdd')
-    parser.add_argument('--addtionalCode', required=False, help='shrt:ShrtFcstVrfy(meteorologist) verification rule')
-
-    args = parser.parse_args()
-
-    if args.addtionalCode == None :
-        print("Save ASCII format : ", args.model, args.obs, args.startDate, args.endDate)
-    else :
-        print("Save ASCII format : ", args.model, args.obs, args.startDate, args.endDate, args.addtionalCode)
-
-    startDt = datetime.strptime(args.startDate, '%Y%m%d')
-    endDt = datetime.strptime(args.endDate, '%Y%m%d')
-
-    #print(args.model)
-    for thresholdHour in cfg.modelConf[args.model]['modelThresholdHours']:
-        #print('thresholdHour : ', thresholdHour)
-        for thMm in cfg.thresholdMms:
-            szMm = format(thMm, ".1f")
-            #print(szMm)
-            for maxFcstHour in cfg.modelConf[args.model]['modelFcstMaxHours'] :
-                scores = CalcScores(args.model, args.obs, startDt, endDt, thresholdHour, thMm, maxFcstHour, args.addtionalCode)
-                SaveScores(args.model, args.obs, startDt, endDt, thresholdHour, thMm, maxFcstHour, scores, args.addtionalCode)
\ No newline at end of file
+#import json
+from datetime import datetime, timedelta
+import os
+import sqlite3
+import argparse
+import numpy as np
+import _config as cfg
+import ct_store
+
+
+def CalcScores(modelCode, obsCode, startDt, endDt, thHour, thMm, maxFcstHour, addtionalCode) :
+    '''
+    Calculate Contingency table and Scores based on precipitation of given parameters (model, observation code, date etc.)
+
+    Parameters:
+    - modelCode(str): model code
+    - obsCode(str): Observation code (aws, asos)
+    - startDt (datetime): start datetime 
+    - endDt (datetime): end datetime
+    - thHour (int): thresholdHour (time interval)
+    - thMm (float): thresholdMms, (precipitation threshold)
+    - maxFcstHour (int): max forecasting hour
+    - addtionalCode (str or None): addtionalCode, optional (shrt)
+
+    Returns:
+    - dict: 
+        - 'ct' (dict): Contingency table for each time interval
+        - 'score' (dict): Calculated scores ('ACCURACY', 'BIAS', 'CSI', 'ETS', 'POD', 'FAR', 'POFD')
+    '''
+    szMm = format(thMm, ".1f")
+
+    cts = {}
+    if addtionalCode != 'shrt' :
+        for s in range(thHour, maxFcstHour+1, thHour) :
+            cts[s] = {'h':0, 'f':0, 'm':0, 'z':0, 't':0}
+    cts[0] = {'h':0, 'f':0, 'm':0, 'z':0, 't':0}
+
+    if addtionalCode is None :
+        # ct_store : 기간의 일 파일에서 필요한 열, (th_hour, mm) 블록만 읽음
+        cols = ct_store.readRange('daysum', modelCode, obsCode, startDt, endDt, ['s', 'h', 'f', 'm', 'z', 't'], thHour=thHour, mm=thMm, maxLead=maxFcstHour)
+        leads = np.unique(cols['s'])
+        leadIdx = np.searchsorted(leads, cols['s'])
+        sums = {code : np.bincount(leadIdx, weights=cols[code], minlength=len(leads)).astype(np.int64).tolist() for code in ['h', 'f', 'm', 'z', 't']}
+        for i, s in enumerate(leads.tolist()) :
+            if s not in cts :
+                cts[s] = {'h':0, 'f':0, 'm':0, 'z':0, 't':0}
+            for code in sums :
+                cts[s][code] += sums[code][i]
+                cts[0][code] += sums[code][i]
+        return {'ct':cts, 'score':CalcCtScores(cts)}
+
+    dbFiles = []
+    dt = startDt
+    while dt <= endDt :
+        #fn = PATH_CT_DB.format(obs=obsCode, yyyy=dt.strftime('%Y'), yyyymm=dt.strftime('%Y%m'))
+        fn = cfg.PATH_CT_DAILYSUM_DB_ADDTIONAL.format(OBS=obsCode, YYYY=dt.strftime('%Y'), YYYYMM=dt.strftime('%Y%m'), ADD_CODE=addtionalCode)
+        #print(fn)
+        if fn not in dbFiles :
+            dbFiles.append(fn)
+        dt = dt + timedelta(days=1) #relativedelta..
+
+    #print(dbFiles)
+    #print(modelCode, obsCode, startDt, endDt, thHour, thMm)
+
+    startYmd = (startDt-timedelta(hours=24)).strftime('%Y-%m-%d') + ' 00:00:00'
+    endYmd = (endDt+timedelta(days=1)).strftime('%Y-%m-%d') + ' 00:00:00'
+
+    for dbFile in dbFiles :
+        conn = sqlite3.connect(dbFile, timeout=30)
+        conn.row_factory = sqlite3.Row 
+        cur = conn.cursor()
+
+        query = f"SELECT s, h, f, m, z, t FROM ct WHERE d > '{startYmd}' AND d < '{endYmd}' AND th_hour='{thHour}' AND mm='{szMm}' AND model='{modelCode}' AND s<={maxFcstHour} ORDER BY s"
+        cur.execute(query)
+        
+        while True :
+            row = cur.fetchone()
+            if not row : break
+            #if row['s'] not in cts :
+            #    cts[row['s']] = {'h':0, 'f':0, 'm':0, 'z':0, 't':0}
+
+            #for x in row.keys() :
+            #    print(x, row[x])
+
+            s = row['s']
+
+            if addtionalCode == 'shrt' :
+                if s not in cts :
+                    cts[s] = {'h':0, 'f':0, 'm':0, 'z':0, 't':0}
+
+            cts[s]['h'] += row['h']
+            cts[s]['f'] += row['f']
+            cts[s]['m'] += row['m']
+            cts[s]['z'] += row['z']
+            cts[s]['t'] += row['t']
+
+            cts[0]['h'] += row['h']
+            cts[0]['f'] += row['f']
+            cts[0]['m'] += row['m']
+            cts[0]['z'] += row['z']
+            cts[0]['t'] += row['t']
+            
+        conn.close()
+
+    return {'ct':cts, 'score':CalcCtScores(cts)}
+
+
+def ReadCtSums(modelCode, obsCode, startDt, endDt, thHours, thMms, addtionalCode) :
+    '''
+    Reads the contingency daily sums of a date range once and groups them by (thresholdHour, thresholdMm, s)
+
+    Parameters:
+    - modelCode(str): model code
+    - obsCode(str): Observation code (aws, asos)
+    - startDt (datetime): start datetime
+    - endDt (datetime): end datetime
+    - thHours (list): thresholdHours
+    - thMms (list): thresholdMms
+    - addtionalCode (str or None): addtionalCode, optional (shrt)
+
+    Returns:
+    - tuple: containing
+            - numpy.ndarray: summed contingency (h, f, m, z, t x thresholdHour x thresholdMm x s, int64)
+            - list: s of each (thresholdHour, thresholdMm) in the order CalcScores reads them
+    '''
+    szMms = [format(mm, ".1f") for mm in thMms]
+    names = ['th_hour', 'mm', 's', 'h', 'f', 'm', 'z', 't']
+    parts = []
+    if addtionalCode is None :
+        # ct_store 의 mm 은 cfg.thresholdMms 인덱스
+        cols = ct_store.readRange('daysum', modelCode, obsCode, startDt, endDt, names)
+        storeMms = [format(mm, ".1f") for mm in cfg.thresholdMms]
+        mmIdx = np.array([szMms.index(v) if v in szMms else -1 for v in storeMms], dtype=np.int64)
+        cols['mm'] = mmIdx[cols['mm']] if len(cols['mm']) > 0 else cols['mm']
+        parts.append(cols)
+    else :
+        # 월별 db 를 한 번씩만 읽음 (날짜 조건은 CalcScores 와 같음)
+        startYmd = (startDt-timedelta(hours=24)).strftime('%Y-%m-%d') + ' 00:00:00'
+        endYmd = (endDt+timedelta(days=1)).strftime('%Y-%m-%d') + ' 00:00:00'
+        dbFiles = []
+        dt = startDt
+        while dt <= endDt :
+            fn = cfg.PATH_CT_DAILYSUM_DB_ADDTIONAL.format(OBS=obsCode, YYYY=dt.strftime('%Y'), YYYYMM=dt.strftime('%Y%m'), ADD_CODE=addtionalCode)
+            if fn not in dbFiles :
+                dbFiles.append(fn)
+            dt = dt + timedelta(days=1)
+        for dbFile in dbFiles :
+            if os.path.exists(dbFile) == False :
+                print('[WARN] ct db not found : ' + dbFile)
+                continue
+            conn = sqlite3.connect(dbFile, timeout=30)
+            rows = conn.execute("SELECT th_hour, mm, s, h, f, m, z, t FROM ct WHERE d > ? AND d < ? AND model = ? ORDER BY s", (startYmd, endYmd, modelCode)).fetchall()
+            conn.close()
+            cols = {name : np.array([row[i] for row in rows], dtype=np.int64) for i, name in enumerate(names) if name != 'mm'}
+            cols['mm'] = np.array([szMms.index(row[1]) if row[1] in szMms else -1 for row in rows], dtype=np.int64)
+            parts.append(cols)
+
+    nS = max([int(cols['s'].max()) + 1 for cols in parts if len(cols['s']) > 0] + [1])
+    thIdx = np.full(max(thHours) + 1, -1, dtype=np.int64)
+    thIdx[thHours] = np.arange(len(thHours))
+
+    sums = np.zeros((5, len(thHours), len(thMms), nS), dtype=np.int64)
+    leadOrder = [[[] for mm in thMms] for th in thHours]
+    for cols in parts :
+        th = np.asarray(cols['th_hour'], dtype=np.int64)
+        th = np.where(th < len(thIdx), thIdx[np.minimum(th, len(thIdx)-1)], -1)
+        mm = np.asarray(cols['mm'], dtype=np.int64)
+        s = np.asarray(cols['s'], dtype=np.int64)
+        keep = (th >= 0) & (mm >= 0)
+        flat = (th[keep] * len(thMms) + mm[keep]) * nS + s[keep]
+        for i, code in enumerate(['h', 'f', 'm', 'z', 't']) :
+            sums[i] += np.bincount(flat, weights=np.asarray(cols[code])[keep], minlength=sums[i].size).astype(np.int64).reshape(sums[i].shape)
+        # db 마다 s 순서로 읽으므로 처음 나온 순서 = db 순서, 그 안에서 s 순서
+        present = np.bincount(flat, minlength=sums[0].size).reshape(sums[0].shape) > 0
+        for i, j, v in zip(*np.nonzero(present)) :
+            if v not in leadOrder[i][j] :
+                leadOrder[i][j].append(int(v))
+    return sums, leadOrder
+
+
+def CalcScoresAll(modelCode, obsCode, startDt, endDt, thHours, thMms, maxFcstHours, addtionalCode) :
+    '''
+    Calculate Contingency table and Scores of every (thresholdHour, thresholdMm, maxFcstHour) with one scan of the date range
+
+    Parameters:
+    - modelCode(str): model code
+    - obsCode(str): Observation code (aws, asos)
+    - startDt (datetime): start datetime
+    - endDt (datetime): end datetime
+    - thHours (list): thresholdHours
+    - thMms (list): thresholdMms
+    - maxFcstHours (list): max forecasting hours
+    - addtionalCode (str or None): addtionalCode, optional (shrt)
+
+    Returns:
+    - dict: (thHour, thMm, maxFcstHour) -> same value as CalcScores
+    '''
+    sums, leadOrder = ReadCtSums(modelCode, obsCode, startDt, endDt, thHours, thMms, addtionalCode)
+    nS = sums.shape[-1]
+    sIdx = np.arange(nS)
+
+    rst = {}
+    for maxFcstHour in maxFcstHours :
+        # 구간 0 은 maxFcstHour 이하 모든 구간의 합
+        cube = np.where(sIdx <= maxFcstHour, sums, 0)
+        cube[..., 0] = cube.sum(axis=-1)
+        scoreCube = CalcScoreArrays(*cube)
+        ctVals = cube.transpose(1, 2, 3, 0).tolist()
+        scVals = {scName : scoreCube[scName].tolist() for scName in scoreCube}
+
+        for i, thHour in enumerate(thHours) :
+            for j, thMm in enumerate(thMms) :
+                # CalcScores 와 같은 구간 순서
+                if addtionalCode != 'shrt' :
+                    ss = list(range(thHour, maxFcstHour+1, thHour)) + [0]
+                else :
+                    ss = [0]
+                ss += [s for s in leadOrder[i][j] if s <= maxFcstHour and s not in ss]
+                cts = {}
+                scores = {}
+                for s in ss :
+                    vals = ctVals[i][j][s] if s < nS else [0, 0, 0, 0, 0]
+                    cts[s] = {'h':vals[0], 'f':vals[1], 'm':vals[2], 'z':vals[3], 't':vals[4]}
+                    scores[s] = {scName : (scVals[scName][i][j][s] if s < nS else -9.99) for scName in scVals}
+                rst[(thHour, thMm, maxFcstHour)] = {'ct':cts, 'score':scores}
+    return rst
+
+
+def CalcScoreArrays(h, f, m, z, t) :
+    '''
+    Calculate the categorical scores of contingency arrays (same rules as CalcCtScores, -9.99 where undefined)
+
+    Parameters:
+    - h, f, m, z, t (numpy.ndarray): hits, false alarms, misses, correct negatives, total (same shape)
+
+    Returns:
+    - dict: score name ('ACCURACY', 'BIAS', 'CSI', 'ETS', 'POD', 'FAR', 'POFD') -> float64 array
+    '''
+    h, f, m, z, t = [np.asarray(v, dtype=np.int64) for v in (h, f, m, z, t)]
+    valid = t != 0
+
+    def ratio(num, den, cond) :
+        cond = cond & valid & (den != 0)
+        return np.where(cond, num / np.where(cond, den, 1), -9.99)
+
+    ar = np.where(valid, (h + m) * (h + f) / np.where(valid, t, 1), 0.)
+    etsDen = h + m + f - ar
+    return {
+        'ACCURACY' : ratio(h + z, t, valid),
+        'BIAS' : ratio(h + f, h + m, ~((h == 0) & (m == 0))),
+        'CSI' : ratio(h, h + m + f, ~((h == 0) & (m == 0))),
+        'ETS' : np.where(valid & (etsDen != 0), (h - ar) / np.where(valid & (etsDen != 0), etsDen, 1), -9.99),
+        'POD' : ratio(h, h + m, ~((h == 0) & (m == 0))),
+        'FAR' : ratio(f, h + f, ~((h == 0) & (f == 0))),
+        'POFD' : ratio(f, f + z, ~((z == 0) & (f == 0)))
+    }
+
+
+def CalcMomentScores(modelCode, obsCode, startDt, endDt, thHours, maxFcstHours, addtionalCode=None) :
+    '''
+    Calculate the continuous error scores of every (thresholdHour, maxFcstHour) from the daily moment sums
+    (ct_store momentsum, or the moment table of the addtionalCode daily sum db)
+
+    Parameters:
+    - modelCode(str): model code
+    - obsCode(str): Observation code (aws, asos)
+    - startDt (datetime): start datetime
+    - endDt (datetime): end datetime
+    - thHours (list): thresholdHours
+    - maxFcstHours (list): max forecasting hours
+    - addtionalCode (str or None): addtionalCode, optional (shrt)
+
+    Returns:
+    - dict: (thHour, maxFcstHour) -> s -> ('N', 'ME', 'MAE', 'RMSE', 'CORR'), s 0 is all leads. empty if no moments
+    '''
+    codes = ['n', 'sf', 'so', 'sff', 'soo', 'sfo', 'sae']
+    if addtionalCode is None :
+        cols = ct_store.readRange('momentsum', modelCode, obsCode, startDt, endDt, ['th_hour', 's'] + codes)
+    else :
+        # 월별 db 의 moment 테이블 (날짜 조건은 ReadCtSums 와 같음)
+        startYmd = (startDt-timedelta(hours=24)).strftime('%Y-%m-%d') + ' 00:00:00'
+        endYmd = (endDt+timedelta(days=1)).strftime('%Y-%m-%d') + ' 00:00:00'
+        dbFiles = []
+        dt = startDt
+        while dt <= endDt :
+            fn = cfg.PATH_CT_DAILYSUM_DB_ADDTIONAL.format(OBS=obsCode, YYYY=dt.strftime('%Y'), YYYYMM=dt.strftime('%Y%m'), ADD_CODE=addtionalCode)
+            if fn not in dbFiles :
+                dbFiles.append(fn)
+            dt = dt + timedelta(days=1)
+        rows = []
+        for dbFile in dbFiles :
+            if os.path.exists(dbFile) == False :
+                continue
+            conn = sqlite3.connect(dbFile, timeout=30)
+            if conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='moment'").fetchone() is not None :
+                rows += conn.execute("SELECT th_hour, s, " + ', '.join(codes) + " FROM moment WHERE d > ? AND d < ? AND model = ?", (startYmd, endYmd, modelCode)).fetchall()
+            conn.close()
+        cols = {name : np.array([row[i] for row in rows], dtype=np.int64 if i < 2 else np.float64) for i, name in enumerate(['th_hour', 's'] + codes)}
+    if len(cols['s']) == 0 :
+        return {}
+
+    nS = int(cols['s'].max()) + 1
+    thIdx = np.full(max(max(thHours), int(cols['th_hour'].max())) + 1, -1, dtype=np.int64)
+    thIdx[thHours] = np.arange(len(thHours))
+    th = thIdx[cols['th_hour'].astype(np.int64)]
+    keep = th >= 0
+    flat = th[keep] * nS + cols['s'][keep].astype(np.int64)
+    sums = np.zeros((len(codes), len(thHours), nS), dtype=np.float64)
+    for i, code in enumerate(codes) :
+        sums[i] = np.bincount(flat, weights=cols[code][keep], minlength=len(thHours) * nS).reshape(len(thHours), nS)
+
+    rst = {}
+    sIdx = np.arange(nS)
+    for maxFcstHour in maxFcstHours :
+        # 구간 0 은 maxFcstHour 이하 모든 구간의 합
+        cube = np.where(sIdx <= maxFcstHour, sums, 0.)
+        cube[..., 0] = cube.sum(axis=-1)
+        scVals = {scName : arr.tolist() for scName, arr in CalcMomentArrays(*cube).items()}
+        for i, thHour in enumerate(thHours) :
+            if addtionalCode is None :
+                ss = list(range(thHour, maxFcstHour+1, thHour)) + [0]
+            else :
+                # shrt 의 s 는 예보관 발표시각 (CalcScoresAll 과 같이 자료가 있는 s 만)
+                ss = [0] + [s for s in range(1, min(nS, maxFcstHour+1)) if sums[0][i][s] > 0]
+            rst[(thHour, maxFcstHour)] = {s : {scName : (scVals[scName][i][s] if s < nS else (0 if scName == 'N' else -9.99)) for scName in scVals} for s in ss}
+    return rst
+
+
+def CalcMomentArrays(n, sf, so, sff, soo, sfo, sae) :
+    '''
+    Calculate the continuous error scores of moment sums (-9.99 where undefined)
+
+    Parameters:
+    - n, sf, so, sff, soo, sfo, sae (numpy.ndarray): count, sum of f, o, f^2, o^2, fo, |f-o| (same shape)
+
+    Returns:
+    - dict: 'N' (int), 'ME', 'MAE', 'RMSE', 'CORR' -> array
+    '''
+    valid = n > 0
+    nn = np.where(valid, n, 1)
+    mse = np.maximum((sff - 2 * sfo + soo) / nn, 0.)
+    # 상관계수는 n * sum(fo) - sum(f) * sum(o) 형태로 계산 (분산이 0 이면 정의되지 않음)
+    den = (n * sff - sf * sf) * (n * soo - so * so)
+    corrValid = (n > 1) & (den > 0)
+    return {
+        'N' : n.astype(np.int64),
+        'ME' : np.where(valid, (sf - so) / nn, -9.99),
+        'MAE' : np.where(valid, sae / nn, -9.99),
+        'RMSE' : np.where(valid, np.sqrt(mse), -9.99),
+        'CORR' : np.where(corrValid, (n * sfo - sf * so) / np.sqrt(np.where(corrValid, den, 1.)), -9.99)
+    }
+
+
+def CalcCtScores(cts) :
+    '''
+    Calculate the categorical scores of contingency tables
+
+    Parameters:
+    - cts (dict): Contingency table (h, f, m, z, t) for each time interval
+
+    Returns:
+    - dict: Calculated scores ('ACCURACY', 'BIAS', 'CSI', 'ETS', 'POD', 'FAR', 'POFD') for each time interval
+    '''
+    scNames = {'ACCURACY', 'BIAS', 'CSI', 'ETS', 'POD', 'FAR', 'POFD'}
+    scores = {}
+    for s in cts :
+        scores[s] = {}
+        ct = cts[s]
+        
+        for scName in scNames :
+            scVal = -9.99
+            if ct is None :
+                pass
+            elif ct['t'] == 0 :
+                pass
+            elif scName in ['BIAS', 'POD'] and ct['h'] == 0 and ct['m'] == 0 :
+                pass
+            elif scName == 'FAR' and ct['h'] == 0 and ct['f'] == 0 :
+                pass
+            elif scName == 'POFD' and ct['z'] == 0 and ct['f'] == 0 :
+                pass
+            elif scName == 'CSI' and ct['h'] == 0 and ct['m'] == 0 :
+                pass
+            else :
+                if scName == 'ACCURACY' :
+                    scVal = (ct['h'] + ct['z']) / (ct['t'])
+                elif scName == 'BIAS' :
+                    scVal = (ct['h'] + ct['f']) / (ct['h'] + ct['m'])
+                elif scName == 'CSI' :
+                    scVal = ct['h'] / (ct['h'] + ct['m'] + ct['f'])
+                elif scName == 'ETS' :
+                    ar = ((ct['h'] + ct['m']) * (ct['h'] + ct['f'])) / (ct['t'])
+                    if (ct['h'] + ct['m'] + ct['f'] - ar) == 0 :
+                        scVal = -9.99
+                    else :
+                        scVal = (ct['h'] - ar) / (ct['h'] + ct['m'] + ct['f'] - ar)
+                elif scName == 'POD' :
+                    scVal = ct['h'] / (ct['h'] + ct['m'])
+                elif scName == 'FAR' :
+                    scVal = ct['f'] / (ct['h'] + ct['f'])
+                elif scName == 'POFD' :
+                    scVal = ct['f'] / (ct['f'] + ct['z'])
+            scores[s][scName] = scVal
+
+    return scores
+    
+
+def SaveScores(modelCode, obsCode, startDt, endDt, thHour, thMm, maxFcstHour, scores, addtionalCode) :
+    '''
+    Save the evaluation scores to a file
+    
+    Parameters:
+    - modelCode(str): model code
+    - obsCode(str): Observation code (aws, asos)
+    - startDt (datetime): start datetime 
+    - endDt (datetime): end datetime
+    - thHour (int): thresholdHour (time interval)
+    - thMm (float): thresholdMms, (precipitation threshold)
+    - maxFcstHour (int): max forecasting hour
+    - scores (dict): calculated scores and statistical information
+                     ('cont' : CalcMomentScores, 'ci' : bootstrap intervals of ct_bootstrap, optional)
+    - addtionalCode (str or None): addtionalCode, optional
+    
+    Returns:
+    - None
+    '''
+    #dirpath = cfg.PATH_DAOU + '/pretty/' + startDt.strftime('%Y%m') + '/' + modelCode
+    if addtionalCode is None :
+        dirpath = cfg.PATH_PRETTY_FORMAT_DIR.format(MODEL=modelCode, YYYYMM=startDt.strftime('%Y%m'))
+    else :
+        dirpath = cfg.PATH_PRETTY_FORMAT_DIR_ADDTIONAL.format(MODEL=modelCode, YYYYMM=startDt.strftime('%Y%m'), ADD_CODE=addtionalCode)
+
+    if not os.path.isdir(dirpath) :
+        os.makedirs(dirpath)
+
+    cont = " \n"
+    cont += " ------------------------------------------------------\n"
+    cont += " BASED ON OBSV  from {date1} to {date2}\n".format(date1=startDt.strftime('%Y%m%d'), date2=endDt.strftime('%Y%m%d'))
+    cont += " ------------------------------------------------------\n"
+    cont += " \n"
+    cont += "  Valid Forecast time is  {ft1} hr\n".format(ft1=format(maxFcstHour, "5d"))
+    cont += "  Threshold time  is  {th_hour} hr\n".format(th_hour=format(thHour, "9d"))
+    cont += "  Threshold Value is    {th_mm} mm\n".format(th_mm=format(thMm, "7.1f"))
+    cont += " \n"
+    cont += "       Contingency Table\n"
+    cont += "              "
+    for s in scores['ct'] :
+        #if s > maxFcstHour : break
+        cont += format(s, "7d") + "H"
+    cont += "\n"
+    cont += "  Hits  Number"
+    for s in scores['ct'] :
+        #if s > maxFcstHour : break
+        cont += format(scores['ct'][s]['h'], "8d")
+    cont += "\n"
+    cont += "  False Number"
+    for s in scores['ct'] :
+        #if s > maxFcstHour : break
+        cont += format(scores['ct'][s]['f'], "8d")
+    cont += "\n"
+    cont += "  Miss  Number"
+    for s in scores['ct'] :
+        #if s > maxFcstHour : break
+        cont += format(scores['ct'][s]['m'], "8d")
+    cont += "\n"
+    cont += "  Zero  Number"
+    for s in scores['ct'] :
+        #if s > maxFcstHour : break
+        cont += format(scores['ct'][s]['z'], "8d")
+    cont += "\n"
+    cont += "  Total Number"
+    for s in scores['ct'] :
+        #if s > maxFcstHour : break
+        cont += format(scores['ct'][s]['t'], "8d")
+    cont += "\n"
+
+    cont += " \n"
+    cont += "       Categorical statistics\n"
+
+    cont += "  Accuracy    "
+    for s in scores['score'] :
+        #if s > maxFcstHour : break
+        cont += format(scores['score'][s]['ACCURACY'], "8.2f")
+    cont += "\n"
+    cont += "  Bias Score  "
+    for s in scores['score'] :
+        #if s > maxFcstHour : break
+        cont += format(scores['score'][s]['BIAS'], "8.2f")
+    cont += "\n"
+    cont += "  P.O.D.      "
+    for s in scores['score'] :
+        #if s > maxFcstHour : break
+        cont += format(scores['score'][s]['POD'], "8.2f")
+    cont += "\n"
+    cont += "  F.A.R.      "
+    for s in scores['score'] :
+        #if s > maxFcstHour : break
+        cont += format(scores['score'][s]['FAR'], "8.2f")
+    cont += "\n"
+    cont += "  P.O.F.D.    "
+    for s in scores['score'] :
+        #if s > maxFcstHour : break
+        cont += format(scores['score'][s]['POFD'], "8.2f")
+    cont += "\n"
+    cont += "  T.S. (CSI)  "
+    for s in scores['score'] :
+        #if s > maxFcstHour : break
+        cont += format(scores['score'][s]['CSI'], "8.2f")
+    cont += "\n"
+    cont += "  E.T.S. (GSS)"
+    for s in scores['score'] :
+        #if s > maxFcstHour : break
+        cont += format(scores['score'][s]['ETS'], "8.2f")
+    cont += "\n"
+    cont += " \n"
+
+    if 'cont' in scores :
+        # 연속 검증 점수 (ct_store momentsum), thresholdMm 과 무관
+        cont += "       Continuous statistics\n"
+        cont += "  Pair  Number"
+        for s in scores['score'] :
+            cont += format(scores['cont'].get(s, {}).get('N', 0), "8d")
+        cont += "\n"
+        for scName, label in [('ME', 'Mean Error  '), ('MAE', 'M.A.E.      '), ('RMSE', 'R.M.S.E.    '), ('CORR', 'Correlation ')] :
+            cont += "  " + label
+            for s in scores['score'] :
+                cont += format(scores['cont'].get(s, {}).get(scName, -9.99), "8.2f")
+            cont += "\n"
+        cont += " \n"
+
+    if 'ci' in scores :
+        # 블록 부트스트랩 구간 (ct_bootstrap), 점수마다 하한 / 상한 두 줄
+        nRep, blockDays, alpha = scores['ciInfo']
+        cont += "       Bootstrap {level}% interval ({nRep} replicates, {blockDays}-day blocks)\n".format(level=format(100*(1-alpha), ".0f"), nRep=nRep, blockDays=blockDays)
+        for scName, label in [('ACCURACY', 'Accuracy    '), ('BIAS', 'Bias Score  '), ('POD', 'P.O.D.      '), ('FAR', 'F.A.R.      '),
+                              ('POFD', 'P.O.F.D.    '), ('CSI', 'T.S. (CSI)  '), ('ETS', 'E.T.S. (GSS)')] :
+            for k, szLabel in enumerate([label, '            ']) :
+                cont += "  " + szLabel
+                for s in scores['score'] :
+                    cont += format(scores['ci'].get(s, {}).get(scName, (-9.99, -9.99))[k], "8.2f")
+                cont += "\n"
+        cont += " \n"
+
+    cont += " ------------------------------------------------------\n"
+
+    #print(dirpath, modelCode, thMm, thHour, maxFcstHour, startDt, endDt, obsCode)
+    fn = dirpath + '/' + modelCode + '_vrfy_obsv_' + format(thMm, ".1f") + 'mm_' + str(thHour).zfill(2) + 'hr_' + str(maxFcstHour) + 'ft' + '_' + startDt.strftime('%Y%m%d') + '_' + endDt.strftime('%Y%m%d') + '_' + obsCode + '.txt'
+
+    f = open(fn, 'w')
+    f.write(cont)
+    f.close()
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', required=True, help='gdps_ne36/gdps_n128/rdps_ne36/ldps/ecmf/klfs_ne36/klfs_n128')
+    parser.add_argument('--obs', required=True, help='asos/aws')
+    parser.add_argument('--startDate', required=True, help='yyyymmdd')
+    parser.add_argument('--endDate', required=True, help='yyyymmdd')
+    parser.add_argument('--addtionalCode', required=False, help='shrt:ShrtFcstVrfy(meteorologist) verification rule')
+    parser.add_argument('--perCombo', action='store_true', help='read the date range once per combination (CalcScores) instead of once for all')
+
+    args = parser.parse_args()
+
+    if args.addtionalCode == None :
+        print("Save ASCII format : ", args.model, args.obs, args.startDate, args.endDate)
+    else :
+        print("Save ASCII format : ", args.model, args.obs, args.startDate, args.endDate, args.addtionalCode)
+
+    startDt = datetime.strptime(args.startDate, '%Y%m%d')
+    endDt = datetime.strptime(args.endDate, '%Y%m%d')
+
+    thHours = cfg.modelConf[args.model]['modelThresholdHours']
+    maxFcstHours = cfg.modelConf[args.model]['modelFcstMaxHours']
+    # 연속 검증 점수는 moment 합계가 있을 때만 (ct_store momentsum, shrt 는 일 합계 db 의 moment 테이블)
+    moments = CalcMomentScores(args.model, args.obs, startDt, endDt, thHours, maxFcstHours, args.addtionalCode)
+    if args.perCombo == False :
+        # 기간을 한 번만 읽어서 모든 (thresholdHour, thresholdMm, maxFcstHour) 조합을 계산
+        allScores = CalcScoresAll(args.model, args.obs, startDt, endDt, thHours, cfg.thresholdMms, maxFcstHours, args.addtionalCode)
+        for (thresholdHour, thMm, maxFcstHour), scores in allScores.items() :
+            if (thresholdHour, maxFcstHour) in moments :
+                scores['cont'] = moments[(thresholdHour, maxFcstHour)]
+            SaveScores(args.model, args.obs, startDt, endDt, thresholdHour, thMm, maxFcstHour, scores, args.addtionalCode)
+    else :
+        #print(args.model)
+        for thresholdHour in thHours:
+            #print('thresholdHour : ', thresholdHour)
+            for thMm in cfg.thresholdMms:
+                szMm = format(thMm, ".1f")
+                #print(szMm)
+                for maxFcstHour in maxFcstHours :
+                    scores = CalcScores(args.model, args.obs, startDt, endDt, thresholdHour, thMm, maxFcstHour, args.addtionalCode)
+                    if (thresholdHour, maxFcstHour) in moments :
+                        scores['cont'] = moments[(thresholdHour, maxFcstHour)]
+                    SaveScores(args.model, args.obs, startDt, endDt, thresholdHour, thMm, maxFcstHour, scores, args.addtionalCode)
\ No newline at end of file
@@ -0,0 +1,183 @@
+import os
+import argparse
+import numpy as np
+
+import _config as cfg
+import grid_index
+import grid_registry
+
+# 지점 보간 가중치 (지점 x 격자점 희소 행렬, 지점마다 이웃 격자점 K 개 : ys, xs, ws [지점, K])
+#  - bilinear : 투영 정보(grid_registry)로 구한 격자 위치의 둘레 4 점, 투영 정보가 없는 격자는 idw 사용
+#  - idw      : 최근접 4 점 (grid_index), 거리 제곱 역수 가중
+#  - stnxy_{MODEL}_{OBS}.csv 옆에 stnxy_{MODEL}_{OBS}.{METHOD}.npz 로 저장, csv 가 바뀌면 다시 계산
+#  - step 마다 sampler.gather(field, ys, xs, ws) = 행마다 K 개 값을 가진 희소 행렬 x 격자 벡터
+
+METHODS = ['nearest', 'bilinear', 'idw']
+IDW_POINTS = 4
+IDW_POWER = 2
+
+# 지점마다 wgrib2 -ijlat 로 값을 받는 추출 모듈은 격자 값이 없어서 보간 불가
+WEIGHTS_UNSUPPORTED = ['gdps_n128', 'ldps_n128']
+
+
+def bilinearWeights(proj, lats, lons) :
+    '''
+    Computes bilinear weights of the 4 surrounding grid points from the grid projection
+
+    Parameters:
+    - proj(dict): projection metadata (see grid_registry)
+    - lats(numpy.ndarray): latitude of points
+    - lons(numpy.ndarray): longitude of points
+
+    Returns:
+    - tuple: (ys, xs, ws) arrays (points x 4)
+    '''
+    if proj['type'] == 'lambert' :
+        fy, fx = grid_registry.lambertToXy(proj, lats, lons)
+    else :
+        fy, fx = grid_registry.latlonGridToXy(proj, lats, lons)
+
+    ny, nx = proj['ny'], proj['nx']
+    fy = np.clip(fy, 0, ny-1)
+    y0 = np.clip(np.floor(fy).astype(np.int64), 0, ny-2)
+    dy = fy - y0
+    if proj.get('cyclic', False) :
+        x0 = np.floor(fx).astype(np.int64)
+        dx = fx - x0
+        x0 = x0 % nx
+        x1 = (x0 + 1) % nx
+    else :
+        fx = np.clip(fx, 0, nx-1)
+        x0 = np.clip(np.floor(fx).astype(np.int64), 0, nx-2)
+        dx = fx - x0
+        x1 = x0 + 1
+
+    ys = np.stack([y0, y0, y0+1, y0+1], axis=1)
+    xs = np.stack([x0, x1, x0, x1], axis=1)
+    ws = np.stack([(1-dy)*(1-dx), (1-dy)*dx, dy*(1-dx), dy*dx], axis=1)
+    return ys, xs, ws
+
+
+def idwWeights(modelCode, lats, lons, k=IDW_POINTS, power=IDW_POWER) :
+    '''
+    Computes inverse distance weights of the k nearest grid points
+
+    Returns:
+    - tuple: (ys, xs, ws) arrays (points x k), False if the grid file does not exist
+    '''
+    nearest = grid_index.findNearestPointsK(modelCode, lats, lons, k)
+    if nearest is False :
+        return False
+    ys, xs, dist = nearest
+    # 격자점과 같은 위치면 그 점만 사용
+    exact = dist[:, 0] < 1e-12
+    inv = 1.0 / np.maximum(dist, 1e-12) ** power
+    inv[exact] = 0.
+    inv[exact, 0] = 1.
+    return ys, xs, inv / inv.sum(axis=1, keepdims=True)
+
+
+def computeWeights(modelCode, lats, lons, method) :
+    '''
+    Computes the interpolation weights of points
+
+    Parameters:
+    - modelCode(str): model code
+    - lats(list): latitude of points
+    - lons(list): longitude of points
+    - method(str): 'bilinear' or 'idw'
+
+    Returns:
+    - tuple: (ys, xs, ws) arrays (points x K), False if the grid is not available
+    '''
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    if method == 'bilinear' :
+        proj = grid_registry.loadGridProj(modelCode)
+        if proj is not False and proj['type'] in ['latlon', 'lambert'] :
+            return bilinearWeights(proj, lats, lons)
+        print('[WARN] grid projection not registered, idw is used : ' + modelCode)
+    return idwWeights(modelCode, lats, lons)
+
+
+def loadStationWeights(modelCode, obsCode, stnXyList, method) :
+    '''
+    Returns the interpolation weights of the stations, computing and saving them when the station file changed
+
+    Parameters:
+    - modelCode(str): model code
+    - obsCode(str): Observation code
+    - stnXyList(list): station list (stn, lat, lon, x, y) from the station xy file
+    - method(str): 'bilinear' or 'idw'
+
+    Returns:
+    - tuple: (ys, xs, ws) arrays (stations x K) in stnXyList order, False if the grid is not available
+    '''
+    xyFile = cfg.PATH_MODEL_STNXY.format(MODEL=modelCode, OBS=obsCode)
+    wFile = cfg.PATH_MODEL_STNXY_WEIGHTS.format(MODEL=modelCode, OBS=obsCode, METHOD=method)
+    stnIds = np.array([stn['stn'] for stn in stnXyList], dtype=np.int64)
+
+    if os.path.exists(wFile) and (os.path.exists(xyFile) == False or os.path.getmtime(wFile) >= os.path.getmtime(xyFile)) :
+        with np.load(wFile) as w :
+            if np.array_equal(w['stnIds'], stnIds) :
+                return w['ys'], w['xs'], w['ws']
+
+    weights = computeWeights(modelCode, [stn['lat'] for stn in stnXyList], [stn['lon'] for stn in stnXyList], method)
+    if weights is False :
+        return False
+    ys, xs, ws = weights
+
+    os.makedirs(os.path.dirname(wFile), exist_ok=True)
+    tmpFile = wFile + '.' + str(os.getpid()) + '.tmp'
+    with open(tmpFile, 'wb') as f :
+        np.savez(f, stnIds=stnIds, ys=ys, xs=xs, ws=ws)
+    os.replace(tmpFile, wFile)
+    return ys, xs, ws
+
+
+def attachWeights(modelCode, obsCode, stnXyList, method) :
+    '''
+    Adds the interpolation neighbours (ys, xs, ws) to each station of the list (used by sampler.stationIndex)
+
+    Returns:
+    - list: station list with 'ys', 'xs', 'ws', the list as is for 'nearest', False if the weights are not available
+    '''
+    if method == 'nearest' :
+        return stnXyList
+    if modelCode in WEIGHTS_UNSUPPORTED :
+        print(f'[ERROR] {method} sampling is not supported for {modelCode}')
+        return False
+    weights = loadStationWeights(modelCode, obsCode, stnXyList, method)
+    if weights is False :
+        return False
+    ys, xs, ws = weights
+    rst = []
+    for i, stn in enumerate(stnXyList) :
+        stn = dict(stn)
+        stn['ys'] = tuple(int(v) for v in ys[i])
+        stn['xs'] = tuple(int(v) for v in xs[i])
+        stn['ws'] = tuple(float(v) for v in ws[i])
+        rst.append(stn)
+    return rst
+
+
+if __name__ == '__main__' :
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', required=True, help='comma seperated model codes. eg. gdps_ne36,klfs_ne36')
+    parser.add_argument('--obs', required=True, help='comma seperated obs codes. eg. asos,aws')
+    parser.add_argument('--method', required=False, default='bilinear', choices=['bilinear', 'idw'], help='interpolation method')
+
+    args = parser.parse_args()
+
+    import model_rain_extract
+    from datetime import datetime
+    for modelCode in args.model.split(',') :
+        for obsCode in args.obs.split(',') :
+            stnXyList = model_rain_extract.getStnXyList(modelCode, obsCode, datetime.now())
+            if stnXyList is False :
+                print(f'[ERROR] station xy file not found : {modelCode} {obsCode}')
+                continue
+            weights = loadStationWeights(modelCode, obsCode, stnXyList, args.method)
+            if weights is not False :
+                print('- Station weights : ', modelCode, obsCode, args.method, weights[2].shape)